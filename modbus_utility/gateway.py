@@ -0,0 +1,67 @@
+import asyncio
+
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.modbus_gateway import ModbusGateway
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.modbus_tcp_server import parse_host_port
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.stats_utils import generate_stats_table
+
+app = typer.Typer()
+console = Console()
+
+
+@app.command()
+def gateway(listen: str = "0.0.0.0:502"):
+    """
+    Run a Modbus TCP to RTU gateway on the master serial port. TCP clients are served
+    fairly and identical concurrent reads share a single bus transaction.
+    """
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        host, port = parse_host_port(listen)
+    except ValueError as e:
+        console.print(
+            f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+
+    modbus_client = ModbusMaster(
+        port=session["port"],
+        baudrate=session["baudrate"],
+        parity=session["parity"],
+        stop_bits=session["stopbits"],
+        timeout=session["timeout"],
+        slave_address=session["address"],
+    )
+    modbus_gateway = ModbusGateway(modbus_client)
+    console.print(
+        f"Forwarding Modbus TCP clients on {format_text_element(TextElement(value=listen, format=TextFormat(color=TextColors.CYAN, bold=True)))} "
+        f"to {format_text_element(TextElement(value=session['port'], format=TextFormat(color=TextColors.GREEN, bold=True)))}"
+    )
+    try:
+        asyncio.run(modbus_gateway.serve(host, port))
+    except KeyboardInterrupt:
+        console.print(
+            f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}"
+        )
+        console.print(generate_stats_table(modbus_gateway.stats.rows()))
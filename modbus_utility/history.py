@@ -0,0 +1,142 @@
+from datetime import datetime
+import time
+
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.timeseries_store import TimeSeriesStore
+
+app = typer.Typer()
+console = Console()
+
+
+def parse_time(value: str | None, default: float) -> float:
+    """
+    Parses a time argument, either an ISO date/time or a number of seconds before now.
+    :param value: Time argument to parse.
+    :param default: Unix time to use when the argument is not given.
+    :return: Unix time in seconds.
+    """
+    if value is None:
+        return default
+    try:
+        return time.time() - float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="milliseconds")
+
+
+@app.command()
+def history(
+    store: str,
+    point: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    bucket: float | None = None,
+    limit: int = 1000,
+):
+    """
+    Query the values stored by 'master poll --store'. POINT is SLAVE-REGISTER, without it
+    the stored points are listed. --start/--end take an ISO date/time or a number of
+    seconds before now, --bucket downsamples to min/max/mean per bucket of seconds.
+    """
+    timeseries_store = TimeSeriesStore(store)
+    if point is None:
+        console.print(
+            generate_table(
+                [TextElement(value="POINT"), TextElement(value="SEGMENTS")],
+                [
+                    [
+                        TextElement(
+                            value=name,
+                            format=TextFormat(color=TextColors.BLUE, bold=True),
+                        ),
+                        TextElement(
+                            value=len(timeseries_store.segments(name)),
+                            format=TextFormat(color=TextColors.GREEN),
+                        ),
+                    ]
+                    for name in timeseries_store.points()
+                ],
+            )
+        )
+        return
+
+    if not timeseries_store.segments(point):
+        console.print(
+            f"{format_text_element(TextElement(value=f'No data stored for point {point}.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+
+    try:
+        start_time = parse_time(start, 0.0)
+        end_time = parse_time(end, time.time() + 1)
+    except ValueError as e:
+        console.print(
+            f"{format_text_element(TextElement(value=f'Invalid time: {e}', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+
+    if bucket is None:
+        rows = []
+        for timestamp, value in timeseries_store.query(point, start_time, end_time):
+            rows.append(
+                [
+                    TextElement(
+                        value=format_timestamp(timestamp),
+                        format=TextFormat(color=TextColors.BLUE, bold=True),
+                    ),
+                    TextElement(
+                        value=value, format=TextFormat(color=TextColors.GREEN, bold=True)
+                    ),
+                ]
+            )
+            if len(rows) >= limit:
+                break
+        console.print(
+            generate_table([TextElement(value="TIME"), TextElement(value="VALUE")], rows)
+        )
+        return
+
+    buckets = timeseries_store.downsample(point, start_time, end_time, bucket)
+    console.print(
+        generate_table(
+            [
+                TextElement(value="TIME"),
+                TextElement(value="SAMPLES"),
+                TextElement(value="MIN"),
+                TextElement(value="MAX"),
+                TextElement(value="MEAN"),
+            ],
+            [
+                [
+                    TextElement(
+                        value=format_timestamp(entry.start_ms / 1000),
+                        format=TextFormat(color=TextColors.BLUE, bold=True),
+                    ),
+                    TextElement(value=entry.count),
+                    TextElement(
+                        value=entry.minimum, format=TextFormat(color=TextColors.GREEN)
+                    ),
+                    TextElement(
+                        value=entry.maximum, format=TextFormat(color=TextColors.GREEN)
+                    ),
+                    TextElement(
+                        value=round(entry.mean, 3),
+                        format=TextFormat(color=TextColors.GREEN),
+                    ),
+                ]
+                for entry in buckets[-limit:]
+            ],
+        )
+    )
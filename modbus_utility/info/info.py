@@ -1,11 +1,18 @@
 from rich import print
 from rich.console import Console
+import serial
 import typer
 
 from modbus_utility.physical.modbus_serial import (
     list_serial_ports,
     initialize_device,
 )
+from modbus_utility.utils.autodetect import (
+    AutoDetector,
+    CandidateScore,
+    rank_candidates,
+    SerialCandidate,
+)
 from modbus_utility.utils.console_utils import (
     generate_table,
     TextElement,
@@ -17,7 +24,11 @@ from modbus_utility.utils.device_config_utils import (
     set_device_config,
     get_device_config,
 )
-from modbus_utility.utils.operation_utils import DeviceConfig, DeviceConfigType
+from modbus_utility.utils.operation_utils import (
+    DeviceConfig,
+    DeviceConfigType,
+    load_session,
+)
 
 console = Console()
 
@@ -108,3 +119,118 @@ def show_config(config_type: str):
 
     table = get_device_config(config_type)
     console.print(table)
+
+
+@app.command()
+def autodetect(
+    port: str,
+    window: float = 0.5,
+    exhaustive: bool = False,
+    probe_address: int | None = None,
+    probe_register: int = 0,
+):
+    """
+    Detects the baud rate and parity of the bus on PORT by listening to its traffic with
+    every candidate setting, most likely first, and scoring the fraction of CRC-valid
+    frames. With --probe-address the best settings are confirmed by reading a register of
+    that slave, which also works on a silent bus.
+    """
+    try:
+        ser = initialize_device(port, 9600, "E", 1, 0.05)
+    except serial.SerialException:
+        console.print(f"{format_text_element(
+            TextElement(
+                value="Failed to initialize serial device",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}")
+        raise typer.Exit()
+
+    session = load_session(DeviceConfigType.master)
+    preferred = None
+    if session is not None and session["port"] == port:
+        preferred = SerialCandidate(session["baudrate"], session["parity"])
+    candidates = rank_candidates(preferred)
+
+    def show_score(score: CandidateScore) -> None:
+        console.print(
+            f"{score.candidate.baudrate} {score.candidate.parity}: "
+            f"{score.frames} valid frames, {score.bytes_received} bytes, score {score.score:.2f}",
+            highlight=False,
+        )
+
+    detector = AutoDetector(ser, window)
+    try:
+        scores = detector.scan(candidates, exhaustive, show_score)
+        confirmed = None
+        if probe_address is not None:
+            confirmed = detector.confirm(
+                scores, candidates, probe_address, probe_register
+            )
+    except KeyboardInterrupt:
+        console.print(f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}")
+        raise typer.Exit()
+    finally:
+        ser.close()
+
+    if confirmed is not None:
+        if confirmed in scores:
+            scores.remove(confirmed)
+        scores.insert(0, confirmed)
+
+    console.print("[bold magenta]Candidate settings, most likely first:")
+    console.print(
+        generate_table(
+            [
+                TextElement(
+                    value="BAUDRATE", format=TextFormat(color=TextColors.BLUE, bold=True)
+                ),
+                TextElement(value="PARITY"),
+                TextElement(value="SCORE"),
+                TextElement(value="VALID FRAMES"),
+                TextElement(value="BYTES"),
+                TextElement(value="PROBE"),
+            ],
+            [
+                [
+                    TextElement(
+                        value=score.candidate.baudrate,
+                        format=TextFormat(color=TextColors.BLUE, bold=True),
+                    ),
+                    TextElement(value=score.candidate.parity),
+                    TextElement(
+                        value=f"{score.score:.2f}",
+                        format=TextFormat(
+                            color=TextColors.GREEN if score.confident else TextColors.WHITE
+                        ),
+                    ),
+                    TextElement(value=score.frames),
+                    TextElement(value=score.bytes_received),
+                    TextElement(
+                        value={None: "-", True: "OK", False: "FAIL"}[score.probed],
+                        format=TextFormat(
+                            color=TextColors.GREEN if score.probed else TextColors.WHITE
+                        ),
+                    ),
+                ]
+                for score in scores
+                if score.bytes_received or score.probed is not None
+            ],
+        )
+    )
+
+    best = scores[0] if scores and (scores[0].score > 0 or scores[0].probed) else None
+    if best is None:
+        console.print(f"{format_text_element(
+            TextElement(
+                value="No modbus traffic detected, try a longer --window or --probe-address.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}")
+        raise typer.Exit(code=1)
+
+    console.print(
+        f"Detected {format_text_element(TextElement(value=f'{best.candidate.baudrate} baud, parity {best.candidate.parity}', format=TextFormat(color=TextColors.GREEN, bold=True)))}, "
+        f"select it with: info set-device {port} ADDRESS master --baudrate {best.candidate.baudrate} --parity {best.candidate.parity}",
+        highlight=False,
+    )
@@ -7,9 +7,13 @@ import typer
 path = os.path.dirname(os.path.abspath(__file__))
 
 
+from modbus_utility.gateway import app as gateway_app
+from modbus_utility.history import app as history_app
 from modbus_utility.info import app as info_app
 from modbus_utility.master import app as master_app
+from modbus_utility.replay import app as replay_app
 from modbus_utility.slave import app as slave_app
+from modbus_utility.utils.profiling_utils import profiler
 from modbus_utility.version import app as version_app
 
 
@@ -22,10 +26,30 @@ logging.basicConfig(
 
 app = typer.Typer()
 
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = False,
+    profile_cpu: bool = False,
+    profile_memory: bool = False,
+):
+    """
+    MODBUS utility. --profile prints a per-phase breakdown of the modbus transactions at
+    exit, --profile-cpu and --profile-memory add cProfile and tracemalloc reports.
+    """
+    if profile or profile_cpu or profile_memory:
+        profiler.start(cpu=profile_cpu, memory=profile_memory)
+        ctx.call_on_close(profiler.report)
+
+
 # Add commands to the app
 app.add_typer(info_app, name="info")
 app.add_typer(master_app, name="master")
 app.add_typer(slave_app, name="slave")
+app.add_typer(replay_app)
+app.add_typer(gateway_app)
+app.add_typer(history_app)
 app.add_typer(version_app)
 
 
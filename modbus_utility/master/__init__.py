@@ -1,9 +1,21 @@
 import typer
 
+from modbus_utility.master.poll_registers import app as poll_register_app
+from modbus_utility.master.push_config import app as push_config_app
+from modbus_utility.master.read_bits import app as read_bits_app
 from modbus_utility.master.read_registers import app as read_register_app
+from modbus_utility.master.run_batch import app as run_batch_app
+from modbus_utility.master.stress import app as stress_app
+from modbus_utility.master.write_coils import app as write_coils_app
 from modbus_utility.master.write_registers import app as write_register_app
 
 app = typer.Typer(help="Modbus master operation.")
 
 app.add_typer(read_register_app)
+app.add_typer(poll_register_app)
 app.add_typer(write_register_app)
+app.add_typer(read_bits_app)
+app.add_typer(write_coils_app)
+app.add_typer(run_batch_app)
+app.add_typer(stress_app)
+app.add_typer(push_config_app)
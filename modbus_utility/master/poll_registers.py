@@ -0,0 +1,340 @@
+import logging
+import sys
+import threading
+import time
+from typing import Annotated, TextIO
+
+from rich.console import Console
+import serial
+import typer
+
+from modbus_utility.utils.capture_utils import CaptureWriter
+from modbus_utility.utils.change_detection import ChangeDetector, parse_deadbands
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.pdu_codec import ModbusTransportError
+from modbus_utility.utils.register_cache import parse_range_ttls, RegisterCache
+from modbus_utility.utils.sink_pipeline import (
+    Backpressure,
+    ErrorRecord,
+    parse_sink,
+    PollRecord,
+    SinkPipeline,
+    TimeSeriesSink,
+    WindowRecord,
+    WriteRecord,
+)
+from modbus_utility.utils.stats_utils import generate_stats_table
+from modbus_utility.utils.transaction_arbiter import Priority, TransactionArbiter
+from modbus_utility.utils.window_aggregator import parse_counters, WindowAggregator
+
+app = typer.Typer()
+
+console = Console()
+
+
+def parse_control_write(line: str) -> tuple[int, int]:
+    """
+    Parses a control write in the REGISTER=VALUE format.
+    :param line: Line to parse.
+    :return: Tuple of register and value.
+    """
+    register, _, value = line.partition("=")
+    try:
+        parsed = int(register, 0), int(value, 0)
+    except ValueError:
+        raise ValueError(f"Invalid control write {line}, use REGISTER=VALUE")
+    if not all(0 <= number <= 0xFFFF for number in parsed):
+        raise ValueError(f"Invalid control write {line}, registers and values are 0-65535")
+    return parsed
+
+
+def read_control_writes(
+    stream: TextIO, arbiter: TransactionArbiter, pipeline: SinkPipeline, slave_address: int
+) -> None:
+    """
+    Writes every REGISTER=VALUE line of a stream with priority over the polls.
+    :param stream: Stream the writes are read from.
+    :param arbiter: Arbiter of the polled bus.
+    :param pipeline: Pipeline the outcome of every write is reported to.
+    :param slave_address: Address of the polled device.
+    :return: None
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        started = time.monotonic()
+        try:
+            register, value = parse_control_write(line)
+            arbiter.write_register(register, value, Priority.control).result()
+        except Exception as e:
+            logging.error(f"Control write {line} failed: {e}")
+            pipeline.put(
+                ErrorRecord(time.time(), slave_address, f"Control write {line} failed: {e}")
+            )
+        else:
+            pipeline.put(
+                WriteRecord(
+                    time.time(), slave_address, register, value, time.monotonic() - started
+                )
+            )
+
+
+@app.command()
+def poll(
+    register: int,
+    num_registers: int = 1,
+    interval: float = 1.0,
+    count: Annotated[
+        int | None,
+        typer.Option(help="Number of polls, polls until interrupted if unset."),
+    ] = None,
+    changes_only: Annotated[
+        bool, typer.Option(help="Only report the registers that changed.")
+    ] = False,
+    deadband: Annotated[
+        list[str] | None,
+        typer.Option(help="REGISTER=VALUE minimum change reported for a register."),
+    ] = None,
+    snapshot_interval: Annotated[
+        float,
+        typer.Option(help="Seconds between full snapshots with --changes-only."),
+    ] = 60.0,
+    display_hex: bool = True,
+    store: Annotated[
+        str | None,
+        typer.Option(
+            help="Keep every sample in a time-series store DIR, queried with the "
+            "history command. With --aggregate only the window statistics are "
+            "stored, as REGISTER.min/.max/.mean/.delta."
+        ),
+    ] = None,
+    aggregate: Annotated[
+        float | None,
+        typer.Option(
+            help="Only report the min/max/mean of every register over windows of this "
+            "many seconds."
+        ),
+    ] = None,
+    slide: Annotated[
+        float | None,
+        typer.Option(
+            help="Report the window of the last --aggregate seconds every this many "
+            "seconds."
+        ),
+    ] = None,
+    counter: Annotated[
+        list[str] | None,
+        typer.Option(
+            help="REGISTER starting a 32-bit counter (high word first), aggregated "
+            "as its increments, rollover included."
+        ),
+    ] = None,
+    sink: Annotated[
+        list[str] | None,
+        typer.Option(
+            help="Output written from a separate thread: console, file:PATH, "
+            "socket:HOST:PORT or store:DIR. Defaults to console."
+        ),
+    ] = None,
+    queue_size: Annotated[
+        int, typer.Option(help="Records queued for the sinks.")
+    ] = 1024,
+    backpressure: Annotated[
+        Backpressure,
+        typer.Option(
+            help="What a full queue does: block the bus, drop-oldest, or sample one of "
+            "every 10 new records."
+        ),
+    ] = Backpressure.block,
+    batch_size: Annotated[
+        int, typer.Option(help="Records written to the sinks per batch.")
+    ] = 64,
+    capture: Annotated[
+        str | None,
+        typer.Option(help="Append the frames to a capture FILE, see the replay command."),
+    ] = None,
+    cache_ttl: Annotated[
+        float | None,
+        typer.Option(
+            help="Serve the registers read less than this many seconds ago from a "
+            "cache."
+        ),
+    ] = None,
+    cache_range: Annotated[
+        list[str] | None,
+        typer.Option(help="FIRST-LAST=SECONDS cache TTL of a register range."),
+    ] = None,
+    control: Annotated[
+        bool,
+        typer.Option(
+            help="Write every REGISTER=VALUE line typed while polling (FC 6), ahead of "
+            "the polls waiting for the bus."
+        ),
+    ] = False,
+):
+    """Poll register(s) from the selected MODBUS device periodically."""
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        deadbands = parse_deadbands(deadband or [])
+    except ValueError as e:
+        console.print(
+            f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+
+    aggregator = None
+    if aggregate is not None or slide is not None or counter:
+        try:
+            if aggregate is None or aggregate <= 0 or (slide is not None and slide <= 0):
+                raise ValueError("--aggregate needs a positive number of seconds, as does --slide")
+            aggregator = WindowAggregator(
+                register, num_registers, aggregate, slide, parse_counters(counter or [])
+            )
+        except ValueError as e:
+            console.print(
+                f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+            )
+            raise typer.Exit()
+
+    try:
+        sinks = [parse_sink(definition, display_hex) for definition in sink or ["console"]]
+        if store:
+            sinks.append(TimeSeriesSink(store))
+    except (OSError, ValueError) as e:
+        console.print(
+            f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+    # Records without registers to report are only needed to keep every sample
+    keep_samples = any(isinstance(output, TimeSeriesSink) for output in sinks)
+
+    register_cache = None
+    if cache_ttl is not None or cache_range:
+        try:
+            register_cache = RegisterCache(
+                cache_ttl or 0.0, range_ttls=parse_range_ttls(cache_range or [])
+            )
+        except ValueError as e:
+            console.print(
+                f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+            )
+            raise typer.Exit()
+
+    modbus_client = ModbusMaster(
+        port=session["port"],
+        baudrate=session["baudrate"],
+        parity=session["parity"],
+        stop_bits=session["stopbits"],
+        timeout=session["timeout"],
+        slave_address=session["address"],
+        cache=register_cache,
+        capture=CaptureWriter(capture) if capture else None,
+    )
+    detector = ChangeDetector(deadbands, snapshot_interval) if changes_only else None
+    pipeline = SinkPipeline(sinks, queue_size, backpressure, batch_size)
+    # Polls and control writes share the bus through the arbiter, writes go first
+    arbiter = TransactionArbiter(modbus_client)
+    if control:
+        threading.Thread(
+            target=read_control_writes,
+            args=(sys.stdin, arbiter, pipeline, modbus_client.slave_address),
+            daemon=True,
+        ).start()
+
+    polls = 0
+    port_failed = False
+    next_poll = time.monotonic()
+    try:
+        while count is None or polls < count:
+            polls += 1
+            try:
+                values = arbiter.submit(
+                    lambda master: master.read_holding_register(
+                        register, num_registers, False
+                    ),
+                    Priority.poll,
+                ).result()
+            except (ModbusTransportError, serial.SerialException) as e:
+                # Every later poll would fail the same way
+                pipeline.put(
+                    ErrorRecord(time.time(), modbus_client.slave_address, f"Polling stopped: {e}")
+                )
+                logging.error(f"Failed to poll register {register} - Exception: {e}")
+                port_failed = True
+                break
+            except Exception as e:
+                # Shown by the sinks, the bus thread does not wait on the console
+                pipeline.put(
+                    ErrorRecord(
+                        time.time(),
+                        modbus_client.slave_address,
+                        f"Poll failed: {str(e) or type(e).__name__}",
+                    )
+                )
+                logging.error(f"Failed to poll register {register} - Exception: {e}")
+            else:
+                now = time.time()
+                if aggregator is not None:
+                    # Only the window statistics are emitted
+                    report = aggregator.add(now, values)
+                    if report is not None:
+                        pipeline.put(WindowRecord(modbus_client.slave_address, report))
+                else:
+                    if detector is None:
+                        registers = [(register + i, value) for i, value in enumerate(values)]
+                    else:
+                        registers = detector.detect(register, values).changes
+                    if registers or keep_samples:
+                        pipeline.put(
+                            PollRecord(
+                                now, modbus_client.slave_address, register, values, registers
+                            )
+                        )
+
+            next_poll += interval
+            delay = next_poll - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_poll = time.monotonic()
+    except KeyboardInterrupt:
+        console.print(
+            f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}"
+        )
+    finally:
+        arbiter.close()
+        if aggregator is not None:
+            report = aggregator.flush(time.time())
+            if report is not None:
+                pipeline.put(WindowRecord(modbus_client.slave_address, report))
+        pipeline.close()
+        if pipeline.stats.dropped or pipeline.stats.blocked or pipeline.stats.sink_errors:
+            console.print(generate_stats_table(pipeline.rows()))
+        logging.info(f"Output pipeline: {pipeline.rows()}")
+        if register_cache is not None:
+            console.print(generate_stats_table(register_cache.stats.rows()))
+        if control:
+            console.print(generate_stats_table(arbiter.stats.rows()))
+        if modbus_client.capture is not None:
+            modbus_client.capture.close()
+    if port_failed:
+        raise typer.Exit(code=1)
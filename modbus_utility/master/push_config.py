@@ -0,0 +1,107 @@
+import time
+
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.config_push import ConfigPush, parse_targets
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.stats_utils import generate_stats_table
+
+app = typer.Typer()
+
+console = Console()
+
+
+@app.command()
+def push_config(
+    register: int,
+    values: str,
+    target: list[str] | None = None,
+    broadcast: bool = False,
+    retries: int = 2,
+):
+    """
+    Write the same VALUES (comma separated, one value uses FC 6 and more FC 16) from
+    REGISTER on many devices and verify them by reading them back. Each --target is
+    [PORT:]ADDRESSES, e.g. /dev/ttyUSB0:1-50,60, the port defaults to the selected device
+    and the addresses to the selected one. With --broadcast, buses with more than one
+    target get a single broadcast write, which every slave on the bus receives, so only use
+    it when the targets are all the devices on their bus. Devices that fail verification
+    get up to --retries unicast writes. Buses are pushed in parallel with the serial
+    settings of the selected device.
+    """
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        buses = parse_targets(target or [str(session["address"])], session["port"])
+        pusher = ConfigPush(
+            session,
+            register,
+            [int(value) for value in values.split(",") if value.strip()],
+            buses,
+            broadcast,
+            retries,
+        )
+    except ValueError as e:
+        console.print(
+            f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit(code=1)
+
+    started = time.perf_counter()
+    failures = 0
+    broadcast_verified = 0
+    for result in pusher.run():
+        if not result.ok:
+            failures += 1
+        elif result.method == "broadcast":
+            broadcast_verified += 1
+        status = format_text_element(
+            TextElement(
+                value="OK" if result.ok else "FAIL",
+                format=TextFormat(
+                    color=TextColors.GREEN if result.ok else TextColors.RED, bold=True
+                ),
+            )
+        )
+        console.print(
+            f"{status} {result.port}@{result.address} "
+            f"{format_text_element(TextElement(value=result.method, format=TextFormat(color=TextColors.CYAN)))}: "
+            f"{result.detail} ({result.attempts} writes)",
+            highlight=False,
+        )
+    for error in pusher.errors:
+        console.print(
+            f"{format_text_element(TextElement(value=error, format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+
+    console.print(
+        generate_stats_table(
+            [
+                ("Devices", sum(len(addresses) for addresses in buses.values())),
+                ("Verified after broadcast", broadcast_verified),
+                ("Failures", failures),
+                ("Bus errors", len(pusher.errors)),
+                ("Buses", len(buses)),
+                ("Elapsed (s)", time.perf_counter() - started),
+            ]
+        )
+    )
+    if failures or pusher.errors:
+        raise typer.Exit(code=1)
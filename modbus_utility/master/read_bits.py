@@ -0,0 +1,152 @@
+import logging
+
+from rich.console import Console
+from rich.table import Table
+import typer
+
+from modbus_utility.utils.bit_field import BitField
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.profiling_utils import profiler
+
+app = typer.Typer()
+
+console = Console()
+
+# Ranges above this number of bits are shown compact unless --no-compact is used
+COMPACT_THRESHOLD = 64
+
+
+def create_master() -> ModbusMaster:
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    return ModbusMaster(
+        port=session["port"],
+        baudrate=session["baudrate"],
+        parity=session["parity"],
+        stop_bits=session["stopbits"],
+        timeout=session["timeout"],
+        slave_address=session["address"],
+    )
+
+
+def check_count(count: int) -> None:
+    """
+    Exits with an error if a number of bits to read is not positive.
+    :param count: Number of bits requested.
+    :return: None
+    """
+    if count < 1:
+        console.print(
+            f"{format_text_element(TextElement(value='--count must be at least 1.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit(code=1)
+
+
+def generate_bits_table(bits: BitField, compact: bool = False) -> Table:
+    """
+    Generates a table with coil or discrete input values.
+    :param bits: Bit values to show.
+    :param compact: Flag to show 32 bits per row instead of one row per bit.
+    :return: Table object with the bit values.
+    """
+    if compact:
+        return generate_table(
+            [
+                TextElement(
+                    value="ADDRESS", format=TextFormat(color=TextColors.BLUE, bold=True)
+                ),
+                TextElement(
+                    value="BITS", format=TextFormat(color=TextColors.GREEN, bold=True)
+                ),
+            ],
+            [
+                [
+                    TextElement(
+                        value=address,
+                        format=TextFormat(color=TextColors.BLUE, bold=True),
+                    ),
+                    TextElement(value=row, format=TextFormat(color=TextColors.GREEN)),
+                ]
+                for address, row in bits.rows()
+            ],
+        )
+
+    return generate_table(
+        [
+            TextElement(
+                value="ADDRESS", format=TextFormat(color=TextColors.BLUE, bold=True)
+            ),
+            TextElement(
+                value="VALUE", format=TextFormat(color=TextColors.GREEN, bold=True)
+            ),
+        ],
+        [
+            [
+                TextElement(
+                    value=bits.start + offset,
+                    format=TextFormat(color=TextColors.BLUE, bold=True),
+                ),
+                TextElement(
+                    value="ON" if value else "OFF",
+                    format=TextFormat(
+                        color=TextColors.GREEN if value else TextColors.RED, bold=True
+                    ),
+                ),
+            ]
+            for offset, value in enumerate(bits)
+        ],
+    )
+
+
+def show_bits(bits: BitField, compact: bool | None) -> None:
+    with profiler.phase("render"):
+        if compact is None:
+            compact = bits.count > COMPACT_THRESHOLD
+        console.print(generate_bits_table(bits, compact))
+        console.print(f"{bits.count_set()} of {bits.count} bits on")
+
+
+@app.command()
+def read_coils(
+    address: int,
+    count: int = 1,
+    show_frame_info: bool = False,
+    compact: bool | None = None,
+):
+    """Read coil(s) (function code 1) from the selected MODBUS device."""
+    check_count(count)
+    bits = create_master().read_coils(address, count, show_frame_info)
+    show_bits(bits, compact)
+    logging.info(f"Read {count} coils from {address}: {bits.packed.hex()}")
+
+
+@app.command()
+def read_discrete_inputs(
+    address: int,
+    count: int = 1,
+    show_frame_info: bool = False,
+    compact: bool | None = None,
+):
+    """Read discrete input(s) (function code 2) from the selected MODBUS device."""
+    check_count(count)
+    bits = create_master().read_discrete_inputs(address, count, show_frame_info)
+    show_bits(bits, compact)
+    logging.info(f"Read {count} discrete inputs from {address}: {bits.packed.hex()}")
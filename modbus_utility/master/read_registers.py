@@ -3,15 +3,17 @@ import logging
 from rich.console import Console
 import typer
 
+from modbus_utility.utils.capture_utils import CaptureWriter
 from modbus_utility.utils.console_utils import (
     format_text_element,
     TextElement,
     TextFormat,
     TextColors,
-    generate_table,
+    generate_register_table,
 )
 from modbus_utility.utils.modbus_master import ModbusMaster
 from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.profiling_utils import profiler
 
 app = typer.Typer()
 
@@ -24,8 +26,12 @@ def read_register(
     num_registers: int = 1,
     show_frame_info: bool = False,
     display_hex: bool = True,
+    capture: str | None = None,
 ):
-    """Read register(s) from the selected MODBUS device."""
+    """
+    Read register(s) from the selected MODBUS device. --capture FILE appends the frames
+    to a capture file that can be played back with the replay command.
+    """
     session = load_session(DeviceConfigType.master)
     if session is None:
         console.print(
@@ -45,33 +51,19 @@ def read_register(
         stop_bits=session["stopbits"],
         timeout=session["timeout"],
         slave_address=session["address"],
+        capture=CaptureWriter(capture) if capture else None,
     )
-    values = modbus_client.read_holding_register(
-        register, num_registers, show_frame_info
-    )
+    try:
+        values = modbus_client.read_holding_register(
+            register, num_registers, show_frame_info
+        )
+    finally:
+        if modbus_client.capture is not None:
+            modbus_client.capture.close()
 
-    table = generate_table(
-        [
-            TextElement(
-                value="REGISTER", format=TextFormat(color=TextColors.BLUE, bold=True)
-            ),
-            TextElement(
-                value="VALUE", format=TextFormat(color=TextColors.GREEN, bold=True)
-            ),
-        ],
-        [
-            [
-                TextElement(
-                    value=register + i,
-                    format=TextFormat(color=TextColors.BLUE, bold=True),
-                ),
-                TextElement(
-                    value=value if not display_hex else hex(value),
-                    format=TextFormat(color=TextColors.GREEN, bold=True),
-                ),
-            ]
-            for i, value in enumerate(values)
-        ],
-    )
-    console.print(table)
+    with profiler.phase("render"):
+        table = generate_register_table(
+            [(register + i, value) for i, value in enumerate(values)], display_hex
+        )
+        console.print(table)
     logging.info(f"Read register {register} with value: {values}")
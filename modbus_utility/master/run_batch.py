@@ -0,0 +1,88 @@
+import time
+
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.batch_runner import BatchRunner, load_batch
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.stats_utils import generate_stats_table
+
+app = typer.Typer()
+
+console = Console()
+
+
+@app.command()
+def run_batch(batch_file: str, stop_on_error: bool = False):
+    """
+    Run the operations of a CSV, JSON or YAML batch file. Each operation has an op (read,
+    read-coils, read-inputs, write, write-coil, wait or assert) and optionally port,
+    address, register, count, value, seconds and expect (space separated values in CSV).
+    Every port is opened once, different ports run in parallel and operations on the same
+    port run in file order, using the serial settings of the selected device.
+    """
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        operations = load_batch(batch_file)
+    except (OSError, ValueError) as e:
+        console.print(
+            f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit(code=1)
+
+    runner = BatchRunner(operations, session, stop_on_error)
+    started = time.perf_counter()
+    failures = 0
+    for result in runner.run():
+        operation = result.operation
+        if not result.ok:
+            failures += 1
+        status = format_text_element(
+            TextElement(
+                value="OK" if result.ok else "FAIL",
+                format=TextFormat(
+                    color=TextColors.GREEN if result.ok else TextColors.RED, bold=True
+                ),
+            )
+        )
+        console.print(
+            f"{status} #{operation.line} {result.port}@{result.address} "
+            f"{format_text_element(TextElement(value=operation.op, format=TextFormat(color=TextColors.CYAN)))} "
+            f"{operation.register_address}: {result.detail} ({result.elapsed * 1000:.1f} ms)",
+            highlight=False,
+        )
+    for error in runner.errors:
+        console.print(
+            f"{format_text_element(TextElement(value=error, format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+
+    console.print(
+        generate_stats_table(
+            [
+                ("Operations", len(operations)),
+                ("Failures", failures),
+                ("Bus errors", len(runner.errors)),
+                ("Buses", len(runner.buses)),
+                ("Elapsed (s)", time.perf_counter() - started),
+            ]
+        )
+    )
+    if failures or runner.errors:
+        raise typer.Exit(code=1)
@@ -0,0 +1,140 @@
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.pdu_codec import MAX_READ_REGISTERS, ModbusError
+from modbus_utility.utils.stats_utils import generate_stats_table
+from modbus_utility.utils.stress_utils import (
+    generate_sweep_table,
+    run_control_stress,
+    run_stress,
+)
+
+app = typer.Typer()
+
+console = Console()
+
+
+@app.command()
+def stress(
+    register: int = 0,
+    block_size: int = 10,
+    duration: float | None = None,
+    count: int | None = None,
+    rate: float | None = None,
+    sweep: str | None = None,
+    turnaround_delay: float = 0.0,
+    control_register: int | None = None,
+    control_interval: float = 1.0,
+    queue_depth: int = 8,
+    poll_deadline: float | None = None,
+):
+    """
+    Measure the sustained throughput and latency of the selected MODBUS device by reading
+    a block of holding registers back-to-back, or at --rate transactions per second, for
+    --duration seconds (10 by default) or --count transactions. --sweep 1,10,50,125 runs
+    every block size in turn to find the one with the highest register throughput.
+    --control-register keeps --queue-depth polls queued in a transaction arbiter and writes
+    the register back with its own value every --control-interval seconds, reporting the
+    worst-case write latency under full poll load. Polls waiting longer than
+    --poll-deadline seconds are dropped.
+    """
+    session = load_session(DeviceConfigType.master)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        block_sizes = (
+            [int(value) for value in sweep.split(",") if value.strip()]
+            if sweep
+            else [block_size]
+        )
+    except ValueError:
+        block_sizes = []
+    if not block_sizes or not all(1 <= size <= MAX_READ_REGISTERS for size in block_sizes):
+        console.print(
+            f"{format_text_element(TextElement(value=f'Block sizes must be between 1 and {MAX_READ_REGISTERS}.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+    if control_register is not None and (
+        len(block_sizes) > 1 or queue_depth < 1 or control_interval <= 0
+    ):
+        console.print(
+            f"{format_text_element(TextElement(value='--control-register needs a single block size, a positive --control-interval and --queue-depth.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit()
+    if duration is None and count is None:
+        duration = 10.0
+
+    modbus_client = ModbusMaster(
+        port=session["port"],
+        baudrate=session["baudrate"],
+        parity=session["parity"],
+        stop_bits=session["stopbits"],
+        timeout=session["timeout"],
+        slave_address=session["address"],
+        turnaround_delay=turnaround_delay,
+    )
+
+    if control_register is not None:
+        console.print(
+            f"Polling {format_text_element(TextElement(value=block_sizes[0], format=TextFormat(color=TextColors.CYAN, bold=True)))} registers from register {register} while writing register {control_register} every {control_interval} s"
+        )
+        try:
+            result, arbiter_stats = run_control_stress(
+                modbus_client,
+                register,
+                block_sizes[0],
+                control_register,
+                control_interval,
+                duration,
+                count,
+                queue_depth,
+                poll_deadline,
+            )
+        except ModbusError as e:
+            console.print(
+                f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}"
+            )
+            raise typer.Exit(code=1)
+        except KeyboardInterrupt:
+            console.print(
+                f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}"
+            )
+            return
+        console.print(generate_stats_table(result.rows() + arbiter_stats.rows()))
+        return
+
+    results = []
+    try:
+        for size in block_sizes:
+            console.print(
+                f"Reading {format_text_element(TextElement(value=size, format=TextFormat(color=TextColors.CYAN, bold=True)))} registers from register {register}"
+            )
+            results.append(
+                run_stress(modbus_client, register, size, duration, count, rate)
+            )
+    except KeyboardInterrupt:
+        console.print(
+            f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}"
+        )
+
+    if len(results) == 1:
+        console.print(generate_stats_table(results[0].rows()))
+    elif results:
+        console.print(generate_sweep_table(results))
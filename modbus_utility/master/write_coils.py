@@ -0,0 +1,36 @@
+from rich.console import Console
+import typer
+
+from modbus_utility.master.read_bits import create_master
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+
+app = typer.Typer()
+
+console = Console()
+
+
+@app.command()
+def write_coil(address: int, value: bool):
+    """Write a single coil (function code 5) of the selected MODBUS device."""
+    create_master().write_coil(address, value)
+
+
+@app.command()
+def write_coils(address: int, values: str):
+    """
+    Write consecutive coils (function code 15) of the selected MODBUS device. VALUES is a
+    string of 0/1 characters, the first one written to ADDRESS, e.g. 1011.
+    """
+    bits = values.replace(" ", "").replace("_", "")
+    if not bits or bits.strip("01"):
+        console.print(
+            f"{format_text_element(TextElement(value='VALUES must be a string of 0/1 characters.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        raise typer.Exit(code=1)
+
+    create_master().write_coils(address, [bit == "1" for bit in bits])
@@ -1,6 +1,7 @@
 # modbus_serial.py
 import serial
 import logging
+import time
 import serial.tools.list_ports
 
 device_address = None
@@ -17,16 +18,26 @@ def initialize_device(
     return ser
 
 
+def _crc_table_entry(byte: int) -> int:
+    crc = byte
+    for _ in range(8):
+        if (crc & 0x0001) != 0:
+            crc >>= 1
+            crc ^= 0xA001
+        else:
+            crc >>= 1
+    return crc
+
+
+# CRC-16/MODBUS of every byte value, so the CRC is computed one byte per step
+CRC_TABLE = tuple(_crc_table_entry(byte) for byte in range(256))
+
+
 def calculate_crc(data: bytes) -> int:
     crc = 0xFFFF
+    table = CRC_TABLE
     for pos in data:
-        crc ^= pos
-        for _ in range(8):
-            if (crc & 0x0001) != 0:
-                crc >>= 1
-                crc ^= 0xA001
-            else:
-                crc >>= 1
+        crc = (crc >> 8) ^ table[(crc ^ pos) & 0xFF]
     return crc
 
 
@@ -45,3 +56,37 @@ def read_bus(num_bytes: int, ser: serial.Serial) -> bytes:
     response = ser.read(num_bytes)
 
     return response
+
+
+def frame_gap(baudrate: int) -> float:
+    """
+    Calculates the t3.5 silent interval that delimits RTU frames.
+    :param baudrate: baud rate of the bus
+    :return: silent interval in seconds
+    """
+    # 11 bits per character, fixed at 1.75 ms above 19200 baud as the spec recommends
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baudrate
+
+
+def read_frame(ser: serial.Serial, gap: float) -> bytes:
+    """
+    Reads a full RTU frame, waiting up to the port timeout for the first byte and
+    finishing when the bus stays silent for the given interval.
+    :param ser: serial object
+    :param gap: silent interval that ends the frame, in seconds
+    :return: frame read from the bus, empty if nothing arrived
+    """
+    first = ser.read(1)
+    if not first:
+        return b""
+    frame = bytearray(first)
+    while True:
+        time.sleep(gap)
+        waiting = ser.in_waiting
+        if not waiting:
+            break
+        frame += ser.read(waiting)
+
+    return bytes(frame)
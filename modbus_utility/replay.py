@@ -0,0 +1,89 @@
+import logging
+
+from rich.console import Console
+import serial
+import typer
+
+from modbus_utility.physical.modbus_serial import frame_gap, initialize_device
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.replay_utils import replay_against_slave, serve_capture
+from modbus_utility.utils.stats_utils import generate_stats_table
+
+app = typer.Typer()
+console = Console()
+
+
+@app.command()
+def replay(
+    capture_file: str,
+    mode: str = "master",
+    speed: float = 1.0,
+    limit: int | None = None,
+):
+    """
+    Replay a capture file. mode 'master' re-issues the captured requests to a slave,
+    mode 'slave' answers a master with the captured responses. speed 1.0 keeps the
+    original timing, 10 replays ten times faster and 0 replays as fast as possible.
+    """
+    match mode:
+        case "master":
+            config_type = DeviceConfigType.master
+        case "slave":
+            config_type = DeviceConfigType.slave
+        case _:
+            console.print(
+                f"{format_text_element(TextElement(value="Invalid mode. Use 'master' or 'slave'.", format=TextFormat(color=TextColors.RED, bold=True)))}"
+            )
+            raise typer.Exit()
+
+    session = load_session(config_type)
+    if session is None:
+        console.print(
+            f"{format_text_element(
+            TextElement(
+                value="No device selected. Use 'select-device' first.",
+                format=TextFormat(color=TextColors.RED, bold=True)
+            )
+        )}"
+        )
+        raise typer.Exit()
+
+    try:
+        ser = initialize_device(
+            session["port"],
+            session["baudrate"],
+            session["parity"],
+            session["stopbits"],
+            session["timeout"],
+        )
+    except serial.SerialException:
+        console.print(
+            f"{format_text_element(TextElement(value='Failed to initialize serial device', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        logging.error("Failed to initialize serial device")
+        raise typer.Exit()
+
+    try:
+        if config_type == DeviceConfigType.master:
+            report = replay_against_slave(ser, capture_file, speed, limit)
+        else:
+            console.print(f"Serving responses from {capture_file}, to stop use ctl + c")
+            report = serve_capture(
+                ser, capture_file, speed, frame_gap(session["baudrate"]), limit
+            )
+    except serial.SerialException as e:
+        console.print(
+            f"{format_text_element(TextElement(value='Serial communication failed during the replay.', format=TextFormat(color=TextColors.RED, bold=True)))}"
+        )
+        logging.error(f"Serial communication failed during the replay - Exception: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        ser.close()
+
+    console.print(generate_stats_table(report.rows()))
@@ -0,0 +1,59 @@
+import time
+
+from rich.console import Console
+import typer
+
+from modbus_utility.utils.console_utils import format_text_element, TextElement, TextFormat, TextColors, generate_table
+from modbus_utility.utils.slave_fleet import SlaveFleet, load_fleet_spec
+from modbus_utility.utils.stats_utils import generate_stats_table
+
+app = typer.Typer()
+
+console = Console()
+
+
+@app.command()
+def fleet(
+	spec_file: str,
+	processes: int | None = None,
+	duration: float | None = None,
+):
+	"""Run a fleet of simulated slaves described by a JSON fleet spec over a pool of processes."""
+	try:
+		spec = load_fleet_spec(spec_file)
+		slave_fleet = SlaveFleet(spec, processes)
+	except (OSError, ValueError) as e:
+		console.print(f"{format_text_element(TextElement(value=f'Invalid fleet spec: {e}', format=TextFormat(color=TextColors.RED, bold=True)))}")
+		raise typer.Exit()
+
+	slave_fleet.start()
+	console.print(f"Simulating {format_text_element(TextElement(value=slave_fleet.num_devices, format=TextFormat(color=TextColors.CYAN, bold=True)))} devices "
+		  f"on {format_text_element(TextElement(value=len(slave_fleet.listeners), format=TextFormat(color=TextColors.CYAN, bold=True)))} listeners "
+		  f"with {format_text_element(TextElement(value=slave_fleet.processes, format=TextFormat(color=TextColors.CYAN, bold=True)))} processes, to stop use ctl + c")
+
+	start = time.monotonic()
+	try:
+		while len(slave_fleet.endpoints) < len(slave_fleet.listeners) and time.monotonic() - start < 10:
+			slave_fleet.poll_events(1.0)
+		console.print(generate_table(
+			[TextElement(value="LISTENER"), TextElement(value="DEVICES")],
+			[
+				[
+					TextElement(value=endpoint, format=TextFormat(color=TextColors.BLUE, bold=True)),
+					TextElement(value=devices, format=TextFormat(color=TextColors.GREEN)),
+				]
+				for endpoint, devices in slave_fleet.endpoints
+			],
+		))
+		while duration is None or time.monotonic() - start < duration:
+			slave_fleet.poll_events(1.0)
+	except KeyboardInterrupt:
+		console.print(f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}")
+	finally:
+		slave_fleet.shutdown()
+
+	for worker_id, stats in sorted(slave_fleet.stats.workers.items()):
+		console.print(f"[bold magenta]Process {worker_id}")
+		console.print(generate_stats_table(list(stats.items())))
+	console.print("[bold magenta]Fleet totals")
+	console.print(generate_stats_table(list(slave_fleet.stats.totals().items())))
@@ -1,9 +1,15 @@
+import asyncio
+
 from rich.console import Console
 import typer
 
 from modbus_utility.utils.console_utils import format_text_element, TextElement, TextFormat, TextColors
 from modbus_utility.utils.modbus_slave import ModbusSlave
+from modbus_utility.utils.modbus_tcp_server import ModbusTcpServer, benchmark_tcp_server, parse_host_port
 from modbus_utility.utils.operation_utils import load_session, DeviceConfigType
+from modbus_utility.utils.register_store import create_default_store
+from modbus_utility.utils.slave_server import SlaveServer
+from modbus_utility.utils.stats_utils import generate_stats_table
 
 app = typer.Typer()
 
@@ -12,11 +18,24 @@ console = Console()
 
 @app.command()
 def run(
-	show_debug: bool = False
+	show_debug: bool = False,
+	tcp: str | None = None,
+	tcp_only: bool = False,
+	serial_port: list[str] | None = None,
 ):
-	"""Run the MODBUS slave simulator."""
+	"""
+	Run the MODBUS slave simulator. Every --serial-port PORT or PORT:ADDRESS is served too,
+	with the serial settings of the selected device. With --tcp HOST:PORT it also accepts
+	Modbus TCP clients, served from the same registers as the serial ports unless --tcp-only
+	is used. All the ports are served from a single thread, serving several ports or
+	serial and TCP together needs a POSIX system.
+	"""
+	if tcp_only and (tcp is None or serial_port):
+		console.print(f"{format_text_element(TextElement(value='--tcp-only needs --tcp and can not be used with --serial-port.', format=TextFormat(color=TextColors.RED, bold=True)))}")
+		raise typer.Exit(code=1)
+
 	session = load_session(DeviceConfigType.slave)
-	if session is None:
+	if session is None and not tcp_only:
 		console.print(
 			f"{format_text_element(
 				TextElement(
@@ -27,13 +46,88 @@ def run(
 		)
 		raise typer.Exit()
 
-	modbus_slave = ModbusSlave(
-		port=session["port"],
-		baudrate=session["baudrate"],
-		parity=session["parity"],
-		stop_bits=session["stopbits"],
-		timeout=session["timeout"],
-		slave_address=session["address"],
-	)
+	store = create_default_store()
+	if tcp is None and not serial_port:
+		modbus_slave = ModbusSlave(
+			port=session["port"],
+			baudrate=session["baudrate"],
+			parity=session["parity"],
+			stop_bits=session["stopbits"],
+			timeout=session["timeout"],
+			slave_address=session["address"],
+			store=store,
+		)
+
+		modbus_slave.start_listening(show_debug)
+		return
+
+	server = SlaveServer(show_debug)
+	if not tcp_only:
+		ports = [(session["port"], session["address"])]
+		for value in serial_port or []:
+			port, _, address = value.rpartition(":")
+			if not port or not address.isdigit():
+				port, address = value, str(session["address"])
+			ports.append((port, int(address)))
+		for port, address in ports:
+			try:
+				server.add_slave(
+					ModbusSlave(
+						port=port,
+						baudrate=session["baudrate"],
+						parity=session["parity"],
+						stop_bits=session["stopbits"],
+						timeout=session["timeout"],
+						slave_address=address,
+						store=store,
+					)
+				)
+			except ValueError as e:
+				console.print(f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}")
+				server.close()
+				raise typer.Exit(code=1)
+			console.print(f"Listening for incoming data on {format_text_element(TextElement(value=port, format=TextFormat(color=TextColors.CYAN, bold=True)))} as slave {address}")
+
+	tcp_server = None
+	if tcp is not None:
+		try:
+			host, port = parse_host_port(tcp)
+		except ValueError as e:
+			console.print(f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}")
+			raise typer.Exit()
+		tcp_server = ModbusTcpServer(store, session["address"] if session else None, show_debug)
+		server.add_tcp_listener(host, port, tcp_server)
+		console.print(f"Listening for Modbus TCP clients on {format_text_element(TextElement(value=tcp, format=TextFormat(color=TextColors.CYAN, bold=True)))}")
 
-	modbus_slave.start_listening(show_debug)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		console.print(f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}")
+		rows = server.rows()
+		if tcp_server is not None:
+			rows += tcp_server.stats.rows()
+		console.print(generate_stats_table(rows))
+	finally:
+		server.close()
+
+
+@app.command()
+def bench_tcp(
+	address: str,
+	connections: int = 100,
+	requests: int = 100,
+	pipeline: int = 1,
+	unit_id: int = 1,
+	num_registers: int = 10,
+):
+	"""Benchmark a Modbus TCP slave at ADDRESS (HOST:PORT) with concurrent clients."""
+	try:
+		host, port = parse_host_port(address)
+	except ValueError as e:
+		console.print(f"{format_text_element(TextElement(value=str(e), format=TextFormat(color=TextColors.RED, bold=True)))}")
+		raise typer.Exit()
+
+	result = asyncio.run(
+		benchmark_tcp_server(host, port, connections, requests, pipeline, unit_id, 0, num_registers)
+	)
+	console.print(generate_stats_table(result.rows()))
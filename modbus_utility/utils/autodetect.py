@@ -0,0 +1,260 @@
+import time
+from typing import Callable, NamedTuple
+
+import serial
+
+from modbus_utility.utils.pdu_codec import (
+    encode_read_request,
+    finish_rtu_frame,
+    MAX_RTU_FRAME,
+    verify_crc,
+)
+
+# Ordered by how often they are found on modbus buses, so the likely settings are tried first
+CANDIDATE_BAUDRATES = (9600, 19200, 38400, 115200, 57600, 4800, 2400, 1200)
+# Even parity is the modbus default, no parity the most common deviation
+CANDIDATE_PARITIES = ("E", "N", "O")
+# A candidate with this score over at least CONFIDENT_FRAMES frames ends the scan
+CONFIDENT_SCORE = 0.9
+CONFIDENT_FRAMES = 2
+MAX_SLAVE_ADDRESS = 247
+
+
+class SerialCandidate(NamedTuple):
+    """
+    Represents a serial setting to try.
+    """
+
+    baudrate: int
+    parity: str
+
+
+class CandidateScore:
+    """
+    Represents what was received while listening with a serial setting.
+    """
+
+    def __init__(self, candidate: SerialCandidate):
+        self.candidate = candidate
+        self.bytes_received = 0
+        self.frames = 0
+        self.valid_bytes = 0
+        self.probed: bool | None = None
+
+    @property
+    def score(self) -> float:
+        """
+        Fraction of the bytes received that belong to CRC-valid frames.
+        """
+        return self.valid_bytes / self.bytes_received if self.bytes_received else 0.0
+
+    @property
+    def confident(self) -> bool:
+        return self.score >= CONFIDENT_SCORE and self.frames >= CONFIDENT_FRAMES
+
+
+def rank_candidates(preferred: SerialCandidate | None = None) -> list[SerialCandidate]:
+    """
+    Lists the settings to try, most likely first.
+    :param preferred: Setting to try before any other, e.g. the one in the current session.
+    :return: List of candidates.
+    """
+    candidates = [
+        SerialCandidate(baudrate, parity)
+        for baudrate in CANDIDATE_BAUDRATES
+        for parity in CANDIDATE_PARITIES
+    ]
+    if preferred is not None:
+        if preferred in candidates:
+            candidates.remove(preferred)
+        candidates.insert(0, preferred)
+    return candidates
+
+
+def frame_lengths(data: bytes, offset: int) -> tuple[int, ...]:
+    """
+    Gets the lengths a request or response frame starting at an offset could have.
+    :param data: Bytes received.
+    :param offset: Position of the possible frame.
+    :return: Possible frame lengths, CRC included.
+    """
+    if data[offset] > MAX_SLAVE_ADDRESS:
+        return ()
+    function_code = data[offset + 1]
+    remaining = len(data) - offset
+    if function_code & 0x80:
+        return (5,)
+    if function_code in (1, 2, 3, 4):
+        # Request, or response with its byte count
+        return (8, 5 + data[offset + 2])
+    if function_code in (5, 6):
+        return (8,)
+    if function_code in (15, 16):
+        if remaining > 6:
+            return (8, 9 + data[offset + 6])
+        return (8,)
+    if function_code == 23:
+        if remaining > 10:
+            return (5 + data[offset + 2], 13 + data[offset + 10])
+        return (5 + data[offset + 2],)
+    return ()
+
+
+def find_frames(data: bytes) -> list[tuple[int, int]]:
+    """
+    Finds the CRC-valid modbus frames in a stream of bytes.
+    :param data: Bytes received.
+    :return: List of (offset, length) frames.
+    """
+    frames = []
+    offset = 0
+    view = memoryview(data)
+    while offset + 4 <= len(data):
+        for length in frame_lengths(data, offset):
+            if offset + length <= len(data) and verify_crc(view[offset : offset + length]):
+                frames.append((offset, length))
+                offset += length
+                break
+        else:
+            offset += 1
+    return frames
+
+
+def configure(ser: serial.Serial, candidate: SerialCandidate) -> None:
+    ser.baudrate = candidate.baudrate
+    ser.parity = candidate.parity
+    ser.reset_input_buffer()
+
+
+def listen(ser: serial.Serial, candidate: SerialCandidate, window: float) -> CandidateScore:
+    """
+    Listens to the bus with a serial setting and scores what is received.
+    :param ser: Open serial port.
+    :param candidate: Setting to use.
+    :param window: Seconds to listen for.
+    :return: Score of the setting.
+    """
+    configure(ser, candidate)
+    received = bytearray()
+    deadline = time.monotonic() + window
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        ser.timeout = min(remaining, 0.05)
+        received += ser.read(max(ser.in_waiting, 1))
+
+    result = CandidateScore(candidate)
+    result.bytes_received = len(received)
+    frames = find_frames(bytes(received))
+    result.frames = len(frames)
+    result.valid_bytes = sum(length for _, length in frames)
+    return result
+
+
+def probe(
+    ser: serial.Serial,
+    candidate: SerialCandidate,
+    address: int,
+    register: int = 0,
+    timeout: float = 0.5,
+) -> bool:
+    """
+    Sends a holding register read with a serial setting and checks that the slave answers.
+    An exception response also proves the setting is right.
+    :param ser: Open serial port.
+    :param candidate: Setting to use.
+    :param address: Address of the slave to probe.
+    :param register: Register to read.
+    :param timeout: Seconds to wait for the response.
+    :return: True if a CRC-valid response from the slave was received.
+    """
+    configure(ser, candidate)
+    buffer = bytearray(MAX_RTU_FRAME)
+    buffer[0] = address
+    length = finish_rtu_frame(buffer, encode_read_request(buffer, 1, 3, register, 1))
+    ser.write(buffer[:length])
+
+    received = bytearray()
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        ser.timeout = min(remaining, 0.05)
+        received += ser.read(max(ser.in_waiting, 1))
+        # The request itself may be echoed back by half-duplex adapters
+        for offset, frame_length in find_frames(bytes(received)):
+            frame = received[offset : offset + frame_length]
+            if frame[0] == address and bytes(frame) != bytes(buffer[:length]):
+                return True
+    return False
+
+
+class AutoDetector:
+    """
+    Finds the serial settings of a bus.
+
+    Every candidate setting is listened to for a short window and scored by the fraction
+    of the received bytes that form CRC-valid frames: with a wrong baud rate or parity the
+    bytes are garbled and CRCs fail. Candidates are tried most likely first and the scan
+    stops at the first confident one, so a busy bus is usually identified in one window.
+    """
+
+    def __init__(self, ser: serial.Serial, window: float = 0.5):
+        """
+        Creates an AutoDetector object.
+        :param ser: Open serial port, its settings are changed while scanning.
+        :param window: Seconds to listen with each setting.
+        """
+        self.ser = ser
+        self.window = window
+
+    def scan(
+        self,
+        candidates: list[SerialCandidate],
+        exhaustive: bool = False,
+        on_score: Callable[[CandidateScore], None] | None = None,
+    ) -> list[CandidateScore]:
+        """
+        Listens with every candidate setting.
+        :param candidates: Settings to try, in order.
+        :param exhaustive: Keep scanning after a confident candidate is found.
+        :param on_score: Function called with every score as soon as it is known.
+        :return: Scores sorted from the most to the least likely setting.
+        """
+        scores = []
+        for candidate in candidates:
+            score = listen(self.ser, candidate, self.window)
+            scores.append(score)
+            if on_score is not None:
+                on_score(score)
+            if score.confident and not exhaustive:
+                break
+        return sorted(scores, key=lambda score: (score.score, score.frames), reverse=True)
+
+    def confirm(
+        self,
+        scores: list[CandidateScore],
+        candidates: list[SerialCandidate],
+        address: int,
+        register: int = 0,
+    ) -> CandidateScore | None:
+        """
+        Probes a slave with the scored settings first and then with the ones not tried.
+        :param scores: Scores of the passive scan, sorted.
+        :param candidates: Every candidate setting, in order.
+        :param address: Address of the slave to probe.
+        :param register: Register to read.
+        :return: Score of the first setting the slave answered to, None if it never did.
+        """
+        scored = {score.candidate for score in scores if score.score > 0}
+        ordered = [score for score in scores if score.candidate in scored]
+        ordered += [
+            CandidateScore(candidate) for candidate in candidates if candidate not in scored
+        ]
+        for score in ordered:
+            score.probed = probe(self.ser, score.candidate, address, register)
+            if score.probed:
+                return score
+        return None
@@ -0,0 +1,289 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import queue
+import time
+from typing import Iterator, Literal, NamedTuple
+
+from pydantic import BaseModel, Field, ValidationError
+
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.pdu_codec import COIL_ON, MAX_READ_REGISTERS
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class BatchOperation(BaseModel):
+    """
+    Represents one operation of a batch file. port and address default to the selected device.
+    """
+
+    op: Literal["read", "read-coils", "read-inputs", "write", "write-coil", "wait", "assert"]
+    port: str | None = None
+    address: int | None = Field(default=None, ge=0, le=247)
+    # "register" would shadow BaseModel.register
+    register_address: int = Field(default=0, alias="register", ge=0, le=0xFFFF)
+    count: int = Field(default=1, ge=1)
+    value: int | None = Field(default=None, ge=0, le=0xFFFF)
+    seconds: float = Field(default=0.0, ge=0.0)
+    expect: list[int] | None = None
+    line: int = 0
+
+
+class BatchResult(NamedTuple):
+    """
+    Represents the outcome of a batch operation.
+    """
+
+    operation: BatchOperation
+    port: str
+    address: int
+    ok: bool
+    detail: str
+    elapsed: float
+
+
+def parse_csv_row(row: dict[str, str]) -> dict:
+    """
+    Converts a CSV row to BatchOperation fields, empty cells take the default value.
+    :param row: Row read by csv.DictReader.
+    :return: Dictionary of fields.
+    """
+    fields = {}
+    for name, value in row.items():
+        if name is None or value is None:
+            continue
+        value = value.strip()
+        if not value:
+            continue
+        if name.strip() == "expect":
+            fields["expect"] = value.replace(";", " ").split()
+        else:
+            fields[name.strip()] = value
+    return fields
+
+
+def load_batch(path: str) -> list[BatchOperation]:
+    """
+    Loads the operations of a batch file, CSV with a header row, JSON or YAML (needs PyYAML) list.
+    :param path: Path of the batch file.
+    :return: List of operations in file order.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="") as f:
+        if extension == ".csv":
+            entries = [
+                (line, parse_csv_row(row))
+                for line, row in enumerate(csv.DictReader(f), start=2)
+                if any((value or "").strip() for value in row.values())
+            ]
+        elif extension in (".yaml", ".yml"):
+            if yaml is None:
+                raise ValueError("YAML batch files need PyYAML, install it or use CSV/JSON")
+            entries = list(enumerate(yaml.safe_load(f) or [], start=1))
+        elif extension == ".json":
+            entries = list(enumerate(json.load(f), start=1))
+        else:
+            raise ValueError(f"Unsupported batch file {path}, use .csv, .json or .yaml")
+
+    operations = []
+    for line, entry in entries:
+        try:
+            operation = BatchOperation(**entry, line=line)
+        except (TypeError, ValidationError) as e:
+            raise ValueError(f"Invalid operation {line}: {e}")
+        if operation.op in ("write", "write-coil") and operation.value is None:
+            raise ValueError(f"Operation {line} ({operation.op}) needs a value")
+        if operation.op == "assert" and not operation.expect:
+            raise ValueError(f"Operation {line} (assert) needs the expected values")
+        check_ranges(operation)
+        operations.append(operation)
+    return operations
+
+
+def check_ranges(operation: BatchOperation) -> None:
+    """
+    Checks that the registers an operation touches exist and its values fit in a register.
+    :param operation: Operation to check.
+    :return: None
+    """
+    line = operation.line
+    if operation.op == "read" and operation.count > MAX_READ_REGISTERS:
+        raise ValueError(
+            f"Operation {line} (read) can read at most {MAX_READ_REGISTERS} registers"
+        )
+    if operation.op == "assert":
+        if len(operation.expect) > MAX_READ_REGISTERS:
+            raise ValueError(
+                f"Operation {line} (assert) can check at most {MAX_READ_REGISTERS} registers"
+            )
+        if not all(0 <= value <= 0xFFFF for value in operation.expect):
+            raise ValueError(f"Operation {line} (assert) expects values outside 0-65535")
+    if operation.op in ("read", "read-coils", "read-inputs", "assert"):
+        if operation.address == 0:
+            raise ValueError(f"Operation {line} ({operation.op}) can not read from address 0")
+        count = len(operation.expect) if operation.op == "assert" else operation.count
+        if operation.register_address + count > 0x10000:
+            raise ValueError(f"Operation {line} ({operation.op}) reads past register 65535")
+
+
+class BatchRunner:
+    """
+    Runs the operations of a batch file.
+
+    Each port is opened once and its operations run in file order on their own thread, so
+    operations on the same bus never overlap while independent buses run in parallel.
+    Results are streamed as they complete.
+    """
+
+    def __init__(
+        self, operations: list[BatchOperation], session: dict, stop_on_error: bool = False
+    ):
+        """
+        Creates a BatchRunner object.
+        :param operations: Operations to run.
+        :param session: Master session, used for the serial settings and as default device.
+        :param stop_on_error: Skip the rest of a bus once one of its operations fails.
+        """
+        self.session = session
+        self.stop_on_error = stop_on_error
+        self.buses: dict[str, list[BatchOperation]] = {}
+        for operation in operations:
+            self.buses.setdefault(operation.port or session["port"], []).append(operation)
+        self.results: queue.Queue[BatchResult | None] = queue.Queue()
+        # Errors that stopped a bus thread, besides the failed operations
+        self.errors: list[str] = []
+
+    def run(self) -> Iterator[BatchResult]:
+        """
+        Runs every bus and yields the results as they complete.
+        :return: Iterator of results.
+        """
+        if not self.buses:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.buses)) as executor:
+            futures = {
+                executor.submit(self.run_bus, port, operations): port
+                for port, operations in self.buses.items()
+            }
+            finished = 0
+            while finished < len(self.buses):
+                result = self.results.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+        for future, port in futures.items():
+            error = future.exception()
+            if error is not None:
+                logging.error(f"Batch on {port} stopped: {error!r}")
+                self.errors.append(f"Batch on {port} stopped: {error!r}")
+
+    def run_bus(self, port: str, operations: list[BatchOperation]) -> None:
+        """
+        Opens a port and runs its operations in order.
+        :param port: Serial port of the bus.
+        :param operations: Operations of the bus.
+        :return: None
+        """
+        try:
+            try:
+                master = ModbusMaster(
+                    port=port,
+                    baudrate=self.session["baudrate"],
+                    parity=self.session["parity"],
+                    stop_bits=self.session["stopbits"],
+                    timeout=self.session["timeout"],
+                    slave_address=self.session["address"],
+                )
+            except Exception as e:
+                logging.error(f"Failed to open {port}: {e}")
+                for operation in operations:
+                    self.results.put(
+                        BatchResult(
+                            operation,
+                            port,
+                            self.address_of(operation),
+                            False,
+                            f"Failed to open {port}",
+                            0.0,
+                        )
+                    )
+                return
+
+            failed = False
+            for operation in operations:
+                address = self.address_of(operation)
+                if failed:
+                    self.results.put(
+                        BatchResult(operation, port, address, False, "Skipped", 0.0)
+                    )
+                    continue
+                started = time.perf_counter()
+                try:
+                    ok, detail = self.execute(master, address, operation)
+                except Exception as e:
+                    logging.error(f"Operation {operation.line} on {port} failed: {e!r}")
+                    ok, detail = False, str(e) or type(e).__name__
+                self.results.put(
+                    BatchResult(
+                        operation, port, address, ok, detail, time.perf_counter() - started
+                    )
+                )
+                failed = not ok and self.stop_on_error
+            master.ser.close()
+        finally:
+            self.results.put(None)
+
+    def address_of(self, operation: BatchOperation) -> int:
+        return self.session["address"] if operation.address is None else operation.address
+
+    @staticmethod
+    def execute(
+        master: ModbusMaster, address: int, operation: BatchOperation
+    ) -> tuple[bool, str]:
+        """
+        Runs an operation.
+        :param master: Master of the bus.
+        :param address: Slave address of the operation.
+        :param operation: Operation to run.
+        :return: Tuple of success flag and description of the outcome.
+        """
+        master.slave_address = address
+        match operation.op:
+            case "read":
+                values = master.read_holding_register(
+                    operation.register_address, operation.count, False
+                )
+                return True, " ".join(str(value) for value in values)
+            case "read-coils" | "read-inputs":
+                if operation.op == "read-coils":
+                    bits = master.read_coils(operation.register_address, operation.count)
+                else:
+                    bits = master.read_discrete_inputs(operation.register_address, operation.count)
+                return True, " ".join(row for _, row in bits.rows())
+            case "write":
+                master.request_write_single(6, operation.register_address, operation.value)
+                return True, f"Wrote {operation.value}"
+            case "write-coil":
+                master.request_write_single(
+                    5, operation.register_address, COIL_ON if operation.value else 0
+                )
+                return True, f"Wrote {'ON' if operation.value else 'OFF'}"
+            case "wait":
+                time.sleep(operation.seconds)
+                return True, f"Waited {operation.seconds} s"
+            case "assert":
+                values = list(
+                    master.read_holding_register(
+                        operation.register_address, len(operation.expect), False
+                    )
+                )
+                if values != operation.expect:
+                    return False, f"Expected {operation.expect}, read {values}"
+                return True, f"Read {values}"
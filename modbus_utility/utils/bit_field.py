@@ -0,0 +1,133 @@
+from typing import Iterator, Sequence
+
+from modbus_utility.utils.pdu_codec import pack_bits, unpack_bits
+
+# Renders unpacked 0/1 bytes as characters
+BIT_CHARACTERS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+class BitField:
+    """
+    Represents the values of a coil or discrete input range, kept bit-packed in modbus
+    order (first bit in the LSB of the first byte) as received from the bus.
+
+    Single bits are read with shifts over the packed bytes, the whole range is only
+    unpacked, one table lookup per byte, when it is iterated or displayed.
+    """
+
+    __slots__ = ("start", "count", "packed")
+
+    def __init__(self, start: int, count: int, packed: bytes):
+        """
+        Creates a BitField object.
+        :param start: Address of the first bit.
+        :param count: Number of bits.
+        :param packed: Packed bit values, at least (count + 7) // 8 bytes.
+        """
+        if len(packed) < (count + 7) // 8:
+            raise ValueError(f"{len(packed)} bytes can not hold {count} bits")
+        self.start = start
+        self.count = count
+        self.packed = bytes(packed[: (count + 7) // 8])
+
+    @classmethod
+    def from_bits(cls, start: int, bits: Sequence[int]) -> "BitField":
+        return cls(start, len(bits), pack_bits(bits))
+
+    @classmethod
+    def join(cls, parts: Sequence["BitField"]) -> "BitField":
+        """
+        Joins contiguous bit fields, as read by consecutive requests, into one.
+        :param parts: Bit fields ordered by address, each one starting where the previous ends.
+        :return: Joined bit field.
+        """
+        if not parts:
+            raise ValueError("No bit fields to join")
+        if len(parts) == 1:
+            return parts[0]
+
+        value = 0
+        offset = 0
+        for part in parts:
+            if part.start != parts[0].start + offset:
+                raise ValueError(f"Bit field at {part.start} is not contiguous")
+            value |= part.as_int() << offset
+            offset += part.count
+        return cls(parts[0].start, offset, value.to_bytes((offset + 7) // 8, "little"))
+
+    def as_int(self) -> int:
+        """
+        Gets the bits as an integer, the first bit being the least significant one.
+        :return: Integer with the bit values, padding bits cleared.
+        """
+        return int.from_bytes(self.packed, "little") & ((1 << self.count) - 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Bit index out of range")
+        return (self.packed[index >> 3] >> (index & 7)) & 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.unpack())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitField):
+            return NotImplemented
+        return (
+            self.start == other.start
+            and self.count == other.count
+            and self.as_int() == other.as_int()
+        )
+
+    def __repr__(self) -> str:
+        return f"BitField(start={self.start}, count={self.count}, packed={self.packed.hex()})"
+
+    def unpack(self) -> bytes:
+        """
+        Unpacks the whole range.
+        :return: Bytes with one 0/1 value per bit.
+        """
+        return unpack_bits(self.packed, self.count)
+
+    def count_set(self) -> int:
+        return self.as_int().bit_count()
+
+    def set_addresses(self) -> list[int]:
+        """
+        Lists the addresses of the bits that are on, skipping the packed bytes that are 0.
+        :return: List of addresses.
+        """
+        addresses = []
+        for index, value in enumerate(self.packed):
+            while value:
+                low = value & -value
+                bit = (index << 3) + low.bit_length() - 1
+                if bit >= self.count:
+                    break
+                addresses.append(self.start + bit)
+                value ^= low
+        return addresses
+
+    def rows(self, width: int = 32) -> list[tuple[int, str]]:
+        """
+        Renders the range as rows of 0/1 characters, grouped by bytes.
+        :param width: Number of bits per row, a multiple of 8.
+        :return: List of (address of the first bit, bits) tuples.
+        """
+        bits = self.unpack().translate(BIT_CHARACTERS).decode()
+        return [
+            (
+                self.start + offset,
+                " ".join(
+                    bits[group : group + 8]
+                    for group in range(offset, min(offset + width, self.count), 8)
+                ),
+            )
+            for offset in range(0, self.count, width)
+        ]
+
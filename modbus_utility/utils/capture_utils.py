@@ -0,0 +1,133 @@
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, NamedTuple
+
+CAPTURE_MAGIC = b"MBCAP001"
+# timestamp (s), direction, frame length
+RECORD_HEADER = struct.Struct("<d B H")
+
+
+class CaptureDirection:
+    """
+    Represents the direction of a captured frame.
+    """
+
+    request = 0
+    response = 1
+
+
+class CaptureRecord(NamedTuple):
+    """
+    Represents a single frame stored in a capture file.
+    """
+
+    timestamp: float
+    direction: int
+    frame: bytes
+
+
+class CaptureWriter:
+    """
+    Appends raw RTU frames to a capture file.
+
+    The file starts with CAPTURE_MAGIC followed by one record per frame: a RECORD_HEADER
+    and the frame bytes, CRC included.
+    """
+
+    def __init__(self, path: str):
+        """
+        Creates a CaptureWriter object, the file is created if it does not exist.
+        :param path: Path to the capture file.
+        """
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new_file:
+            self.file.write(CAPTURE_MAGIC)
+
+    def write_frame(
+        self, direction: int, frame: bytes, timestamp: float | None = None
+    ) -> None:
+        """
+        Appends a frame to the capture.
+        :param direction: CaptureDirection of the frame.
+        :param frame: Frame bytes, including the CRC.
+        :param timestamp: Time the frame was seen, defaults to now.
+        :return: None
+        """
+        self.file.write(
+            RECORD_HEADER.pack(
+                time.time() if timestamp is None else timestamp, direction, len(frame)
+            )
+        )
+        self.file.write(frame)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def iter_capture(path: str) -> Iterator[CaptureRecord]:
+    """
+    Streams the records of a capture file. The file is memory-mapped so only the pages
+    being read are loaded.
+    :param path: Path to the capture file.
+    :return: Iterator over the records of the capture, in file order.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[: len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                raise Exception(f"{path} is not a modbus capture file")
+            offset = len(CAPTURE_MAGIC)
+            size = len(mm)
+            while offset + RECORD_HEADER.size <= size:
+                timestamp, direction, length = RECORD_HEADER.unpack_from(mm, offset)
+                offset += RECORD_HEADER.size
+                if offset + length > size:
+                    # Truncated record, the capture was interrupted while writing
+                    break
+                yield CaptureRecord(timestamp, direction, mm[offset : offset + length])
+                offset += length
+
+
+class CaptureTransaction(NamedTuple):
+    """
+    Represents a captured request together with the response that followed it, if any.
+    """
+
+    timestamp: float
+    request: bytes
+    response: bytes | None
+    response_delay: float
+
+
+def iter_transactions(path: str) -> Iterator[CaptureTransaction]:
+    """
+    Streams the capture pairing every request with the response that immediately follows it.
+    :param path: Path to the capture file.
+    :return: Iterator over the captured transactions.
+    """
+    pending: CaptureRecord | None = None
+    for record in iter_capture(path):
+        if record.direction == CaptureDirection.request:
+            if pending is not None:
+                yield CaptureTransaction(pending.timestamp, pending.frame, None, 0.0)
+            pending = record
+        elif pending is not None:
+            yield CaptureTransaction(
+                pending.timestamp,
+                pending.frame,
+                record.frame,
+                record.timestamp - pending.timestamp,
+            )
+            pending = None
+    if pending is not None:
+        yield CaptureTransaction(pending.timestamp, pending.frame, None, 0.0)
@@ -0,0 +1,117 @@
+from array import array
+import time
+from typing import NamedTuple, Sequence
+
+# Registers compared per slice when looking for the positions that changed
+COMPARE_CHUNK = 16
+
+
+class ChangeSet(NamedTuple):
+    """
+    Represents the registers of a block that have to be reported for a sample.
+    """
+
+    start: int
+    changes: list[tuple[int, int]]
+    snapshot: bool
+
+
+class ChangeDetector:
+    """
+    Report-by-exception stage for polled register blocks.
+
+    Keeps the last reported values of every block and only reports the registers that
+    changed. Registers with a deadband are only reported when they move further than
+    the deadband from their last reported value, and a full snapshot of the block is
+    forced every snapshot_interval seconds.
+    """
+
+    def __init__(
+        self,
+        deadbands: dict[int, float] | None = None,
+        snapshot_interval: float = 0.0,
+    ):
+        """
+        Creates a ChangeDetector object.
+        :param deadbands: Deadband per register address, registers not present must change exactly.
+        :param snapshot_interval: Seconds between forced full snapshots, 0 disables them.
+        """
+        self.deadbands = deadbands or {}
+        self.snapshot_interval = snapshot_interval
+        self.last_values: dict[int, array] = {}
+        self.last_snapshot: dict[int, float] = {}
+
+    def detect(
+        self, start: int, values: Sequence[int], now: float | None = None
+    ) -> ChangeSet:
+        """
+        Compares a new sample of a block with the last reported values.
+        :param start: Starting register of the block.
+        :param values: Register values of the sample.
+        :param now: Monotonic time of the sample, defaults to now.
+        :return: ChangeSet with the (register, value) pairs to report.
+        """
+        now = time.monotonic() if now is None else now
+        current = array("H", values)
+        last = self.last_values.get(start)
+
+        if (
+            last is None
+            or len(last) != len(current)
+            or (
+                self.snapshot_interval
+                and now - self.last_snapshot[start] >= self.snapshot_interval
+            )
+        ):
+            self.last_values[start] = current
+            self.last_snapshot[start] = now
+            return ChangeSet(
+                start, [(start + i, value) for i, value in enumerate(current)], True
+            )
+
+        # Quiet blocks are settled with a single buffer comparison
+        if last == current:
+            return ChangeSet(start, [], False)
+
+        changes = []
+        deadbands = self.deadbands
+        for chunk_start in range(0, len(current), COMPARE_CHUNK):
+            chunk_end = chunk_start + COMPARE_CHUNK
+            if last[chunk_start:chunk_end] == current[chunk_start:chunk_end]:
+                continue
+            for i in range(chunk_start, min(chunk_end, len(current))):
+                value = current[i]
+                previous = last[i]
+                if value == previous:
+                    continue
+                deadband = deadbands.get(start + i)
+                if deadband is not None and abs(value - previous) <= deadband:
+                    continue
+                last[i] = value
+                changes.append((start + i, value))
+
+        return ChangeSet(start, changes, False)
+
+    def reset(self) -> None:
+        """
+        Forgets the reported values, the next sample of every block is a full snapshot.
+        :return: None
+        """
+        self.last_values.clear()
+        self.last_snapshot.clear()
+
+
+def parse_deadbands(deadbands: list[str]) -> dict[int, float]:
+    """
+    Parses deadband definitions in the REGISTER=DEADBAND format.
+    :param deadbands: List of deadband definitions.
+    :return: Dictionary with the deadband of each register.
+    """
+    parsed = {}
+    for definition in deadbands:
+        register, _, deadband = definition.partition("=")
+        try:
+            parsed[int(register, 0)] = float(deadband)
+        except ValueError:
+            raise ValueError(f"Invalid deadband definition: {definition}")
+    return parsed
@@ -0,0 +1,281 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+import time
+from typing import Iterator, NamedTuple, Sequence
+
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.pdu_codec import (
+    decode_registers_response,
+    encode_read_request,
+    encode_write_registers,
+    encode_write_single,
+    finish_rtu_frame,
+    MAX_WRITE_REGISTERS,
+    ModbusError,
+    rtu_response_length,
+)
+
+BROADCAST_ADDRESS = 0
+# Slaves do not answer broadcasts, the master has to give them time to apply the write
+# before talking to them again. The spec recommends 100 to 200 ms.
+BROADCAST_TURNAROUND = 0.2
+# Length of a FC 3 request frame
+READ_REQUEST_LENGTH = 8
+
+
+class PushResult(NamedTuple):
+    """
+    Represents the outcome of a configuration push to a device.
+    """
+
+    port: str
+    address: int
+    ok: bool
+    # "broadcast" if the broadcast write was verified, "unicast" if a retry was needed
+    method: str
+    attempts: int
+    detail: str
+
+
+def parse_targets(targets: Sequence[str], default_port: str) -> dict[str, list[int]]:
+    """
+    Parses the devices to push to, each entry is [PORT:]ADDRESSES with ADDRESSES a comma
+    separated list of addresses and ranges, e.g. /dev/ttyUSB0:1-50,60.
+    :param targets: Entries to parse.
+    :param default_port: Port of the entries without one.
+    :return: Dictionary of port to sorted addresses.
+    """
+    buses: dict[str, set[int]] = {}
+    for target in targets:
+        port, _, addresses = target.rpartition(":")
+        port = port or default_port
+        for part in addresses.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition("-")
+            try:
+                first_address = int(first)
+                last_address = int(last) if last else first_address
+            except ValueError:
+                raise ValueError(f"Invalid address range {part}")
+            if not 1 <= first_address <= last_address <= 247:
+                raise ValueError(f"Addresses must be between 1 and 247, got {part}")
+            buses.setdefault(port, set()).update(range(first_address, last_address + 1))
+    return {port: sorted(addresses) for port, addresses in buses.items()}
+
+
+class ConfigPush:
+    """
+    Writes the same register values to many devices and verifies them.
+
+    Every bus runs on its own thread. When broadcasts are allowed and a bus has more than
+    one target, the write is broadcast once instead of being sent to each device in turn. The readback requests of
+    all the targets are encoded up front and sent back-to-back without the turnaround
+    sleep, and only the devices that fail verification get unicast retries. Results are
+    streamed as they complete.
+    """
+
+    def __init__(
+        self,
+        session: dict,
+        register: int,
+        values: Sequence[int],
+        buses: dict[str, list[int]],
+        broadcast: bool = False,
+        retries: int = 2,
+        broadcast_turnaround: float = BROADCAST_TURNAROUND,
+    ):
+        """
+        Creates a ConfigPush object.
+        :param session: Master session, used for the serial settings.
+        :param register: First register to write.
+        :param values: Values to write, FC 6 for one value and FC 16 for more.
+        :param buses: Dictionary of port to target addresses.
+        :param broadcast: Allow broadcast writes, every slave on the bus receives them.
+        :param retries: Unicast writes tried on each device that fails verification.
+        :param broadcast_turnaround: Seconds to wait after a broadcast write.
+        """
+        if not 1 <= len(values) <= MAX_WRITE_REGISTERS:
+            raise ValueError(f"Between 1 and {MAX_WRITE_REGISTERS} values can be pushed")
+        if not 0 <= register <= 0xFFFF - len(values) + 1:
+            raise ValueError(
+                f"Register {register} can not take {len(values)} values, the last register is 65535"
+            )
+        for value in values:
+            if not 0 <= value <= 0xFFFF:
+                raise ValueError(f"Values must be between 0 and 65535, got {value}")
+        self.session = session
+        self.register = register
+        self.values = tuple(values)
+        self.buses = buses
+        self.broadcast = broadcast
+        self.retries = retries
+        self.broadcast_turnaround = broadcast_turnaround
+        # The write PDU is the same for every device, broadcast or not
+        buffer = bytearray(MAX_WRITE_REGISTERS * 2 + 6)
+        if len(self.values) == 1:
+            length = encode_write_single(buffer, 0, 6, register, self.values[0])
+        else:
+            length = encode_write_registers(buffer, 0, register, self.values)
+        self.write_pdu = bytes(buffer[:length])
+        self.results: queue.Queue[PushResult | None] = queue.Queue()
+        # Errors that stopped a bus thread, besides the failed devices
+        self.errors: list[str] = []
+
+    def run(self) -> Iterator[PushResult]:
+        """
+        Pushes to every bus and yields the results as they complete.
+        :return: Iterator of results.
+        """
+        if not self.buses:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.buses)) as executor:
+            futures = {
+                executor.submit(self.push_bus, port, addresses): port
+                for port, addresses in self.buses.items()
+            }
+            finished = 0
+            while finished < len(self.buses):
+                result = self.results.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+        for future, port in futures.items():
+            error = future.exception()
+            if error is not None:
+                logging.error(f"Push on {port} stopped: {error!r}")
+                self.errors.append(f"Push on {port} stopped: {error!r}")
+
+    def push_bus(self, port: str, addresses: list[int]) -> None:
+        """
+        Opens a port, writes the values to its targets and verifies them.
+        :param port: Serial port of the bus.
+        :param addresses: Target addresses on the bus.
+        :return: None
+        """
+        reported: set[int] = set()
+
+        def report(result: PushResult) -> None:
+            reported.add(result.address)
+            self.results.put(result)
+
+        # Every target gets a result, the ones the push never reached fail with this reason
+        failure = "Not pushed"
+        try:
+            try:
+                # Responses are awaited with the port timeout, the fixed sleep only slows the bus
+                master = ModbusMaster(
+                    port=port,
+                    baudrate=self.session["baudrate"],
+                    parity=self.session["parity"],
+                    stop_bits=self.session["stopbits"],
+                    timeout=self.session["timeout"],
+                    slave_address=addresses[0],
+                    turnaround_delay=0.0,
+                )
+            except Exception as e:
+                logging.error(f"Failed to open {port}: {e}")
+                failure = f"Failed to open {port}"
+                return
+
+            try:
+                # Writes already received by each device, and why they did not verify
+                pending = {address: (0, "No attempt") for address in addresses}
+                if self.broadcast and len(addresses) > 1:
+                    try:
+                        master.execute_pdu(self.write_pdu, BROADCAST_ADDRESS)
+                        time.sleep(self.broadcast_turnaround)
+                    except Exception as e:
+                        logging.error(f"Broadcast write on {port} failed: {e}")
+                    else:
+                        failures = self.verify(master, addresses)
+                        for address in addresses:
+                            if address not in failures:
+                                report(
+                                    PushResult(port, address, True, "broadcast", 1, "Verified")
+                                )
+                        pending = {
+                            address: (1, reason) for address, reason in failures.items()
+                        }
+
+                for address, (attempts, reason) in pending.items():
+                    report(self.push_unicast(master, port, address, attempts, reason))
+            finally:
+                master.ser.close()
+        except Exception as e:
+            logging.error(f"Push on {port} failed: {e!r}")
+            failure = str(e) or type(e).__name__
+        finally:
+            for address in addresses:
+                if address not in reported:
+                    self.results.put(PushResult(port, address, False, "none", 0, failure))
+            self.results.put(None)
+
+    def plan_readback(self, addresses: list[int]) -> list[tuple[int, bytes]]:
+        """
+        Encodes the readback request of every target.
+        :param addresses: Target addresses.
+        :return: List of (address, request frame).
+        """
+        buffer = bytearray(READ_REQUEST_LENGTH)
+        plan = []
+        for address in addresses:
+            buffer[0] = address
+            length = finish_rtu_frame(
+                buffer, encode_read_request(buffer, 1, 3, self.register, len(self.values))
+            )
+            plan.append((address, bytes(buffer[:length])))
+        return plan
+
+    def verify(self, master: ModbusMaster, addresses: list[int]) -> dict[int, str]:
+        """
+        Reads the pushed registers back from every target, one request right after the other.
+        :param master: Master of the bus.
+        :param addresses: Target addresses.
+        :return: Dictionary of the addresses that failed verification to the reason.
+        """
+        response_length = rtu_response_length(3, len(self.values))
+        failures = {}
+        for address, frame in self.plan_readback(addresses):
+            master.request_buffer[: len(frame)] = frame
+            try:
+                pdu = master.transact(len(frame), response_length)
+                if pdu[0] != 3:
+                    raise ModbusError(f"Invalid function code received: {pdu[0]}")
+                values = decode_registers_response(pdu, len(self.values))
+            except Exception as e:
+                failures[address] = str(e) or type(e).__name__
+                continue
+            if values != self.values:
+                failures[address] = f"Read {list(values)}"
+        return failures
+
+    def push_unicast(
+        self, master: ModbusMaster, port: str, address: int, attempts: int, detail: str
+    ) -> PushResult:
+        """
+        Writes the values to a single device until it verifies or the retries run out.
+        :param master: Master of the bus.
+        :param port: Serial port of the bus.
+        :param address: Address of the device.
+        :param attempts: Writes the device already received, a broadcast one included.
+        :param detail: Reason the earlier writes did not verify.
+        :return: Result of the device.
+        """
+        # A device never written gets its first write on top of the retries
+        remaining = self.retries if attempts else self.retries + 1
+        for _ in range(remaining):
+            attempts += 1
+            try:
+                master.execute_pdu(self.write_pdu, address)
+            except Exception as e:
+                detail = str(e) or type(e).__name__
+                continue
+            failures = self.verify(master, [address])
+            if address not in failures:
+                return PushResult(port, address, True, "unicast", attempts, "Verified")
+            detail = failures[address]
+        return PushResult(port, address, False, "unicast", attempts, detail)
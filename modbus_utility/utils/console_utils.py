@@ -68,3 +68,37 @@ def generate_table(columns: list[TextElement], rows: list[list[TextElement]]) ->
         table.add_row(*row_element_str)
 
     return table
+
+
+def generate_register_table(
+    registers: list[tuple[int, int]], display_hex: bool = True
+) -> Table:
+    """
+    Generates a table with register values.
+    :param registers: List of (register, value) pairs to show.
+    :param display_hex: Flag to indicate if values should be displayed in hexadecimal.
+    :return: Table object with the register values.
+    """
+    return generate_table(
+        [
+            TextElement(
+                value="REGISTER", format=TextFormat(color=TextColors.BLUE, bold=True)
+            ),
+            TextElement(
+                value="VALUE", format=TextFormat(color=TextColors.GREEN, bold=True)
+            ),
+        ],
+        [
+            [
+                TextElement(
+                    value=register,
+                    format=TextFormat(color=TextColors.BLUE, bold=True),
+                ),
+                TextElement(
+                    value=value if not display_hex else hex(value),
+                    format=TextFormat(color=TextColors.GREEN, bold=True),
+                ),
+            ]
+            for register, value in registers
+        ],
+    )
@@ -0,0 +1,256 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
+from typing import NamedTuple
+
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.modbus_tcp_server import pack_mbap_frame, split_mbap_frames
+from modbus_utility.utils.request_handler import ExceptionCode, exception_response
+
+# Requests that can share a bus transaction when they are identical
+READ_FUNCTION_CODES = (1, 2, 3, 4)
+
+
+class GatewayStats:
+    """
+    Represents the counters of a gateway bus.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bus_transactions = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.connections = 0
+
+    def rows(self) -> list[tuple[str, int]]:
+        return [
+            ("Connections", self.connections),
+            ("Requests", self.requests),
+            ("Bus transactions", self.bus_transactions),
+            ("Coalesced requests", self.coalesced),
+            ("Failed transactions", self.failures),
+        ]
+
+
+class GatewayRequest(NamedTuple):
+    """
+    Represents a request waiting for the bus.
+    """
+
+    unit_id: int
+    pdu: bytes
+    key: tuple[int, bytes] | None
+    # Futures answered with the response, the coalesced reads included
+    futures: list[asyncio.Future]
+
+
+class BusScheduler:
+    """
+    Queues the requests of every client for one serial bus.
+
+    Clients are served round-robin, one request at a time, so a client pipelining many
+    requests cannot starve the others. Identical reads submitted while one is already
+    queued or on the bus are attached to it and answered with the same response, unless a
+    write to the same unit was submitted in between: the write ends the coalescing so a
+    read submitted after it is never answered with a value read before it.
+    """
+
+    def __init__(self, master: ModbusMaster):
+        """
+        Creates a BusScheduler object.
+        :param master: ModbusMaster connected to the bus.
+        """
+        self.master = master
+        # ModbusMaster is not thread-safe, a single worker keeps one transaction on the bus
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.client_queues: dict[int, deque[GatewayRequest]] = {}
+        self.round_robin: deque[int] = deque()
+        self.waiters: dict[tuple[int, bytes], list[asyncio.Future]] = {}
+        self.wakeup = asyncio.Event()
+        self.stats = GatewayStats()
+
+    def submit(self, client_id: int, unit_id: int, pdu: bytes) -> asyncio.Future:
+        """
+        Queues a request for the bus.
+        :param client_id: Id of the client connection sending the request.
+        :param unit_id: Address of the slave device.
+        :param pdu: Request PDU.
+        :return: Future resolved with the response PDU, empty for broadcasts.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.stats.requests += 1
+
+        key = None
+        futures = [future]
+        if pdu[0] in READ_FUNCTION_CODES and unit_id != 0:
+            key = (unit_id, pdu)
+            waiters = self.waiters.get(key)
+            if waiters is not None:
+                waiters.append(future)
+                self.stats.coalesced += 1
+                return future
+            self.waiters[key] = futures
+        elif self.waiters:
+            # Reads queued before this write keep their place, later ones need a new transaction
+            for waiting_key in [
+                waiting_key
+                for waiting_key in self.waiters
+                if unit_id == 0 or waiting_key[0] == unit_id
+            ]:
+                del self.waiters[waiting_key]
+
+        queue = self.client_queues.get(client_id)
+        if queue is None:
+            queue = self.client_queues[client_id] = deque()
+            self.round_robin.append(client_id)
+        queue.append(GatewayRequest(unit_id, pdu, key, futures))
+        self.wakeup.set()
+        return future
+
+    def next_request(self) -> GatewayRequest | None:
+        """
+        Picks the next request to put on the bus, rotating between clients.
+        :return: Request to execute, None if every queue is empty.
+        """
+        if not self.round_robin:
+            return None
+        client_id = self.round_robin.popleft()
+        queue = self.client_queues[client_id]
+        request = queue.popleft()
+        if queue:
+            self.round_robin.append(client_id)
+        else:
+            del self.client_queues[client_id]
+        return request
+
+    async def run(self) -> None:
+        """
+        Executes the queued requests on the bus until cancelled.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            request = self.next_request()
+            if request is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            try:
+                response = await loop.run_in_executor(
+                    self.executor, self.master.execute_pdu, request.pdu, request.unit_id
+                )
+                self.stats.bus_transactions += 1
+            except Exception as e:
+                logging.error(
+                    f"Gateway request {request.pdu.hex()} to unit {request.unit_id} failed - Exception: {e}"
+                )
+                self.stats.failures += 1
+                response = exception_response(
+                    request.pdu[0], ExceptionCode.gateway_target_failed
+                )
+
+            if request.key is not None and self.waiters.get(request.key) is request.futures:
+                del self.waiters[request.key]
+            for future in request.futures:
+                if not future.done():
+                    future.set_result(response)
+
+
+class ModbusGateway:
+    """
+    Modbus TCP to RTU gateway, forwards the requests of every TCP client to a serial bus.
+    """
+
+    def __init__(self, master: ModbusMaster):
+        """
+        Creates a ModbusGateway object.
+        :param master: ModbusMaster connected to the serial bus.
+        """
+        self.master = master
+        self.scheduler: BusScheduler | None = None
+        self.client_ids = itertools.count()
+
+    @property
+    def stats(self) -> GatewayStats:
+        return self.scheduler.stats if self.scheduler else GatewayStats()
+
+    async def write_responses(
+        self, pending: asyncio.Queue, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Sends the responses of a connection in the order its requests arrived.
+        :param pending: Queue of (transaction id, unit id, future) items, None ends the connection.
+        :param writer: Stream to write responses to.
+        :return: None
+        """
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            transaction_id, unit_id, future = item
+            response = await future
+            if response:
+                writer.write(pack_mbap_frame(transaction_id, unit_id, response))
+            if pending.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Serves a client connection until it is closed.
+        :param reader: Stream to read requests from.
+        :param writer: Stream to write responses to.
+        :return: None
+        """
+        client_id = next(self.client_ids)
+        self.scheduler.stats.connections += 1
+        pending: asyncio.Queue = asyncio.Queue()
+        response_task = asyncio.create_task(self.write_responses(pending, writer))
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                frames, consumed = split_mbap_frames(buffer)
+                for transaction_id, unit_id, pdu in frames:
+                    future = self.scheduler.submit(client_id, unit_id, pdu)
+                    pending.put_nowait((transaction_id, unit_id, future))
+                if consumed < 0:
+                    logging.error("Invalid MBAP header received, closing connection")
+                    break
+                del buffer[:consumed]
+        except ConnectionError:
+            pass
+        finally:
+            pending.put_nowait(None)
+            await response_task
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """
+        Listens for Modbus TCP clients until cancelled.
+        :param host: Interface to listen on.
+        :param port: TCP port to listen on.
+        :return: None
+        """
+        self.scheduler = BusScheduler(self.master)
+        scheduler_task = asyncio.create_task(self.scheduler.run())
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, backlog=1024
+        )
+        logging.info(f"Modbus gateway listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            scheduler_task.cancel()
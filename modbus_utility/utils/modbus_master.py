@@ -1,19 +1,43 @@
 import logging
 import struct
 import time
+from typing import NoReturn, Sequence
 
 from rich.console import Console
 import serial
 import typer
 
 from modbus_utility.physical.modbus_serial import initialize_device
+from modbus_utility.utils.bit_field import BitField
+from modbus_utility.utils.capture_utils import CaptureDirection, CaptureWriter
 from modbus_utility.utils.console_utils import (
     format_text_element,
     TextElement,
     TextFormat,
     TextColors,
 )
-from modbus_utility.utils.message_utils import pack_message
+from modbus_utility.utils.pdu_codec import (
+    COIL_ON,
+    decode_bits_response,
+    decode_registers_response,
+    decode_write_response,
+    encode_read_request,
+    encode_write_coils,
+    encode_write_single,
+    finish_rtu_frame,
+    MAX_READ_BITS,
+    MAX_RTU_FRAME,
+    MAX_WRITE_BITS,
+    ModbusError,
+    ModbusTimeoutError,
+    ModbusTransportError,
+    raise_for_exception,
+    rtu_pdu,
+    rtu_response_length,
+    split_range,
+)
+from modbus_utility.utils.profiling_utils import profiler
+from modbus_utility.utils.register_cache import RegisterCache
 
 console = Console()
 
@@ -27,6 +51,9 @@ class ModbusMaster:
         stop_bits: int,
         timeout: float,
         slave_address: int,
+        cache: RegisterCache | None = None,
+        turnaround_delay: float = 0.1,
+        capture: CaptureWriter | None = None,
     ):
         """
         Creates a ModbusMaster object
@@ -36,6 +63,9 @@ class ModbusMaster:
         :param stop_bits: Number of stop bits to use in the communication
         :param timeout: Timeout for the communication
         :param slave_address: Address of the slave device
+        :param cache: Register cache used for reads, None reads always from the bus
+        :param turnaround_delay: Seconds to wait after sending each request
+        :param capture: Capture the frames are recorded to, for the replay command
         """
         try:
             self.ser = initialize_device(port, baudrate, parity, stop_bits, timeout)
@@ -47,9 +77,32 @@ class ModbusMaster:
 				)
 			)}")
             logging.error("Failed to initialize serial device")
-            raise typer.exit()
+            raise typer.Exit()
 
+        self.port = port
         self.slave_address = slave_address
+        self.cache = cache
+        self.turnaround_delay = turnaround_delay
+        self.capture = capture
+        # Commands exit on a failed port, callers that keep going get a ModbusTransportError
+        self.exit_on_transport_error = True
+        # Requests are encoded in place, the frame is never rebuilt from slices
+        self.request_buffer = bytearray(MAX_RTU_FRAME)
+
+    def transport_failed(self, message: str, error: Exception) -> NoReturn:
+        """
+        Handles a failed serial port: the command exits, or a ModbusTransportError is raised
+        if exit_on_transport_error is off.
+        :param message: Description of the failed operation.
+        :param error: Error raised by the port.
+        :return: None, it always raises.
+        """
+        if not self.exit_on_transport_error:
+            raise ModbusTransportError(f"{message}: {error}")
+        console.print(
+            f"{format_text_element(TextElement(value=f'{message}.', format=TextFormat(color=TextColors.RED, bold=False)))}"
+        )
+        raise typer.Exit()
 
     def send_request(self, request: bytes):
         """
@@ -57,15 +110,18 @@ class ModbusMaster:
         :param request: Request message to send as a byte stream
         :return: None.
         """
+        started = time.perf_counter() if profiler.enabled else 0.0
         try:
             self.ser.write(request)
-        except serial.SerialException:
-            console.print(
-                f"{format_text_element(TextElement(value='Failed to send request.', format=TextFormat(color=TextColors.RED, bold=False)))}"
-            )
+        except serial.SerialException as e:
             logging.error("Failed to write to the serial port")
-            raise typer.Exit()
-        time.sleep(0.1)
+            self.transport_failed("Failed to send request", e)
+        if profiler.enabled:
+            started = profiler.lap("write", started)
+        if self.turnaround_delay:
+            time.sleep(self.turnaround_delay)
+        if profiler.enabled:
+            profiler.lap("sleep", started)
 
     def read_response(self, num_bytes: int) -> bytes:
         """
@@ -73,15 +129,119 @@ class ModbusMaster:
         :param num_bytes: Number of bytes to read from the bus
         :return: Response message as a byte stream
         """
+        started = time.perf_counter() if profiler.enabled else 0.0
         try:
             response = self.ser.read(num_bytes)
+        except serial.SerialException as e:
+            logging.error("Failed to read from the serial port")
+            self.transport_failed("Failed to read from the slave", e)
+        if profiler.enabled:
+            profiler.lap("read", started)
+        return response
+
+    def read_rtu_response(self) -> bytes:
+        """
+        Reads a complete RTU response frame, using its header to know how many bytes follow.
+        :return: Response frame as a byte stream, CRC included
+        """
+        header = self.read_response(3)
+        if len(header) < 3:
+            raise ModbusTimeoutError("Incomplete response received")
+
+        function_code = header[1]
+        if function_code & 0x80:
+            remaining = 2
+        elif function_code in (1, 2, 3, 4, 23):
+            remaining = header[2] + 2
+        else:
+            remaining = 5
+        response = header + self.read_response(remaining)
+        if len(response) < 3 + remaining:
+            raise ModbusTimeoutError("Incomplete response received")
+
+        rtu_pdu(response)
+        return response
+
+    def execute_pdu(self, pdu: bytes, slave_address: int | None = None) -> bytes:
+        """
+        Sends a raw request PDU and waits for the response, used to forward requests received from other protocols.
+        :param pdu: Request PDU, starting with the function code
+        :param slave_address: Address of the slave device, defaults to the configured one. 0 broadcasts the request
+        :return: Response PDU, empty for broadcast requests
+        """
+        address = self.slave_address if slave_address is None else slave_address
+        buffer = self.request_buffer
+        buffer[0] = address
+        buffer[1 : 1 + len(pdu)] = pdu
+        length = finish_rtu_frame(buffer, 1 + len(pdu))
+
+        try:
+            self.ser.reset_input_buffer()
+            self.ser.write(buffer[:length])
         except serial.SerialException:
+            logging.error("Failed to write to the serial port")
+            raise ModbusError("Failed to send request")
+        if self.capture is not None:
+            self.capture.write_frame(CaptureDirection.request, bytes(buffer[:length]))
+        if address == 0:
+            return b""
+
+        response = self.read_rtu_response()
+        if self.capture is not None:
+            self.capture.write_frame(CaptureDirection.response, response)
+        return response[1:-2]
+
+    def transact(
+        self, length: int, response_length: int, show_frame_info: bool = False
+    ) -> memoryview:
+        """
+        Sends the request encoded in the request buffer and validates the response frame.
+        :param length: Length of the request frame, CRC included.
+        :param response_length: Expected length of the response frame.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: View over the response PDU.
+        """
+        request = bytes(self.request_buffer[:length])
+        if show_frame_info:
             console.print(
-                f"{format_text_element(TextElement(value='Failed to read from the slave.', format=TextFormat(color=TextColors.RED, bold=False)))}"
+                f"[!] Request frame: {format_text_element(TextElement(value=request, format=TextFormat(color=TextColors.GREEN, bold=True)))}"
             )
-            logging.error("Failed to read from the serial port")
-            raise typer.Exit()
-        return response
+
+        # Drop what is left of a late or partial response to an earlier request
+        try:
+            self.ser.reset_input_buffer()
+        except serial.SerialException as e:
+            logging.error("Failed to flush the serial port")
+            self.transport_failed("Failed to send request", e)
+        self.send_request(request)
+        # Stamped once the turnaround delay is over, so it is not counted as slave latency
+        if self.capture is not None:
+            self.capture.write_frame(CaptureDirection.request, request)
+
+        response = self.read_response(response_length)
+        if self.capture is not None and response:
+            self.capture.write_frame(CaptureDirection.response, response)
+
+        if show_frame_info:
+            console.print(
+                f"[!] Response frame: {format_text_element(
+					TextElement(
+						value=response, 
+						format=TextFormat(color=TextColors.GREEN, bold=True)
+					)
+				)}"
+            )
+
+        # Exception responses are shorter than the expected frame
+        if len(response) == 5 and response[1] & 0x80:
+            raise_for_exception(rtu_pdu(response))
+        if len(response) < response_length:
+            raise ModbusTimeoutError("Incomplete response received")
+        pdu = rtu_pdu(response)
+        if response[0] != self.request_buffer[0]:
+            raise ModbusError(f"Response received from slave {response[0]}")
+
+        return pdu
 
     @staticmethod
     def extract_write_response(response_bytes: bytes) -> tuple[int, int, int]:
@@ -90,10 +250,7 @@ class ModbusMaster:
         :param response_bytes: Response bytes to extract the data from
         :return: Tuple of function code, register and value
         """
-        _, function_code, register, value = struct.unpack(
-            ">B B H H", response_bytes[:5]
-        )
-        return function_code, register, value
+        return decode_write_response(memoryview(response_bytes)[1:])
 
     @staticmethod
     def extract_holding_register_response(
@@ -110,9 +267,11 @@ class ModbusMaster:
         :param big_endian: Endianness of the response, True for big-endian.
         :return: Tuple of read values.
         """
-        _, recv_function_code, byte_count = struct.unpack(">B B B", response_bytes[:3])
+        pdu = memoryview(response_bytes)[1:]
+        raise_for_exception(pdu)
+        recv_function_code = pdu[0]
         if recv_function_code != expected_function_code:
-            raise Exception(
+            raise ModbusError(
                 f"Invalid function code received: {format_text_element(
 					TextElement(
 						value=recv_function_code,
@@ -123,14 +282,10 @@ class ModbusMaster:
 					)
 				)}"
             )
-        reg_start = 3
-        reg_end = reg_start + byte_count
-        values = struct.unpack(
-            f"{'> ' if big_endian else '<'}{num_registers}H",
-            response_bytes[reg_start:reg_end],
-        )
+        if not big_endian:
+            return struct.unpack_from(f"<{num_registers}H", pdu, 2)
 
-        return values
+        return decode_registers_response(pdu, num_registers)
 
     @staticmethod
     def verify_write_response(
@@ -160,6 +315,44 @@ class ModbusMaster:
 
         return True
 
+    def request_write_single(self, function_code: int, address: int, value: int) -> None:
+        """
+        Writes a single register (function code 6) or coil (function code 5) and verifies the echo.
+        :param function_code: Write function code, 5 or 6.
+        :param address: Register or coil to write to.
+        :param value: Value to write, 0xFF00 or 0 for a coil.
+        :return: None
+        """
+        started = time.perf_counter() if profiler.enabled else 0.0
+        self.request_buffer[0] = self.slave_address
+        length = finish_rtu_frame(
+            self.request_buffer,
+            encode_write_single(self.request_buffer, 1, function_code, address, value),
+        )
+        if profiler.enabled:
+            profiler.lap("pack", started)
+
+        if self.cache is not None:
+            self.cache.invalidate(
+                self.port, self.slave_address, function_code, address, 1
+            )
+        pdu = self.transact(length, rtu_response_length(function_code, 1))
+
+        started = time.perf_counter() if profiler.enabled else 0.0
+        recv_function_code, recv_address, recv_value = decode_write_response(pdu)
+        if profiler.enabled:
+            profiler.lap("decode", started)
+
+        if not self.verify_write_response(
+            recv_function_code,
+            recv_address,
+            recv_value,
+            function_code,
+            address,
+            value,
+        ):
+            raise ModbusError("Unexpected write response received")
+
     def write_register(self, register: int, value: int) -> None:
         """
         Writes a value to a register on a modbus slave device.
@@ -168,28 +361,7 @@ class ModbusMaster:
         :return: None
         """
         try:
-            function_code = 6
-            request = pack_message(self.slave_address, function_code, register, value)
-
-            self.send_request(request)
-
-            response = self.read_response(8)
-            if len(response) < 8:
-                raise Exception("Incomplete response received")
-
-            recv_function_code, recv_register, recv_value = self.extract_write_response(
-                response
-            )
-
-            if not self.verify_write_response(
-                recv_function_code,
-                recv_register,
-                recv_value,
-                function_code,
-                register,
-                value,
-            ):
-                raise Exception("Incomplete response received")
+            self.request_write_single(6, register, value)
 
             console.print(
                 f"Wrote value {format_text_element(
@@ -237,36 +409,224 @@ class ModbusMaster:
         :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
         :return: Tuple of register values ordered from the starting register.
         """
+        if self.cache is not None:
+            return self.cache.read_through(
+                self.port,
+                self.slave_address,
+                3,
+                start_reg,
+                num_reg,
+                lambda start, count: self.request_holding_register(
+                    start, count, show_frame_info
+                ),
+            )
+
+        return self.request_holding_register(start_reg, num_reg, show_frame_info)
+
+    def request_holding_register(
+        self, start_reg: int, num_reg: int, show_frame_info: bool
+    ) -> tuple[int]:
+        """
+        Requests a group of holding registers (function code 3) from the modbus slave, bypassing the cache.
+        :param start_reg: Starting register to read from.
+        :param num_reg: Number of registers to read.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: Tuple of register values ordered from the starting register.
+        """
         function_code = 3
-        request = pack_message(self.slave_address, function_code, start_reg, num_reg)
+        started = time.perf_counter() if profiler.enabled else 0.0
+        self.request_buffer[0] = self.slave_address
+        length = finish_rtu_frame(
+            self.request_buffer,
+            encode_read_request(
+                self.request_buffer, 1, function_code, start_reg, num_reg
+            ),
+        )
+        if profiler.enabled:
+            profiler.lap("pack", started)
 
-        if show_frame_info:
-            console.print(
-                f"[!] Request frame: {format_text_element(TextElement(value=request, format=TextFormat(color=TextColors.GREEN, bold=True)))}"
-            )
+        pdu = self.transact(
+            length, rtu_response_length(function_code, num_reg), show_frame_info
+        )
 
-        self.send_request(request)
+        started = time.perf_counter() if profiler.enabled else 0.0
+        if pdu[0] != function_code:
+            raise ModbusError(f"Invalid function code received: {pdu[0]}")
+        values = decode_registers_response(pdu, num_reg)
+        if profiler.enabled:
+            profiler.lap("decode", started)
 
-        response = self.read_response(5 + 2 * num_reg)
+        return values
 
-        if show_frame_info:
-            console.print(
-                f"[!] Response frame: {format_text_element(
-					TextElement(
-						value=response, 
-						format=TextFormat(color=TextColors.GREEN, bold=True)
-					)
-				)}"
-            )
+    def read_coils(
+        self, start: int, count: int, show_frame_info: bool = False
+    ) -> BitField:
+        """
+        Reads a group of coils (function code 1) from the modbus slave.
+        :param start: Starting coil to read from.
+        :param count: Number of coils to read, split in several requests above MAX_READ_BITS.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: Bit-packed coil values.
+        """
+        return self.read_bits(1, start, count, show_frame_info)
 
-        if response[1] & 0x80:
-            raise Exception(f"Error response received: {response[2]}")
+    def read_discrete_inputs(
+        self, start: int, count: int, show_frame_info: bool = False
+    ) -> BitField:
+        """
+        Reads a group of discrete inputs (function code 2) from the modbus slave.
+        :param start: Starting input to read from.
+        :param count: Number of inputs to read, split in several requests above MAX_READ_BITS.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: Bit-packed input values.
+        """
+        return self.read_bits(2, start, count, show_frame_info)
 
-        if len(response) < 5 + 2 * num_reg:
-            raise Exception("Incomplete response received")
+    def read_bits(
+        self, function_code: int, start: int, count: int, show_frame_info: bool
+    ) -> BitField:
+        """
+        Reads a range of bits, one request per MAX_READ_BITS, joining the packed responses.
+        :param function_code: Read function code, 1 or 2.
+        :param start: Starting address.
+        :param count: Number of bits.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: Bit-packed values.
+        """
+        return BitField.join(
+            [
+                self.request_bits(function_code, chunk_start, chunk_count, show_frame_info)
+                for chunk_start, chunk_count in split_range(start, count, MAX_READ_BITS)
+            ]
+        )
 
-        values = self.extract_holding_register_response(
-            response, num_reg, function_code
+    def request_bits(
+        self, function_code: int, start: int, count: int, show_frame_info: bool
+    ) -> BitField:
+        """
+        Requests a group of at most MAX_READ_BITS coils or discrete inputs.
+        :param function_code: Read function code, 1 or 2.
+        :param start: Starting address.
+        :param count: Number of bits.
+        :param show_frame_info: Flag to indicate if the raw frames being transferred should be displayed.
+        :return: Bit-packed values.
+        """
+        started = time.perf_counter() if profiler.enabled else 0.0
+        self.request_buffer[0] = self.slave_address
+        length = finish_rtu_frame(
+            self.request_buffer,
+            encode_read_request(self.request_buffer, 1, function_code, start, count),
         )
+        if profiler.enabled:
+            profiler.lap("pack", started)
 
-        return values
+        pdu = self.transact(
+            length, rtu_response_length(function_code, count), show_frame_info
+        )
+
+        started = time.perf_counter() if profiler.enabled else 0.0
+        if pdu[0] != function_code:
+            raise ModbusError(f"Invalid function code received: {pdu[0]}")
+        bits = BitField(start, count, decode_bits_response(pdu, count))
+        if profiler.enabled:
+            profiler.lap("decode", started)
+
+        return bits
+
+    def write_coil(self, address: int, value: bool) -> None:
+        """
+        Writes a single coil (function code 5) on a modbus slave device.
+        :param address: Coil to write to
+        :param value: Value to write to the coil
+        :return: None
+        """
+        target = f"coil {address}"
+        try:
+            self.request_write_single(5, address, COIL_ON if value else 0)
+            self.report_coil_write(target, True)
+        except serial.SerialException:
+            self.report_coil_write(target, False)
+
+    def write_coils(self, address: int, values: Sequence[int]) -> None:
+        """
+        Writes a group of coils (function code 15) on a modbus slave device.
+        :param address: Starting coil to write to
+        :param values: Coil values, 0/1
+        :return: None
+        """
+        target = f"{len(values)} coils starting at {address}"
+        try:
+            self.request_write_coils(address, values)
+            self.report_coil_write(target, True)
+        except serial.SerialException:
+            self.report_coil_write(target, False)
+
+    def request_write_coils(self, address: int, values: Sequence[int]) -> None:
+        """
+        Writes a group of coils (function code 15), one request per MAX_WRITE_BITS.
+        :param address: Starting coil to write to
+        :param values: Coil values, 0/1
+        :return: None
+        """
+        function_code = 15
+        for chunk_start, chunk_count in split_range(address, len(values), MAX_WRITE_BITS):
+            offset = chunk_start - address
+            started = time.perf_counter() if profiler.enabled else 0.0
+            packed = BitField.from_bits(
+                chunk_start, values[offset : offset + chunk_count]
+            ).packed
+            self.request_buffer[0] = self.slave_address
+            length = finish_rtu_frame(
+                self.request_buffer,
+                encode_write_coils(
+                    self.request_buffer, 1, chunk_start, packed, chunk_count
+                ),
+            )
+            if profiler.enabled:
+                profiler.lap("pack", started)
+
+            if self.cache is not None:
+                self.cache.invalidate(
+                    self.port, self.slave_address, function_code, chunk_start, chunk_count
+                )
+            pdu = self.transact(length, rtu_response_length(function_code, 0))
+            if not self.verify_write_response(
+                *decode_write_response(pdu), function_code, chunk_start, chunk_count
+            ):
+                raise ModbusError("Unexpected write response received")
+
+    @staticmethod
+    def report_coil_write(target: str, written: bool) -> None:
+        """
+        Displays the result of a coil write.
+        :param target: Description of the coils written.
+        :param written: True if the write succeeded.
+        :return: None
+        """
+        if written:
+            console.print(
+                f"Wrote {format_text_element(
+				TextElement(
+					value=target,
+					format=TextFormat(
+						color=TextColors.MAGENTA,
+						bold=True
+					)
+				)
+			)}"
+            )
+            logging.info(f"Wrote {target}")
+            return
+
+        console.print(
+            f"{format_text_element(
+			TextElement(
+				value="Failed to write to the coils. Check the connection and try again.",
+				format=TextFormat(
+					color=TextColors.RED,
+					bold=True
+				)
+			)
+		)}"
+        )
+        logging.error(f"Failed to write {target}")
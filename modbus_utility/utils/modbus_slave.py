@@ -5,9 +5,15 @@ from rich.console import Console
 import serial
 import typer
 
-from modbus_utility.physical.modbus_serial import initialize_device, calculate_crc
+from modbus_utility.physical.modbus_serial import frame_gap, initialize_device, read_frame
 
 from modbus_utility.utils.console_utils import format_text_element, TextElement, TextFormat, TextColors
+from modbus_utility.utils.register_store import RegisterStore, create_default_store
+from modbus_utility.utils.pdu_codec import finish_rtu_frame, MAX_RTU_FRAME, verify_crc
+from modbus_utility.utils.request_handler import handle_request_into
+from modbus_utility.utils.response_cache import ResponseCache
+from modbus_utility.utils.slave_server import selectable, SlaveServer
+from modbus_utility.utils.stats_utils import generate_stats_table
 
 
 console = Console()
@@ -22,6 +28,8 @@ class ModbusSlave:
 		stop_bits: int,
 		timeout: float,
 		slave_address: int,
+		store: RegisterStore | None = None,
+		cache_responses: bool = True,
 	):
 		"""
 		Creates a ModbusSlave object.
@@ -31,6 +39,8 @@ class ModbusSlave:
 		:param stop_bits: Number of stop bits to use in the communication
 		:param timeout: Timeout for the communication
 		:param slave_address: Modbus slave address this object will bind to
+		:param store: Register store to serve, a default store is created if None
+		:param cache_responses: Reuse the encoded responses to repeated read requests
 		"""
 		try:
 			self.ser = initialize_device(port, baudrate, parity, stop_bits, timeout)
@@ -45,6 +55,12 @@ class ModbusSlave:
 			raise typer.Exit()
 
 		self.slave_address = slave_address
+		self.store = store if store is not None else create_default_store()
+		# Responses are encoded in place, address first and CRC last
+		self.response_buffer = bytearray(MAX_RTU_FRAME)
+		self.response_cache = ResponseCache(self.store) if cache_responses else None
+		if self.response_cache is not None and not self.response_cache.enabled:
+			self.response_cache = None
 
 	def send_request(self, request: bytes):
 		"""
@@ -83,7 +99,8 @@ class ModbusSlave:
 		show_debug: bool
 	) -> None:
 		"""
-		Starts to listen for incoming data in the previously configured serial port.
+		Starts to listen for incoming data in the previously configured serial port. The port
+		is served by a SlaveServer when a selector can wait on it, by a blocking read loop otherwise.
 		:param show_debug: Show debug information.
 		:return:
 		"""
@@ -93,35 +110,34 @@ class ModbusSlave:
 			  f"or press {format_text_element(
 				  TextElement(value="q", format=TextFormat(color=TextColors.CYAN, bold=True)))}")
 
-		rx_buffer = b''
+		if selectable(self.ser):
+			server = SlaveServer(show_debug)
+			server.add_slave(self)
+			try:
+				server.serve_forever()
+			except KeyboardInterrupt:
+				console.print(f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}")
+				console.print(generate_stats_table(server.rows()))
+				raise typer.Exit()
+			finally:
+				server.close()
+
+		gap = frame_gap(self.ser.baudrate)
 		while True:
 			try:
-				data = self.ser.read(100)
-				if data:
+				data = read_frame(self.ser, gap)
+				if not data:
+					continue
+				if show_debug:
 					console.print(data)
-					if len(data) < 6:
-						continue
-					if data[0] == self.slave_address:
-						function_code = data[1]
-						if function_code == 3:
-							register = (data[2] << 8) + data[3]
-							num_registers = (data[4] << 8) + data[5]
-							crc = (data[-1] << 8) + data[-2]
-							if crc == calculate_crc(data[:-2]):
-								console.print(f"We have a request for reading {format_text_element(TextElement(value=num_registers, format=TextFormat(color=TextColors.CYAN)))} "
-									  f"registers starting from register {format_text_element(TextElement(value=register, format=TextFormat(color=TextColors.CYAN)))}")
-								response = b'\x01\x03\x04\x45\xea\x32\x00\xdb\xab'
-								self.ser.write(response)
-							else:
-								console.print(f"{format_text_element(TextElement(value='CRC Error', format=TextFormat(color=TextColors.RED, bold=True)))}")
-						else:
-							console.print(f"{format_text_element(TextElement(value='Function code not supported.', format=TextFormat(color=TextColors.RED, bold=True)))}")
-					else:
-							console.print(
-							f"{format_text_element(TextElement(value='Slave address does not match', format=TextFormat(color=TextColors.RED, bold=True)))}")
+				valid, response = self.analyze_incoming_data(data, show_debug)
+				if valid and response:
+					self.ser.write(response)
 
 			except KeyboardInterrupt:
 				console.print(f"{format_text_element(TextElement(value="Detected keyboard interrupt, exiting", format=TextFormat(color=TextColors.YELLOW, bold=True)))}")
+				if self.response_cache is not None:
+					console.print(generate_stats_table(self.response_cache.stats.rows()))
 				raise typer.Exit()
 
 	def analyze_incoming_data(self, data_frame: bytes, show_debug: bool = False) -> tuple[bool, bytes]:
@@ -131,6 +147,9 @@ class ModbusSlave:
 		:param show_debug: Show debug information.
 		return: a tuple containing a boolean indicating if the data frame is valid and the response to send if applies.
 		"""
+		if len(data_frame) < 4:
+			return False, b''
+
 		recv_address = data_frame[0]
 		if recv_address != self.slave_address:
 			if show_debug:
@@ -142,21 +161,35 @@ class ModbusSlave:
 				)}")
 			return False, b''
 
-		recv_func_code = data_frame[1]
-
-		match recv_func_code:
-			case 3:
-				...
-			case 4:
-				...
-			case 6:
-				...
-			case _:
+		cache = self.response_cache
+		if cache is not None:
+			started = time.perf_counter()
+			response = cache.lookup(data_frame)
+			if response is not None:
+				cache.stats.hits += 1
+				cache.stats.hit_time += time.perf_counter() - started
 				if show_debug:
-					print(f"{format_text_element(
-						TextElement(
-							value='Unknown function code received.', 
-							format=TextFormat(color=TextColors.RED, bold=True)
-						)
-					)}")
-				return False, b''
\ No newline at end of file
+					console.print(f"Request for function code {format_text_element(TextElement(value=data_frame[1], format=TextFormat(color=TextColors.CYAN)))}, "
+						  f"cached response {format_text_element(TextElement(value=response[1:-2], format=TextFormat(color=TextColors.CYAN)))}")
+				return True, response
+
+		if not verify_crc(data_frame):
+			if show_debug:
+				console.print(f"{format_text_element(TextElement(value='CRC Error', format=TextFormat(color=TextColors.RED, bold=True)))}")
+			return False, b''
+
+		# Read before encoding, a write racing with the encoding makes the entry stale
+		generation = self.store.generation
+		buffer = self.response_buffer
+		buffer[0] = self.slave_address
+		with memoryview(data_frame) as frame:
+			length = finish_rtu_frame(buffer, handle_request_into(self.store, frame[1:-2], buffer, 1))
+		response = bytes(buffer[:length])
+		if cache is not None and cache.store_response(bytes(data_frame), response, generation):
+			cache.stats.misses += 1
+			cache.stats.miss_time += time.perf_counter() - started
+		if show_debug:
+			console.print(f"Request for function code {format_text_element(TextElement(value=data_frame[1], format=TextFormat(color=TextColors.CYAN)))}, "
+				  f"response {format_text_element(TextElement(value=response[1:-2], format=TextFormat(color=TextColors.CYAN)))}")
+
+		return True, response
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import struct
+import time
+
+from modbus_utility.utils.register_store import RegisterStore
+from modbus_utility.utils.request_handler import handle_request_into
+from modbus_utility.utils.stats_utils import LatencyStats, latency_rows
+
+# transaction id, protocol id, length, unit id
+MBAP_HEADER = struct.Struct(">H H H B")
+MAX_PDU_LENGTH = 253
+
+
+def parse_host_port(value: str) -> tuple[str, int]:
+    """
+    Parses a HOST:PORT string.
+    :param value: String to parse.
+    :return: Tuple of host and port.
+    """
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address {value}, use HOST:PORT")
+    return host, int(port)
+
+
+def split_mbap_frames(buffer: bytearray) -> tuple[list[tuple[int, int, bytes]], int]:
+    """
+    Splits the complete MBAP frames at the start of a receive buffer.
+    :param buffer: Bytes received on a connection.
+    :return: Tuple of the (transaction id, unit id, PDU) frames found and the number of bytes they use, -1 if the stream is corrupt.
+    """
+    frames = []
+    offset = 0
+    available = len(buffer)
+    while available - offset >= MBAP_HEADER.size:
+        transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack_from(
+            buffer, offset
+        )
+        if protocol_id != 0 or not 2 <= length <= MAX_PDU_LENGTH + 1:
+            return frames, -1
+        end = offset + 6 + length
+        if end > available:
+            break
+        pdu = bytes(buffer[offset + MBAP_HEADER.size : end])
+        frames.append((transaction_id, unit_id, pdu))
+        offset = end
+
+    return frames, offset
+
+
+def pack_mbap_frame(transaction_id: int, unit_id: int, pdu: bytes) -> bytes:
+    """
+    Adds the MBAP header to a PDU.
+    :param transaction_id: Transaction id of the request being answered.
+    :param unit_id: Unit id of the request being answered.
+    :param pdu: PDU to send.
+    :return: Modbus TCP frame.
+    """
+    return MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+
+class TcpServerStats:
+    """
+    Represents the counters of a ModbusTcpServer.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.active_connections = 0
+        self.requests = 0
+        self.protocol_errors = 0
+
+    def rows(self) -> list[tuple[str, int]]:
+        return [
+            ("Connections", self.connections),
+            ("Active connections", self.active_connections),
+            ("Requests", self.requests),
+            ("Protocol errors", self.protocol_errors),
+        ]
+
+
+class ModbusTcpServer:
+    """
+    Modbus TCP front-end for the slave simulator, the connections are served by a
+    SlaveServer listener.
+
+    Every connection keeps its own receive buffer that is parsed incrementally, so
+    pipelined requests are answered in order and all the responses produced by one read
+    are flushed together.
+    """
+
+    def __init__(
+        self,
+        store: RegisterStore,
+        unit_id: int | None = None,
+        show_debug: bool = False,
+    ):
+        """
+        Creates a ModbusTcpServer object.
+        :param store: Register store to serve the requests from.
+        :param unit_id: Unit id to answer to, None answers to every unit id.
+        :param show_debug: Log every request received.
+        """
+        self.store = store
+        self.unit_id = unit_id
+        self.show_debug = show_debug
+        self.stats = TcpServerStats()
+
+    def accepts_unit(self, unit_id: int) -> bool:
+        return self.unit_id is None or unit_id in (self.unit_id, 0xFF)
+
+    def process_buffer(self, buffer: bytearray) -> tuple[bytearray, int]:
+        """
+        Answers every complete request in a receive buffer.
+        :param buffer: Bytes received on a connection.
+        :return: Tuple of the responses to send and the number of bytes consumed, -1 if the stream is corrupt.
+        """
+        responses = bytearray()
+        frames, consumed = split_mbap_frames(buffer)
+        for transaction_id, unit_id, pdu in frames:
+            self.stats.requests += 1
+            if not self.accepts_unit(unit_id):
+                continue
+            if self.show_debug:
+                logging.info(f"TCP request {transaction_id}: {pdu.hex()}")
+            # The response PDU is encoded right after its header, which is filled in afterwards
+            start = len(responses)
+            responses.extend(bytes(MBAP_HEADER.size + MAX_PDU_LENGTH))
+            with memoryview(pdu) as view:
+                end = handle_request_into(
+                    self.store, view, responses, start + MBAP_HEADER.size
+                )
+            MBAP_HEADER.pack_into(
+                responses, start, transaction_id, 0, end - start - 6, unit_id
+            )
+            del responses[end:]
+
+        return responses, consumed
+
+
+class TcpBenchmarkResult:
+    """
+    Represents the results of a TCP server benchmark.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latency = LatencyStats()
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        return [
+            ("Requests", self.requests),
+            ("Errors", self.errors),
+            ("Elapsed (s)", self.elapsed),
+            ("Rate (req/s)", self.requests / self.elapsed if self.elapsed else 0.0),
+            *latency_rows(self.latency),
+        ]
+
+
+async def benchmark_tcp_server(
+    host: str,
+    port: int,
+    connections: int,
+    requests_per_connection: int,
+    pipeline_depth: int = 1,
+    unit_id: int = 1,
+    start_register: int = 0,
+    num_registers: int = 10,
+) -> TcpBenchmarkResult:
+    """
+    Loads a Modbus TCP server with concurrent clients reading holding registers.
+    :param host: Server host.
+    :param port: Server port.
+    :param connections: Number of concurrent client connections.
+    :param requests_per_connection: Requests sent by each client.
+    :param pipeline_depth: Requests each client keeps in flight.
+    :param unit_id: Unit id used in the requests.
+    :param start_register: First register read.
+    :param num_registers: Number of registers read per request.
+    :return: Benchmark results.
+    """
+    result = TcpBenchmarkResult()
+    pdu = struct.pack(">B H H", 3, start_register, num_registers)
+    response_length = MBAP_HEADER.size + 2 + 2 * num_registers
+
+    async def client() -> None:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            sent = 0
+            while sent < requests_per_connection:
+                batch = min(pipeline_depth, requests_per_connection - sent)
+                frames = bytearray()
+                for transaction_id in range(sent, sent + batch):
+                    frames += MBAP_HEADER.pack(
+                        transaction_id & 0xFFFF, 0, len(pdu) + 1, unit_id
+                    )
+                    frames += pdu
+                sent_at = time.perf_counter()
+                writer.write(frames)
+                await writer.drain()
+                try:
+                    await reader.readexactly(batch * response_length)
+                except asyncio.IncompleteReadError:
+                    result.errors += batch
+                    return
+                latency = time.perf_counter() - sent_at
+                for _ in range(batch):
+                    result.latency.add(latency)
+                result.requests += batch
+                sent += batch
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(client() for _ in range(connections)), return_exceptions=True
+    )
+    result.elapsed = time.perf_counter() - start
+    result.errors += sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+    return result
@@ -0,0 +1,411 @@
+import struct
+from typing import NamedTuple, Sequence
+
+from modbus_utility.physical.modbus_serial import calculate_crc
+
+MAX_RTU_FRAME = 256
+MAX_READ_REGISTERS = 125
+MAX_WRITE_REGISTERS = 123
+MAX_READ_WRITE_REGISTERS = 121
+MAX_READ_BITS = 2000
+MAX_WRITE_BITS = 1968
+
+READ_BITS_FUNCTION_CODES = (1, 2)
+READ_REGISTERS_FUNCTION_CODES = (3, 4)
+WRITE_SINGLE_FUNCTION_CODES = (5, 6)
+COIL_ON = 0xFF00
+
+# function code, starting address, quantity (or value for FC 5/6)
+ADDRESS_QUANTITY = struct.Struct(">B H H")
+# function code, starting address, quantity, byte count
+WRITE_MULTIPLE_HEADER = struct.Struct(">B H H B")
+# function code, read address, read quantity, write address, write quantity, byte count
+READ_WRITE_MULTIPLE_HEADER = struct.Struct(">B H H H H B")
+# function code, byte count
+BYTE_COUNT_HEADER = struct.Struct(">B B")
+# function code | 0x80, exception code
+EXCEPTION_RESPONSE = struct.Struct(">B B")
+CRC = struct.Struct("<H")
+REGISTERS = tuple(struct.Struct(f">{count}H") for count in range(MAX_READ_REGISTERS + 1))
+
+# Bit unpacking table: byte value -> 8 bytes of 0/1, least significant bit first
+UNPACK_BITS = tuple(bytes((value >> bit) & 1 for bit in range(8)) for value in range(256))
+PACK_BITS = {bits: value for value, bits in enumerate(UNPACK_BITS)}
+
+
+class ModbusError(Exception):
+    """
+    Represents an invalid or failed modbus transaction.
+    """
+
+
+class ModbusTimeoutError(ModbusError):
+    """
+    Represents a response that did not arrive, or arrived incomplete, before the timeout.
+    """
+
+
+class ModbusTransportError(ModbusError):
+    """
+    Represents a serial port that failed, no transaction can go through it anymore.
+    """
+
+
+class ModbusCRCError(ModbusError):
+    """
+    Represents a frame with a CRC that does not match its contents.
+    """
+
+
+class ModbusExceptionResponse(ModbusError):
+    """
+    Represents an exception response sent by the slave.
+    """
+
+    def __init__(self, function_code: int, exception_code: int):
+        super().__init__(
+            f"Error response received: {exception_code} for function code {function_code}"
+        )
+        self.function_code = function_code
+        self.exception_code = exception_code
+
+
+class Request(NamedTuple):
+    """
+    Represents a decoded request PDU. data is a view over the values of a write request.
+    """
+
+    function_code: int
+    address: int
+    quantity: int
+    data: memoryview | None = None
+    write_address: int = 0
+    write_quantity: int = 0
+
+
+def pack_bits(bits: Sequence[int]) -> bytes:
+    """
+    Packs a sequence of 0/1 values into modbus bit order, first bit in the LSB of the first byte.
+    :param bits: Bit values.
+    :return: Packed bytes.
+    """
+    bits = bytes(1 if bit else 0 for bit in bits)
+    padding = -len(bits) % 8
+    if padding:
+        bits += bytes(padding)
+    return bytes(PACK_BITS[bits[i : i + 8]] for i in range(0, len(bits), 8))
+
+
+def unpack_bits(packed: bytes | memoryview, count: int) -> bytes:
+    """
+    Unpacks modbus bit fields into one 0/1 byte per bit.
+    :param packed: Packed bytes.
+    :param count: Number of bits to unpack.
+    :return: Bytes with one 0/1 value per bit.
+    """
+    return b"".join([UNPACK_BITS[value] for value in packed])[:count]
+
+
+def encode_read_request(
+    buffer: bytearray, offset: int, function_code: int, address: int, quantity: int
+) -> int:
+    """
+    Encodes a FC 1-4 request, or a FC 5/6 request with quantity as the value.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param function_code: Function code.
+    :param address: Starting address.
+    :param quantity: Number of items to read, or value to write.
+    :return: Position after the PDU.
+    """
+    ADDRESS_QUANTITY.pack_into(buffer, offset, function_code, address, quantity)
+    return offset + ADDRESS_QUANTITY.size
+
+
+def encode_write_single(
+    buffer: bytearray, offset: int, function_code: int, address: int, value: int
+) -> int:
+    """
+    Encodes a FC 5 (value 0xFF00 or 0) or FC 6 request, also used for their responses.
+    """
+    return encode_read_request(buffer, offset, function_code, address, value)
+
+
+def encode_write_registers(
+    buffer: bytearray, offset: int, address: int, values: Sequence[int]
+) -> int:
+    """
+    Encodes a FC 16 request.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param address: Starting register.
+    :param values: Register values.
+    :return: Position after the PDU.
+    """
+    count = len(values)
+    WRITE_MULTIPLE_HEADER.pack_into(buffer, offset, 16, address, count, 2 * count)
+    offset += WRITE_MULTIPLE_HEADER.size
+    REGISTERS[count].pack_into(buffer, offset, *values)
+    return offset + 2 * count
+
+
+def encode_write_coils(
+    buffer: bytearray, offset: int, address: int, packed: bytes, count: int
+) -> int:
+    """
+    Encodes a FC 15 request.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param address: Starting coil.
+    :param packed: Packed coil values.
+    :param count: Number of coils.
+    :return: Position after the PDU.
+    """
+    WRITE_MULTIPLE_HEADER.pack_into(buffer, offset, 15, address, count, len(packed))
+    offset += WRITE_MULTIPLE_HEADER.size
+    buffer[offset : offset + len(packed)] = packed
+    return offset + len(packed)
+
+
+def encode_read_write_registers(
+    buffer: bytearray,
+    offset: int,
+    read_address: int,
+    read_count: int,
+    write_address: int,
+    values: Sequence[int],
+) -> int:
+    """
+    Encodes a FC 23 request.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param read_address: Starting register to read.
+    :param read_count: Number of registers to read.
+    :param write_address: Starting register to write.
+    :param values: Register values to write.
+    :return: Position after the PDU.
+    """
+    count = len(values)
+    READ_WRITE_MULTIPLE_HEADER.pack_into(
+        buffer, offset, 23, read_address, read_count, write_address, count, 2 * count
+    )
+    offset += READ_WRITE_MULTIPLE_HEADER.size
+    REGISTERS[count].pack_into(buffer, offset, *values)
+    return offset + 2 * count
+
+
+def encode_registers_response(
+    buffer: bytearray, offset: int, function_code: int, values: Sequence[int]
+) -> int:
+    """
+    Encodes a FC 3, 4 or 23 response.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param function_code: Function code.
+    :param values: Register values.
+    :return: Position after the PDU.
+    """
+    count = len(values)
+    BYTE_COUNT_HEADER.pack_into(buffer, offset, function_code, 2 * count)
+    offset += BYTE_COUNT_HEADER.size
+    REGISTERS[count].pack_into(buffer, offset, *values)
+    return offset + 2 * count
+
+
+def encode_bits_response(
+    buffer: bytearray, offset: int, function_code: int, packed: bytes
+) -> int:
+    """
+    Encodes a FC 1 or 2 response.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param function_code: Function code.
+    :param packed: Packed bit values.
+    :return: Position after the PDU.
+    """
+    BYTE_COUNT_HEADER.pack_into(buffer, offset, function_code, len(packed))
+    offset += BYTE_COUNT_HEADER.size
+    buffer[offset : offset + len(packed)] = packed
+    return offset + len(packed)
+
+
+def encode_exception(
+    buffer: bytearray, offset: int, function_code: int, exception_code: int
+) -> int:
+    """
+    Encodes an exception response.
+    :param buffer: Buffer to encode into.
+    :param offset: Position of the PDU in the buffer.
+    :param function_code: Function code of the request.
+    :param exception_code: Exception code.
+    :return: Position after the PDU.
+    """
+    EXCEPTION_RESPONSE.pack_into(buffer, offset, function_code | 0x80, exception_code)
+    return offset + EXCEPTION_RESPONSE.size
+
+
+def finish_rtu_frame(buffer: bytearray, length: int) -> int:
+    """
+    Appends the CRC to an RTU frame, the slave address is expected at position 0.
+    :param buffer: Buffer holding the frame.
+    :param length: Length of the frame without CRC.
+    :return: Length of the frame with CRC.
+    """
+    with memoryview(buffer) as view:
+        crc = calculate_crc(view[:length])
+    CRC.pack_into(buffer, length, crc)
+    return length + CRC.size
+
+
+def verify_crc(frame: bytes | memoryview) -> bool:
+    """
+    Checks the CRC at the end of an RTU frame.
+    :param frame: Frame to check, CRC included.
+    :return: True if the CRC matches.
+    """
+    if len(frame) < 4:
+        return False
+    return calculate_crc(frame[:-2]) == CRC.unpack_from(frame, len(frame) - 2)[0]
+
+
+def rtu_pdu(frame: bytes | memoryview) -> memoryview:
+    """
+    Validates an RTU frame and returns its PDU.
+    :param frame: Frame received, CRC included.
+    :return: View over the PDU of the frame.
+    """
+    if not verify_crc(frame):
+        raise ModbusCRCError("CRC error in frame")
+    return memoryview(frame)[1:-2]
+
+
+def raise_for_exception(pdu: memoryview) -> None:
+    """
+    Raises ModbusExceptionResponse if a response PDU is an exception.
+    :param pdu: Response PDU.
+    :return: None
+    """
+    if pdu[0] & 0x80:
+        function_code, exception_code = EXCEPTION_RESPONSE.unpack_from(pdu)
+        raise ModbusExceptionResponse(function_code & 0x7F, exception_code)
+
+
+def decode_request(pdu: memoryview) -> Request:
+    """
+    Decodes a request PDU.
+    :param pdu: Request PDU.
+    :return: Request tuple.
+    """
+    function_code = pdu[0]
+    if function_code in (1, 2, 3, 4, 5, 6):
+        if len(pdu) != ADDRESS_QUANTITY.size:
+            raise ModbusError("Invalid request length")
+        return Request(*ADDRESS_QUANTITY.unpack_from(pdu))
+    if function_code in (15, 16):
+        if len(pdu) < WRITE_MULTIPLE_HEADER.size:
+            raise ModbusError("Invalid request length")
+        _, address, quantity, byte_count = WRITE_MULTIPLE_HEADER.unpack_from(pdu)
+        if len(pdu) != WRITE_MULTIPLE_HEADER.size + byte_count:
+            raise ModbusError("Invalid request length")
+        return Request(
+            function_code, address, quantity, pdu[WRITE_MULTIPLE_HEADER.size :]
+        )
+    if function_code == 23:
+        if len(pdu) < READ_WRITE_MULTIPLE_HEADER.size:
+            raise ModbusError("Invalid request length")
+        _, address, quantity, write_address, write_quantity, byte_count = (
+            READ_WRITE_MULTIPLE_HEADER.unpack_from(pdu)
+        )
+        if len(pdu) != READ_WRITE_MULTIPLE_HEADER.size + byte_count:
+            raise ModbusError("Invalid request length")
+        return Request(
+            function_code,
+            address,
+            quantity,
+            pdu[READ_WRITE_MULTIPLE_HEADER.size :],
+            write_address,
+            write_quantity,
+        )
+    return Request(function_code, 0, 0)
+
+
+def decode_registers(data: memoryview, count: int) -> tuple[int, ...]:
+    """
+    Decodes big-endian register values.
+    :param data: View over the register bytes.
+    :param count: Number of registers.
+    :return: Tuple of register values.
+    """
+    if len(data) < 2 * count:
+        raise ModbusError("Not enough register data")
+    if count <= MAX_READ_REGISTERS:
+        return REGISTERS[count].unpack_from(data)
+    return struct.unpack_from(f">{count}H", data)
+
+
+def decode_registers_response(pdu: memoryview, count: int) -> tuple[int, ...]:
+    """
+    Decodes a FC 3, 4 or 23 response.
+    :param pdu: Response PDU.
+    :param count: Number of registers requested.
+    :return: Tuple of register values.
+    """
+    raise_for_exception(pdu)
+    _, byte_count = BYTE_COUNT_HEADER.unpack_from(pdu)
+    if byte_count != 2 * count:
+        raise ModbusError(f"Unexpected byte count received: {byte_count}")
+    return decode_registers(pdu[BYTE_COUNT_HEADER.size :], count)
+
+
+def decode_bits_response(pdu: memoryview, count: int) -> memoryview:
+    """
+    Decodes a FC 1 or 2 response, keeping the bits packed.
+    :param pdu: Response PDU.
+    :param count: Number of bits requested.
+    :return: View over the packed bits.
+    """
+    raise_for_exception(pdu)
+    _, byte_count = BYTE_COUNT_HEADER.unpack_from(pdu)
+    if byte_count != (count + 7) // 8:
+        raise ModbusError(f"Unexpected byte count received: {byte_count}")
+    return pdu[BYTE_COUNT_HEADER.size : BYTE_COUNT_HEADER.size + byte_count]
+
+
+def decode_write_response(pdu: memoryview) -> tuple[int, int, int]:
+    """
+    Decodes a FC 5, 6, 15 or 16 response.
+    :param pdu: Response PDU.
+    :return: Tuple of function code, address and value (FC 5/6) or quantity (FC 15/16).
+    """
+    raise_for_exception(pdu)
+    if len(pdu) < ADDRESS_QUANTITY.size:
+        raise ModbusError("Incomplete response received")
+    return ADDRESS_QUANTITY.unpack_from(pdu)
+
+
+def rtu_response_length(function_code: int, quantity: int) -> int:
+    """
+    Calculates the length of the RTU response to a request.
+    :param function_code: Function code of the request.
+    :param quantity: Number of items requested.
+    :return: Length of the response frame, CRC included.
+    """
+    if function_code in READ_BITS_FUNCTION_CODES:
+        return 5 + (quantity + 7) // 8
+    if function_code in READ_REGISTERS_FUNCTION_CODES or function_code == 23:
+        return 5 + 2 * quantity
+    return 8
+
+
+def split_range(start: int, count: int, max_count: int) -> list[tuple[int, int]]:
+    """
+    Splits an address range into the requests needed to transfer it.
+    :param start: Starting address.
+    :param count: Number of items.
+    :param max_count: Maximum number of items per request.
+    :return: List of (start, count) requests.
+    """
+    return [
+        (start + offset, min(max_count, count - offset))
+        for offset in range(0, count, max_count)
+    ]
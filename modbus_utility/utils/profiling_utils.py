@@ -0,0 +1,162 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+from rich.console import Console
+
+from modbus_utility.utils.console_utils import (
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.stats_utils import LatencyStats
+
+console = Console()
+
+# Order used to display the phases of a transaction
+PHASES = (
+    "pack",
+    "write",
+    "sleep",
+    "read",
+    "decode",
+    "render",
+)
+
+
+class TransactionProfiler:
+    """
+    Collects per-phase timings of modbus transactions.
+
+    Instrumented code checks `enabled` before taking any timestamp, so a disabled
+    profiler costs a single attribute lookup per phase.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.phases: dict[str, LatencyStats] = {}
+        self.cpu_profile: cProfile.Profile | None = None
+        self.trace_memory = False
+        self.started = 0.0
+
+    def start(self, cpu: bool = False, memory: bool = False) -> None:
+        """
+        Enables the profiler.
+        :param cpu: Also profile the whole command with cProfile.
+        :param memory: Also trace the memory allocations of the whole command.
+        :return: None
+        """
+        self.enabled = True
+        self.started = time.perf_counter()
+        if memory:
+            self.trace_memory = True
+            tracemalloc.start()
+        if cpu:
+            self.cpu_profile = cProfile.Profile()
+            self.cpu_profile.enable()
+
+    def lap(self, phase: str, started: float) -> float:
+        """
+        Records the time spent on a phase.
+        :param phase: Name of the phase.
+        :param started: perf_counter value when the phase started.
+        :return: perf_counter value now, to be used as the start of the next phase.
+        """
+        now = time.perf_counter()
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = LatencyStats()
+        stats.add(now - started)
+        return now
+
+    @contextlib.contextmanager
+    def measure(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.lap(phase, started)
+
+    def phase(self, phase: str):
+        """
+        Context manager that records the time spent inside it.
+        :param phase: Name of the phase.
+        :return: Context manager, a no-op one when the profiler is disabled.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.measure(phase)
+
+    def report(self) -> None:
+        """
+        Prints the per-phase breakdown and the optional cProfile/tracemalloc reports.
+        :return: None
+        """
+        if not self.enabled:
+            return
+        if self.cpu_profile is not None:
+            self.cpu_profile.disable()
+        elapsed = time.perf_counter() - self.started
+
+        console.print("[bold magenta]Transaction phase breakdown:")
+        names = [name for name in PHASES if name in self.phases]
+        names += [name for name in self.phases if name not in PHASES]
+        console.print(
+            generate_table(
+                [
+                    TextElement(
+                        value="PHASE", format=TextFormat(color=TextColors.BLUE, bold=True)
+                    ),
+                    TextElement(value="COUNT"),
+                    TextElement(value="TOTAL (ms)"),
+                    TextElement(value="MEAN (ms)"),
+                    TextElement(value="P95 (ms)"),
+                    TextElement(value="MAX (ms)"),
+                    TextElement(value="SHARE"),
+                ],
+                [
+                    [
+                        TextElement(
+                            value=name,
+                            format=TextFormat(color=TextColors.BLUE, bold=True),
+                        ),
+                        TextElement(value=stats.count),
+                        TextElement(value=f"{sum(stats.samples) * 1000:.3f}"),
+                        TextElement(value=f"{stats.mean() * 1000:.3f}"),
+                        TextElement(value=f"{stats.percentile(95) * 1000:.3f}"),
+                        TextElement(value=f"{stats.maximum() * 1000:.3f}"),
+                        TextElement(
+                            value=f"{sum(stats.samples) / elapsed:.1%}",
+                            format=TextFormat(color=TextColors.GREEN),
+                        ),
+                    ]
+                    for name, stats in ((name, self.phases[name]) for name in names)
+                ],
+            )
+        )
+        console.print(f"Command wall time: {elapsed * 1000:.3f} ms")
+
+        if self.cpu_profile is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.cpu_profile, stream=stream).sort_stats(
+                "cumulative"
+            ).print_stats(25)
+            console.print("[bold magenta]cProfile report:")
+            console.print(stream.getvalue(), markup=False, highlight=False)
+
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            console.print("[bold magenta]tracemalloc report:")
+            console.print(f"Current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB")
+            for stat in snapshot.statistics("lineno")[:15]:
+                console.print(str(stat), markup=False, highlight=False)
+
+
+# Process-wide profiler, enabled by the global --profile option
+profiler = TransactionProfiler()
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Callable, Sequence
+
+# Read function code whose cached values are made stale by each write function code
+WRITE_INVALIDATES = {5: 1, 6: 3, 15: 1, 16: 3, 23: 3}
+
+
+class CacheStats:
+    """
+    Represents the hit/miss counters of a RegisterCache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.fetched_registers = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.partial_hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        """
+        Generates the rows used to display the statistics.
+        :return: List of (name, value) tuples.
+        """
+        return [
+            ("Cache hits", self.hits),
+            ("Cache partial hits", self.partial_hits),
+            ("Cache misses", self.misses),
+            ("Cache hit rate", self.hit_rate),
+            ("Registers fetched", self.fetched_registers),
+            ("Cache evictions", self.evictions),
+            ("Cache invalidations", self.invalidations),
+        ]
+
+
+class RegisterCache:
+    """
+    TTL read-through cache of register values.
+
+    Entries are kept per register, keyed by (port, slave, function code, address), so a
+    lookup that partially overlaps cached data only fetches the missing registers. The
+    least recently used entries are evicted once max_entries is reached. The cache lives
+    in memory, so it is only shared by the masters of one process that are given the same
+    instance, never across separate command invocations.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = 1.0,
+        max_entries: int = 65536,
+        range_ttls: list[tuple[int, int, float]] | None = None,
+    ):
+        """
+        Creates a RegisterCache object.
+        :param default_ttl: Seconds a value stays valid when no range TTL applies.
+        :param max_entries: Maximum number of registers kept in the cache.
+        :param range_ttls: List of (first register, last register, ttl) overrides, the first match wins.
+        """
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.range_ttls = range_ttls or []
+        self.entries: OrderedDict[tuple[str, int, int, int], tuple[int, float]] = (
+            OrderedDict()
+        )
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+
+    def ttl_for(self, address: int) -> float:
+        """
+        Gets the TTL that applies to a register.
+        :param address: Register address.
+        :return: TTL in seconds.
+        """
+        for first, last, ttl in self.range_ttls:
+            if first <= address <= last:
+                return ttl
+        return self.default_ttl
+
+    def lookup(
+        self,
+        port: str,
+        slave: int,
+        function_code: int,
+        start: int,
+        count: int,
+        now: float | None = None,
+    ) -> list[int | None]:
+        """
+        Gets the cached values of a register range.
+        :param port: Serial port of the bus.
+        :param slave: Slave address.
+        :param function_code: Read function code.
+        :param start: Starting register.
+        :param count: Number of registers.
+        :param now: Monotonic time of the lookup, defaults to now.
+        :return: List of values, None for the registers that are missing or expired.
+        """
+        now = time.monotonic() if now is None else now
+        values: list[int | None] = []
+        with self.lock:
+            for address in range(start, start + count):
+                key = (port, slave, function_code, address)
+                entry = self.entries.get(key)
+                if entry is None:
+                    values.append(None)
+                elif entry[1] <= now:
+                    del self.entries[key]
+                    values.append(None)
+                else:
+                    self.entries.move_to_end(key)
+                    values.append(entry[0])
+        return values
+
+    def store(
+        self,
+        port: str,
+        slave: int,
+        function_code: int,
+        start: int,
+        values: Sequence[int],
+        now: float | None = None,
+    ) -> None:
+        """
+        Stores the values of a register range.
+        :param port: Serial port of the bus.
+        :param slave: Slave address.
+        :param function_code: Read function code.
+        :param start: Starting register.
+        :param values: Register values read from the device.
+        :param now: Monotonic time the values were read, defaults to now.
+        :return: None
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            for offset, value in enumerate(values):
+                address = start + offset
+                key = (port, slave, function_code, address)
+                self.entries[key] = (value, now + self.ttl_for(address))
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(
+        self, port: str, slave: int, write_function_code: int, start: int, count: int
+    ) -> None:
+        """
+        Drops the cached values made stale by a write.
+        :param port: Serial port of the bus.
+        :param slave: Slave address.
+        :param write_function_code: Function code of the write.
+        :param start: First register written.
+        :param count: Number of registers written.
+        :return: None
+        """
+        function_code = WRITE_INVALIDATES.get(write_function_code)
+        if function_code is None:
+            return
+        with self.lock:
+            for address in range(start, start + count):
+                if self.entries.pop((port, slave, function_code, address), None):
+                    self.stats.invalidations += 1
+
+    def read_through(
+        self,
+        port: str,
+        slave: int,
+        function_code: int,
+        start: int,
+        count: int,
+        fetch: Callable[[int, int], Sequence[int]],
+    ) -> tuple[int, ...]:
+        """
+        Reads a register range from the cache, fetching only the missing registers.
+        :param port: Serial port of the bus.
+        :param slave: Slave address.
+        :param function_code: Read function code.
+        :param start: Starting register.
+        :param count: Number of registers.
+        :param fetch: Function called with (start, count) to read a missing range from the device.
+        :return: Tuple of register values ordered from the starting register.
+        """
+        values = self.lookup(port, slave, function_code, start, count)
+        missing = missing_ranges(start, values)
+        with self.lock:
+            if not missing:
+                self.stats.hits += 1
+            elif len(missing) == 1 and missing[0] == (start, count):
+                self.stats.misses += 1
+            else:
+                self.stats.partial_hits += 1
+        if not missing:
+            return tuple(values)
+
+        for missing_start, missing_count in missing:
+            fetched = fetch(missing_start, missing_count)
+            self.store(port, slave, function_code, missing_start, fetched)
+            with self.lock:
+                self.stats.fetched_registers += missing_count
+            offset = missing_start - start
+            values[offset : offset + missing_count] = fetched
+
+        return tuple(values)
+
+
+def parse_range_ttls(definitions: list[str]) -> list[tuple[int, int, float]]:
+    """
+    Parses TTL overrides in the FIRST-LAST=TTL or REGISTER=TTL format.
+    :param definitions: List of TTL overrides.
+    :return: List of (first register, last register, ttl) tuples.
+    """
+    parsed = []
+    for definition in definitions:
+        registers, _, ttl = definition.partition("=")
+        first, _, last = registers.partition("-")
+        try:
+            parsed.append((int(first, 0), int(last or first, 0), float(ttl)))
+        except ValueError:
+            raise ValueError(f"Invalid cache TTL definition: {definition}")
+    return parsed
+
+
+def missing_ranges(start: int, values: list[int | None]) -> list[tuple[int, int]]:
+    """
+    Finds the contiguous runs of missing values in a lookup result.
+    :param start: Starting register of the lookup.
+    :param values: Lookup result.
+    :return: List of (start, count) ranges to fetch.
+    """
+    ranges = []
+    run_start = None
+    for offset, value in enumerate(values):
+        if value is None:
+            if run_start is None:
+                run_start = offset
+        elif run_start is not None:
+            ranges.append((start + run_start, offset - run_start))
+            run_start = None
+    if run_start is not None:
+        ranges.append((start + run_start, len(values) - run_start))
+    return ranges
@@ -0,0 +1,140 @@
+from array import array
+import threading
+from typing import Sequence
+
+NUM_ADDRESSES = 65536
+# Number of addresses sharing a generation counter
+GENERATION_BLOCK = 64
+TABLES = ("holding_registers", "input_registers", "coils", "discrete_inputs")
+
+
+class RegisterStore:
+    """
+    Represents the data model served by the slave simulator: holding registers, input
+    registers, coils and discrete inputs. The same store can be shared by every front-end
+    (RTU, TCP) of a simulated device.
+
+    Every write stamps the blocks of GENERATION_BLOCK addresses it touches with a new
+    generation, so derived data such as encoded responses can tell whether the range it
+    was built from changed since.
+    """
+
+    def __init__(
+        self, num_addresses: int = NUM_ADDRESSES, buffer: memoryview | None = None
+    ):
+        """
+        Creates a RegisterStore object.
+        :param num_addresses: Number of addresses of each table.
+        :param buffer: Buffer of 4 * num_addresses bytes to keep the holding and input registers in, e.g. shared memory.
+        """
+        self.num_addresses = num_addresses
+        if buffer is None:
+            self.holding_registers = array("H", bytes(2 * num_addresses))
+            self.input_registers = array("H", bytes(2 * num_addresses))
+        else:
+            self.holding_registers = buffer[: 2 * num_addresses].cast("H")
+            self.input_registers = buffer[2 * num_addresses : 4 * num_addresses].cast("H")
+        self.coils = bytearray(num_addresses)
+        self.discrete_inputs = bytearray(num_addresses)
+        self.lock = threading.Lock()
+        # Registers in an external buffer can be changed by other processes without a write
+        self.tracks_writes = buffer is None
+        self.generation = 0
+        num_blocks = (num_addresses + GENERATION_BLOCK - 1) // GENERATION_BLOCK
+        self.generations = {
+            table: array("Q", bytes(8 * num_blocks)) for table in TABLES
+        }
+
+    def in_range(self, start: int, count: int) -> bool:
+        """
+        Checks that a block of addresses fits in the data model.
+        :param start: Starting address.
+        :param count: Number of addresses.
+        :return: True if the whole block is addressable.
+        """
+        return count > 0 and 0 <= start and start + count <= self.num_addresses
+
+    def mark_written(self, table: str, start: int, count: int) -> None:
+        """
+        Stamps the blocks of a written range with a new generation, called with the lock held.
+        :param table: Name of the table written.
+        :param start: First address written.
+        :param count: Number of addresses written.
+        :return: None
+        """
+        if count <= 0:
+            return
+        self.generation += 1
+        first = start // GENERATION_BLOCK
+        last = (start + count - 1) // GENERATION_BLOCK
+        self.generations[table][first : last + 1] = array(
+            "Q", [self.generation] * (last - first + 1)
+        )
+
+    def changed_since(self, table: str, start: int, count: int, generation: int) -> bool:
+        """
+        Checks if a range was written after a generation.
+        :param table: Name of the table.
+        :param start: Starting address.
+        :param count: Number of addresses.
+        :param generation: Store generation to compare with.
+        :return: True if any block of the range has a newer generation.
+        """
+        if not self.tracks_writes:
+            return True
+        if count <= 0:
+            return False
+        first = start // GENERATION_BLOCK
+        last = (start + count - 1) // GENERATION_BLOCK
+        return max(self.generations[table][first : last + 1]) > generation
+
+    def read_holding_registers(self, start: int, count: int) -> array:
+        with self.lock:
+            return self.holding_registers[start : start + count]
+
+    def read_input_registers(self, start: int, count: int) -> array:
+        with self.lock:
+            return self.input_registers[start : start + count]
+
+    def read_coils(self, start: int, count: int) -> bytearray:
+        with self.lock:
+            return self.coils[start : start + count]
+
+    def read_discrete_inputs(self, start: int, count: int) -> bytearray:
+        with self.lock:
+            return self.discrete_inputs[start : start + count]
+
+    def write_holding_registers(self, start: int, values: Sequence[int]) -> None:
+        with self.lock:
+            self.holding_registers[start : start + len(values)] = array("H", values)
+            self.mark_written("holding_registers", start, len(values))
+
+    def write_input_registers(self, start: int, values: Sequence[int]) -> None:
+        with self.lock:
+            self.input_registers[start : start + len(values)] = array("H", values)
+            self.mark_written("input_registers", start, len(values))
+
+    def write_coils(self, start: int, values: Sequence[int]) -> None:
+        with self.lock:
+            self.coils[start : start + len(values)] = bytes(
+                1 if value else 0 for value in values
+            )
+            self.mark_written("coils", start, len(values))
+
+    def write_discrete_inputs(self, start: int, values: Sequence[int]) -> None:
+        with self.lock:
+            self.discrete_inputs[start : start + len(values)] = bytes(
+                1 if value else 0 for value in values
+            )
+            self.mark_written("discrete_inputs", start, len(values))
+
+
+def create_default_store() -> RegisterStore:
+    """
+    Creates the store used by the simulator when no other data is provided.
+    :return: RegisterStore object.
+    """
+    store = RegisterStore()
+    # Value the simulator has always answered with for the first holding registers
+    store.write_holding_registers(0, [0x45EA, 0x3200])
+    return store
@@ -0,0 +1,175 @@
+import logging
+import time
+
+import serial
+
+from modbus_utility.physical.modbus_serial import read_frame
+from modbus_utility.utils.capture_utils import iter_transactions
+from modbus_utility.utils.stats_utils import LatencyStats, latency_rows
+
+
+class ReplayClock:
+    """
+    Represents the schedule used to re-issue captured frames.
+    """
+
+    def __init__(self, speed: float):
+        """
+        Creates a ReplayClock object.
+        :param speed: 1.0 keeps the original timing, 10.0 replays ten times faster and 0 replays as fast as possible.
+        """
+        self.speed = speed
+        self.capture_start: float | None = None
+        self.replay_start = 0.0
+
+    def wait_for(self, capture_timestamp: float) -> None:
+        """
+        Sleeps until the moment a captured frame must be re-issued.
+        :param capture_timestamp: Timestamp of the frame in the capture.
+        :return: None
+        """
+        if self.capture_start is None:
+            self.capture_start = capture_timestamp
+            self.replay_start = time.monotonic()
+            return
+        if self.speed <= 0:
+            return
+        target = self.replay_start + (capture_timestamp - self.capture_start) / self.speed
+        delay = target - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def scale(self, delay: float) -> float:
+        """
+        Scales a captured delay to the replay speed.
+        :param delay: Captured delay in seconds.
+        :return: Delay to apply during the replay.
+        """
+        return 0.0 if self.speed <= 0 else delay / self.speed
+
+
+class ReplayReport:
+    """
+    Represents the results of a replay run.
+    """
+
+    def __init__(self):
+        self.transactions = 0
+        self.mismatches = 0
+        self.timeouts = 0
+        self.unknown_requests = 0
+        self.latency = LatencyStats()
+        self.start = time.monotonic()
+        self.end = self.start
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.end - self.start
+        return self.transactions / elapsed if elapsed > 0 else 0.0
+
+    def rows(self) -> list[tuple[str, str | int | float]]:
+        """
+        Generates the rows used to display the report.
+        :return: List of (name, value) tuples.
+        """
+        return [
+            ("Transactions", self.transactions),
+            ("Elapsed (s)", self.end - self.start),
+            ("Rate (tx/s)", self.rate),
+            ("Mismatches", self.mismatches),
+            ("Timeouts", self.timeouts),
+            ("Unknown requests", self.unknown_requests),
+            *latency_rows(self.latency),
+        ]
+
+
+def replay_against_slave(
+    ser: serial.Serial, capture_file: str, speed: float, limit: int | None = None
+) -> ReplayReport:
+    """
+    Re-issues the captured requests to a slave and compares its replies with the captured ones.
+    :param ser: Serial object connected to the slave bus.
+    :param capture_file: Path to the capture file.
+    :param speed: Replay speed, see ReplayClock.
+    :param limit: Maximum number of transactions to replay, None replays the whole capture.
+    :return: Report of the run.
+    """
+    clock = ReplayClock(speed)
+    report = ReplayReport()
+    for transaction in iter_transactions(capture_file):
+        if limit is not None and report.transactions >= limit:
+            break
+        clock.wait_for(transaction.timestamp)
+        ser.reset_input_buffer()
+        sent_at = time.perf_counter()
+        ser.write(transaction.request)
+        report.transactions += 1
+        if transaction.response is None:
+            continue
+
+        response = ser.read(len(transaction.response))
+        if not response:
+            report.timeouts += 1
+            continue
+        report.latency.add(time.perf_counter() - sent_at)
+        if response != transaction.response:
+            report.mismatches += 1
+            logging.info(
+                f"Replay mismatch for request {transaction.request.hex()}: "
+                f"expected {transaction.response.hex()}, got {response.hex()}"
+            )
+
+    report.end = time.monotonic()
+    return report
+
+
+def serve_capture(
+    ser: serial.Serial,
+    capture_file: str,
+    speed: float,
+    gap: float,
+    limit: int | None = None,
+) -> ReplayReport:
+    """
+    Acts as the captured slave, answering each incoming request with the response
+    captured for the same request bytes.
+    :param ser: Serial object connected to the master bus.
+    :param capture_file: Path to the capture file.
+    :param speed: Replay speed applied to the captured response delays, see ReplayClock.
+    :param gap: Silent interval that delimits incoming frames, in seconds.
+    :param limit: Number of requests to answer before stopping, None serves until interrupted.
+    :return: Report of the run.
+    """
+    clock = ReplayClock(speed)
+    # Only the distinct requests are kept, the capture itself is streamed
+    canned: dict[bytes, tuple[bytes, float]] = {}
+    for transaction in iter_transactions(capture_file):
+        if transaction.response is not None:
+            canned[transaction.request] = (
+                transaction.response,
+                transaction.response_delay,
+            )
+
+    report = ReplayReport()
+    try:
+        while limit is None or report.transactions < limit:
+            request = read_frame(ser, gap)
+            if not request:
+                continue
+            received_at = time.perf_counter()
+            report.transactions += 1
+            entry = canned.get(request)
+            if entry is None:
+                report.unknown_requests += 1
+                continue
+            response, delay = entry
+            delay = clock.scale(delay)
+            if delay > 0:
+                time.sleep(delay)
+            ser.write(response)
+            report.latency.add(time.perf_counter() - received_at)
+    except KeyboardInterrupt:
+        pass
+
+    report.end = time.monotonic()
+    return report
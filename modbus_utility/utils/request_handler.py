@@ -0,0 +1,176 @@
+from modbus_utility.utils.pdu_codec import (
+    COIL_ON,
+    decode_registers,
+    decode_request,
+    encode_bits_response,
+    encode_exception,
+    encode_registers_response,
+    encode_write_single,
+    MAX_READ_BITS,
+    MAX_READ_REGISTERS,
+    MAX_READ_WRITE_REGISTERS,
+    MAX_RTU_FRAME,
+    MAX_WRITE_BITS,
+    MAX_WRITE_REGISTERS,
+    ModbusError,
+    pack_bits,
+    unpack_bits,
+)
+from modbus_utility.utils.register_store import RegisterStore
+
+
+class ExceptionCode:
+    """
+    Represents the modbus exception codes returned by the slave.
+    """
+
+    illegal_function = 1
+    illegal_data_address = 2
+    illegal_data_value = 3
+    gateway_path_unavailable = 10
+    gateway_target_failed = 11
+
+
+def exception_response(function_code: int, exception_code: int) -> bytes:
+    """
+    Builds an exception response PDU.
+    :param function_code: Function code of the request.
+    :param exception_code: ExceptionCode to return.
+    :return: Response PDU.
+    """
+    buffer = bytearray(2)
+    encode_exception(buffer, 0, function_code, exception_code)
+    return bytes(buffer)
+
+
+def handle_request_into(
+    store: RegisterStore, pdu: memoryview, buffer: bytearray, offset: int
+) -> int:
+    """
+    Executes a request PDU against a register store, encoding the response into a buffer.
+    The PDU is the frame without the address and CRC (RTU) or MBAP header (TCP), so every
+    front-end can share this logic.
+    :param store: Register store to serve the request from.
+    :param pdu: Request PDU, starting with the function code.
+    :param buffer: Buffer to encode the response PDU into.
+    :param offset: Position of the response PDU in the buffer.
+    :return: Position after the response PDU.
+    """
+    function_code = pdu[0]
+    try:
+        request = decode_request(pdu)
+    except ModbusError:
+        return encode_exception(
+            buffer, offset, function_code, ExceptionCode.illegal_data_value
+        )
+
+    address = request.address
+    quantity = request.quantity
+    match function_code:
+        case 1 | 2:
+            if not 1 <= quantity <= MAX_READ_BITS:
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_value
+                )
+            if not store.in_range(address, quantity):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_address
+                )
+            if function_code == 1:
+                bits = store.read_coils(address, quantity)
+            else:
+                bits = store.read_discrete_inputs(address, quantity)
+            return encode_bits_response(buffer, offset, function_code, pack_bits(bits))
+        case 3 | 4:
+            if not 1 <= quantity <= MAX_READ_REGISTERS:
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_value
+                )
+            if not store.in_range(address, quantity):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_address
+                )
+            if function_code == 3:
+                values = store.read_holding_registers(address, quantity)
+            else:
+                values = store.read_input_registers(address, quantity)
+            return encode_registers_response(buffer, offset, function_code, values)
+        case 5 | 6:
+            if not store.in_range(address, 1):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_address
+                )
+            if function_code == 5:
+                if quantity not in (0, COIL_ON):
+                    return encode_exception(
+                        buffer, offset, function_code, ExceptionCode.illegal_data_value
+                    )
+                store.write_coils(address, [quantity == COIL_ON])
+            else:
+                store.write_holding_registers(address, [quantity])
+            return encode_write_single(buffer, offset, function_code, address, quantity)
+        case 15 | 16:
+            if function_code == 15:
+                valid = (
+                    1 <= quantity <= MAX_WRITE_BITS
+                    and len(request.data) == (quantity + 7) // 8
+                )
+            else:
+                valid = (
+                    1 <= quantity <= MAX_WRITE_REGISTERS
+                    and len(request.data) == 2 * quantity
+                )
+            if not valid:
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_value
+                )
+            if not store.in_range(address, quantity):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_address
+                )
+            if function_code == 15:
+                store.write_coils(address, unpack_bits(request.data, quantity))
+            else:
+                store.write_holding_registers(
+                    address, decode_registers(request.data, quantity)
+                )
+            return encode_write_single(buffer, offset, function_code, address, quantity)
+        case 23:
+            write_quantity = request.write_quantity
+            if (
+                not 1 <= quantity <= MAX_READ_WRITE_REGISTERS
+                or not 1 <= write_quantity <= MAX_READ_WRITE_REGISTERS
+                or len(request.data) != 2 * write_quantity
+            ):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_value
+                )
+            if not store.in_range(address, quantity) or not store.in_range(
+                request.write_address, write_quantity
+            ):
+                return encode_exception(
+                    buffer, offset, function_code, ExceptionCode.illegal_data_address
+                )
+            # The write is performed before the read
+            store.write_holding_registers(
+                request.write_address, decode_registers(request.data, write_quantity)
+            )
+            values = store.read_holding_registers(address, quantity)
+            return encode_registers_response(buffer, offset, function_code, values)
+        case _:
+            return encode_exception(
+                buffer, offset, function_code, ExceptionCode.illegal_function
+            )
+
+
+def handle_request(store: RegisterStore, pdu: bytes | memoryview) -> bytes:
+    """
+    Executes a request PDU against a register store.
+    :param store: Register store to serve the request from.
+    :param pdu: Request PDU, starting with the function code.
+    :return: Response PDU.
+    """
+    buffer = bytearray(MAX_RTU_FRAME)
+    with memoryview(pdu) as view:
+        length = handle_request_into(store, view, buffer, 0)
+    return bytes(buffer[:length])
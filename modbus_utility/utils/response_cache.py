@@ -0,0 +1,148 @@
+from typing import NamedTuple
+
+from modbus_utility.utils.register_store import RegisterStore
+
+# Table read by each cacheable function code
+READ_TABLES = {
+    1: "coils",
+    2: "discrete_inputs",
+    3: "holding_registers",
+    4: "input_registers",
+}
+
+
+class CachedResponse(NamedTuple):
+    """
+    Represents an encoded response frame and the store range it was built from.
+    """
+
+    frame: bytes
+    table: str
+    start: int
+    count: int
+    generation: int
+
+
+class ResponseCacheStats:
+    """
+    Represents the counters of a ResponseCache, including the time spent answering hits and
+    misses so the saving can be reported.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+
+    def merge(self, other: "ResponseCacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.stale += other.stale
+        self.evictions += other.evictions
+        self.hit_time += other.hit_time
+        self.miss_time += other.miss_time
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def speedup(self) -> float:
+        """
+        Ratio between the mean time to answer a miss and a hit.
+        """
+        if not self.hits or not self.misses or not self.hit_time:
+            return 0.0
+        return (self.miss_time / self.misses) / (self.hit_time / self.hits)
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        return [
+            ("Response cache hits", self.hits),
+            ("Response cache misses", self.misses),
+            ("Response cache stale entries", self.stale),
+            ("Response cache evictions", self.evictions),
+            ("Response cache hit rate", self.hit_rate),
+            ("Response cache speedup", self.speedup),
+        ]
+
+
+class ResponseCache:
+    """
+    Cache of encoded response frames, CRC included, keyed by the request frame.
+
+    An entry remembers the store generation it was encoded at and is only served while no
+    block of its range has been written since, so a write invalidates the entries that
+    overlap it and no other. Only the read function codes are cached.
+    """
+
+    def __init__(self, store: RegisterStore, max_entries: int = 4096):
+        """
+        Creates a ResponseCache object.
+        :param store: Store the cached responses are built from.
+        :param max_entries: Maximum number of frames kept, the oldest is dropped first.
+        """
+        self.store = store
+        self.max_entries = max_entries
+        self.entries: dict[bytes, CachedResponse] = {}
+        self.stats = ResponseCacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.store.tracks_writes and self.max_entries > 0
+
+    def lookup(self, request: bytes) -> bytes | None:
+        """
+        Gets the response to a request frame if it is cached and still valid.
+        :param request: Request frame, CRC included.
+        :return: Response frame, None if it has to be encoded.
+        """
+        entry = self.entries.get(request)
+        if entry is None:
+            return None
+        if self.store.changed_since(
+            entry.table, entry.start, entry.count, entry.generation
+        ):
+            del self.entries[request]
+            self.stats.stale += 1
+            return None
+        return entry.frame
+
+    def cacheable(self, request: bytes) -> tuple[str, int, int] | None:
+        """
+        Gets the store range a request frame reads.
+        :param request: Request frame, CRC included.
+        :return: Tuple of table, start and count, None if the request is not cacheable.
+        """
+        if len(request) != 8:
+            return None
+        table = READ_TABLES.get(request[1])
+        if table is None:
+            return None
+        start = (request[2] << 8) | request[3]
+        count = (request[4] << 8) | request[5]
+        if not self.store.in_range(start, count):
+            # Exception responses do not depend on the store contents
+            return table, 0, 0
+        return table, start, count
+
+    def store_response(self, request: bytes, response: bytes, generation: int) -> bool:
+        """
+        Caches the response to a read request.
+        :param request: Request frame, CRC included.
+        :param response: Response frame, CRC included.
+        :param generation: Store generation read before the response was encoded.
+        :return: True if the response was cached.
+        """
+        target = self.cacheable(request)
+        if target is None:
+            return False
+        table, start, count = target
+        if len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
+            self.stats.evictions += 1
+        self.entries[request] = CachedResponse(response, table, start, count, generation)
+        return True
@@ -0,0 +1,467 @@
+from collections import deque
+from enum import Enum
+import json
+import logging
+import socket
+import threading
+import time
+from typing import NamedTuple, Protocol, Sequence
+
+from rich.console import Console
+
+from modbus_utility.utils.console_utils import (
+    format_text_element,
+    generate_register_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.profiling_utils import profiler
+from modbus_utility.utils.timeseries_store import TimeSeriesStore
+from modbus_utility.utils.window_aggregator import generate_window_table, WindowReport
+
+console = Console()
+
+# Seconds closing a pipeline keeps writing the queued records before dropping the rest
+DRAIN_TIMEOUT = 5.0
+
+
+class PollRecord(NamedTuple):
+    """
+    Represents a polled block and the registers of it that have to be reported.
+    """
+
+    timestamp: float
+    slave_address: int
+    start: int
+    values: Sequence[int]
+    registers: list[tuple[int, int]]
+
+
+class WindowRecord(NamedTuple):
+    """
+    Represents the window statistics of a polled block.
+    """
+
+    slave_address: int
+    report: WindowReport
+
+
+class ErrorRecord(NamedTuple):
+    """
+    Represents a poll or a control write that failed.
+    """
+
+    timestamp: float
+    slave_address: int
+    message: str
+
+
+class WriteRecord(NamedTuple):
+    """
+    Represents a control write made while polling.
+    """
+
+    timestamp: float
+    slave_address: int
+    register: int
+    value: int
+    # From submission to the end of the transaction
+    latency: float
+
+
+Record = PollRecord | WindowRecord | ErrorRecord | WriteRecord
+
+
+def record_to_json(record: Record) -> dict:
+    if isinstance(record, WriteRecord):
+        return {
+            "timestamp": record.timestamp,
+            "slave": record.slave_address,
+            "write": {str(record.register): record.value},
+            "latency": record.latency,
+        }
+    if isinstance(record, ErrorRecord):
+        return {
+            "timestamp": record.timestamp,
+            "slave": record.slave_address,
+            "error": record.message,
+        }
+    if isinstance(record, PollRecord):
+        return {
+            "timestamp": record.timestamp,
+            "slave": record.slave_address,
+            "registers": {str(register): value for register, value in record.registers},
+        }
+    report = record.report
+    return {
+        "start": report.start,
+        "end": report.end,
+        "slave": record.slave_address,
+        "samples": report.samples,
+        "points": {
+            str(stats.register): {
+                "min": stats.minimum,
+                "max": stats.maximum,
+                "mean": stats.mean,
+                **({"delta": stats.total} if stats.counter else {}),
+            }
+            for stats in report.points
+        },
+    }
+
+
+class Sink(Protocol):
+    """
+    Represents an output of the poll results, batches are written from the pipeline thread.
+    """
+
+    def write_batch(self, records: list[Record]) -> None: ...
+
+    def limit_time(self, seconds: float) -> None:
+        """
+        Bounds the time the next writes can block, called while the pipeline is closing.
+        :param seconds: Seconds left to drain the pipeline.
+        :return: None
+        """
+
+    def close(self) -> None: ...
+
+
+class ConsoleSink:
+    """
+    Shows the records as tables.
+    """
+
+    def __init__(self, display_hex: bool = True):
+        self.display_hex = display_hex
+
+    def write_batch(self, records: list[Record]) -> None:
+        with profiler.phase("render"):
+            for record in records:
+                if isinstance(record, ErrorRecord):
+                    console.print(
+                        format_text_element(
+                            TextElement(
+                                value=record.message,
+                                format=TextFormat(color=TextColors.RED, bold=True),
+                            )
+                        )
+                    )
+                elif isinstance(record, WriteRecord):
+                    console.print(
+                        f"[!] Wrote {record.value} to register {record.register} "
+                        f"({record.latency * 1000:.1f} ms)"
+                    )
+                    logging.info(f"Control write: {record}")
+                elif isinstance(record, WindowRecord):
+                    report = record.report
+                    console.print(
+                        f"[!] {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report.start))} - "
+                        f"{time.strftime('%H:%M:%S', time.localtime(report.end))} ({report.samples} samples)"
+                    )
+                    console.print(generate_window_table(report))
+                    logging.info(f"Window statistics: {report}")
+                elif record.registers:
+                    console.print(
+                        f"[!] {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp))}"
+                    )
+                    console.print(generate_register_table(record.registers, self.display_hex))
+                    logging.info(f"Polled registers: {record.registers}")
+
+    def limit_time(self, seconds: float) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """
+    Appends the records to a file, one JSON object per line.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "a")
+
+    def write_batch(self, records: list[Record]) -> None:
+        self.file.write(
+            "".join(json.dumps(record_to_json(record)) + "\n" for record in records)
+        )
+        self.file.flush()
+
+    def limit_time(self, seconds: float) -> None:
+        pass
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class SocketSink:
+    """
+    Sends the records to a TCP server, one JSON object per line. The connection is opened
+    on the first batch and again after it fails, the batch being written is lost.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.sock: socket.socket | None = None
+
+    def write_batch(self, records: list[Record]) -> None:
+        payload = "".join(
+            json.dumps(record_to_json(record)) + "\n" for record in records
+        ).encode()
+        try:
+            if self.sock is None:
+                self.sock = socket.create_connection(self.address, self.timeout)
+            self.sock.sendall(payload)
+        except OSError:
+            self.close()
+            raise
+
+    def limit_time(self, seconds: float) -> None:
+        self.timeout = min(self.timeout, max(seconds, 0.001))
+        if self.sock is not None:
+            self.sock.settimeout(self.timeout)
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class TimeSeriesSink:
+    """
+    Keeps the records in a TimeSeriesStore, every polled value or the window statistics as
+    REGISTER.min/.max/.mean/.delta points.
+    """
+
+    def __init__(self, root: str):
+        self.store = TimeSeriesStore(root)
+
+    def write_batch(self, records: list[Record]) -> None:
+        for record in records:
+            if isinstance(record, (ErrorRecord, WriteRecord)):
+                continue
+            if isinstance(record, PollRecord):
+                self.store.append_block(
+                    record.slave_address, record.start, record.values, record.timestamp
+                )
+                continue
+            report = record.report
+            for stats in report.points:
+                point = self.store.point_name(record.slave_address, stats.register)
+                if stats.counter:
+                    self.store.append(f"{point}.delta", report.end, stats.total)
+                self.store.append(f"{point}.min", report.end, stats.minimum)
+                self.store.append(f"{point}.max", report.end, stats.maximum)
+                self.store.append(f"{point}.mean", report.end, stats.mean)
+        self.store.flush()
+
+    def limit_time(self, seconds: float) -> None:
+        pass
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def parse_sink(definition: str, display_hex: bool = True) -> Sink:
+    """
+    Creates a sink from its definition: console, file:PATH, socket:HOST:PORT or store:DIR.
+    :param definition: Definition of the sink.
+    :param display_hex: Flag to show the values in hexadecimal on the console.
+    :return: Sink object.
+    """
+    kind, _, target = definition.partition(":")
+    match kind:
+        case "console":
+            return ConsoleSink(display_hex)
+        case "file" if target:
+            return FileSink(target)
+        case "socket" if target:
+            host, _, port = target.rpartition(":")
+            try:
+                return SocketSink(host or "localhost", int(port))
+            except ValueError:
+                raise ValueError(f"Invalid socket sink port: {definition}")
+        case "store" if target:
+            return TimeSeriesSink(target)
+    raise ValueError(
+        f"Invalid sink {definition}, use console, file:PATH, socket:HOST:PORT or store:DIR"
+    )
+
+
+class Backpressure(str, Enum):
+    """
+    Represents what a full queue does with a new record.
+    """
+
+    # Wait for the sinks, the bus is stalled
+    block = "block"
+    # Make room by dropping the oldest queued record
+    drop_oldest = "drop-oldest"
+    # Keep one of every sample_every new records in place of the oldest, drop the rest
+    sample = "sample"
+
+
+class PipelineStats:
+    """
+    Represents the counters of a SinkPipeline.
+    """
+
+    def __init__(self):
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.batches = 0
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.sink_errors = 0
+
+    def rows(self, depth: int) -> list[tuple[str, int | float]]:
+        return [
+            ("Records enqueued", self.enqueued),
+            ("Records written", self.written),
+            ("Records dropped", self.dropped),
+            ("Queue depth", depth),
+            ("Max queue depth", self.max_depth),
+            ("Batches", self.batches),
+            ("Mean batch size", self.written / self.batches if self.batches else 0.0),
+            ("Producer blocked", self.blocked),
+            ("Producer blocked (s)", self.blocked_time),
+            ("Sink errors", self.sink_errors),
+        ]
+
+
+class SinkPipeline:
+    """
+    Bounded queue between the thread polling the bus and the sinks.
+
+    The bus thread only enqueues records, a consumer thread takes every queued record, up
+    to batch_size, and writes them to each sink in one batch. A slow sink makes the queue
+    grow instead of delaying the next transaction, and once it is full the backpressure
+    policy decides between stalling the bus and dropping records.
+    """
+
+    def __init__(
+        self,
+        sinks: list[Sink],
+        max_size: int = 1024,
+        policy: Backpressure = Backpressure.block,
+        batch_size: int = 64,
+        sample_every: int = 10,
+    ):
+        """
+        Creates a SinkPipeline object and starts its consumer thread.
+        :param sinks: Sinks every record is written to.
+        :param max_size: Maximum number of records queued.
+        :param policy: Backpressure policy once the queue is full.
+        :param batch_size: Maximum number of records written per batch.
+        :param sample_every: Records kept per every this many new ones with the sample policy.
+        """
+        self.sinks = sinks
+        self.max_size = max(max_size, 1)
+        self.policy = policy
+        self.batch_size = max(batch_size, 1)
+        self.sample_every = max(sample_every, 1)
+        self.queue: deque[Record] = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        # Once closing, the queued records left after the deadline are dropped
+        self.deadline: float | None = None
+        # Sinks that failed while closing, they are skipped from then on
+        self.failed: set[int] = set()
+        self.overflow = 0
+        self.stats = PipelineStats()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def put(self, record: Record) -> None:
+        """
+        Queues a record for the sinks, applying the backpressure policy if the queue is full.
+        :param record: Record to write.
+        :return: None
+        """
+        with self.condition:
+            self.stats.enqueued += 1
+            if len(self.queue) >= self.max_size and self.policy == Backpressure.block:
+                self.stats.blocked += 1
+                started = time.monotonic()
+                while len(self.queue) >= self.max_size and not self.closed:
+                    self.condition.wait()
+                self.stats.blocked_time += time.monotonic() - started
+            # The consumer may already be gone, nothing queued from now on is written
+            if self.closed:
+                self.stats.dropped += 1
+                return
+            if len(self.queue) >= self.max_size:
+                if self.policy == Backpressure.sample and self.overflow % self.sample_every:
+                    self.overflow += 1
+                    self.stats.dropped += 1
+                    return
+                else:
+                    self.overflow += 1
+                    self.queue.popleft()
+                    self.stats.dropped += 1
+            self.queue.append(record)
+            self.stats.max_depth = max(self.stats.max_depth, len(self.queue))
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """
+        Writes the queued records to the sinks until the pipeline is closed and drained.
+        :return: None
+        """
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    logging.error(f"Dropped {len(self.queue)} records left when closing")
+                    self.stats.dropped += len(self.queue)
+                    self.queue.clear()
+                    return
+                batch = [
+                    self.queue.popleft()
+                    for _ in range(min(self.batch_size, len(self.queue)))
+                ]
+                closing = self.closed
+                self.condition.notify_all()
+
+            for index, sink in enumerate(self.sinks):
+                if index in self.failed:
+                    continue
+                try:
+                    if closing:
+                        sink.limit_time(self.deadline - time.monotonic())
+                    sink.write_batch(batch)
+                except Exception as e:
+                    self.stats.sink_errors += 1
+                    logging.error(f"{type(sink).__name__} failed to write a batch: {e}")
+                    if closing:
+                        self.failed.add(index)
+            self.stats.batches += 1
+            self.stats.written += len(batch)
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        return self.stats.rows(len(self.queue))
+
+    def close(self, drain_timeout: float = DRAIN_TIMEOUT) -> None:
+        """
+        Writes the records still queued and closes the sinks. The sink writes are bounded
+        by the time left, a sink failing from now on is skipped, and the records still
+        queued after drain_timeout are dropped.
+        :param drain_timeout: Seconds spent writing the queued records.
+        :return: None
+        """
+        with self.condition:
+            self.closed = True
+            self.deadline = time.monotonic() + drain_timeout
+            self.condition.notify_all()
+        self.worker.join()
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,485 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import queue
+import random
+import time
+from typing import NamedTuple
+
+from pydantic import BaseModel, conint
+
+from modbus_utility.physical.modbus_serial import calculate_crc
+from modbus_utility.utils.modbus_tcp_server import pack_mbap_frame, split_mbap_frames
+from modbus_utility.utils.register_store import RegisterStore
+from modbus_utility.utils.request_handler import handle_request
+
+STATS_INTERVAL = 1.0
+
+
+class DelaySpec(BaseModel):
+    """
+    Represents the distribution of the response delay of a simulated device, in seconds.
+    distribution can be 'fixed', 'uniform', 'normal' or 'exponential'.
+    """
+
+    distribution: str = "fixed"
+    value: float = 0.0
+    min: float = 0.0
+    max: float = 0.0
+    mean: float = 0.0
+    stddev: float = 0.0
+
+    def sample(self) -> float:
+        match self.distribution:
+            case "uniform":
+                return random.uniform(self.min, self.max)
+            case "normal":
+                return max(random.gauss(self.mean, self.stddev), 0.0)
+            case "exponential":
+                return random.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+            case _:
+                return self.value
+
+
+class DeviceGroupSpec(BaseModel):
+    """
+    Represents a group of identical simulated devices.
+    """
+
+    count: conint(gt=0) = 1
+    first_address: conint(gt=0, lt=248) = 1
+    num_registers: conint(gt=0, le=65536) = 1000
+    holding_registers: dict[int, int] = {}
+    input_registers: dict[int, int] = {}
+    response_delay: DelaySpec = DelaySpec()
+
+
+class FleetSpec(BaseModel):
+    """
+    Represents a fleet of simulated devices. Devices are spread over listeners (TCP ports
+    or pty pairs) of devices_per_port devices each, numbered from first_address on every
+    listener.
+    """
+
+    transport: str = "tcp"
+    host: str = "127.0.0.1"
+    base_port: int = 15020
+    devices_per_port: conint(gt=0, lt=248) = 32
+    groups: list[DeviceGroupSpec]
+
+
+class DevicePlan(NamedTuple):
+    address: int
+    offset: int
+    num_registers: int
+    group: int
+
+
+class ListenerPlan(NamedTuple):
+    transport: str
+    host: str
+    port: int
+    devices: list[DevicePlan]
+
+
+def load_fleet_spec(path: str) -> FleetSpec:
+    """
+    Loads a fleet spec from a JSON file.
+    :param path: Path to the fleet spec.
+    :return: FleetSpec object.
+    """
+    with open(path, "r") as f:
+        return FleetSpec(**json.load(f))
+
+
+def plan_fleet(spec: FleetSpec) -> tuple[list[ListenerPlan], int]:
+    """
+    Assigns every simulated device to a listener and to a slice of the shared register image.
+    :param spec: Fleet spec.
+    :return: Tuple of the listeners and the size of the shared register image in bytes.
+    """
+    listeners = []
+    offset = 0
+    port = spec.base_port
+    for group_index, group in enumerate(spec.groups):
+        if group.first_address + min(group.count, spec.devices_per_port) - 1 > 247:
+            raise ValueError(
+                f"Group {group_index} does not fit in the 1-247 address range"
+            )
+        for first in range(0, group.count, spec.devices_per_port):
+            devices = []
+            for index in range(min(spec.devices_per_port, group.count - first)):
+                devices.append(
+                    DevicePlan(
+                        group.first_address + index,
+                        offset,
+                        group.num_registers,
+                        group_index,
+                    )
+                )
+                offset += 4 * group.num_registers
+            listeners.append(ListenerPlan(spec.transport, spec.host, port, devices))
+            port += 1
+
+    return listeners, offset
+
+
+class FleetDevice:
+    """
+    Represents a simulated device served by a fleet worker.
+    """
+
+    def __init__(self, store: RegisterStore, delay: DelaySpec):
+        self.store = store
+        self.delay = delay
+
+
+class WorkerStats:
+    """
+    Represents the counters of a fleet worker process.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.exceptions = 0
+        self.unknown_units = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.connections = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return dict(self.__dict__)
+
+
+class FleetWorker:
+    """
+    Serves the listeners assigned to one process of the fleet on a single asyncio loop.
+    """
+
+    def __init__(
+        self,
+        worker_id: int,
+        spec: FleetSpec,
+        listeners: list[ListenerPlan],
+        image: memoryview,
+        events: multiprocessing.Queue,
+    ):
+        self.worker_id = worker_id
+        self.listeners = listeners
+        self.events = events
+        self.stats = WorkerStats()
+        self.devices: dict[int, dict[int, FleetDevice]] = {}
+        for listener in listeners:
+            self.devices[listener.port] = {
+                device.address: FleetDevice(
+                    RegisterStore(
+                        device.num_registers,
+                        image[device.offset : device.offset + 4 * device.num_registers],
+                    ),
+                    spec.groups[device.group].response_delay,
+                )
+                for device in listener.devices
+            }
+
+    async def answer(
+        self, devices: dict[int, FleetDevice], unit_id: int, pdu: bytes
+    ) -> bytes | None:
+        """
+        Executes a request against the addressed device, applying its response delay.
+        :param devices: Devices of the listener, by address.
+        :param unit_id: Address of the request.
+        :param pdu: Request PDU.
+        :return: Response PDU, None if no device answers to the address.
+        """
+        self.stats.requests += 1
+        device = devices.get(unit_id)
+        if device is None:
+            self.stats.unknown_units += 1
+            return None
+        delay = device.delay.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = handle_request(device.store, pdu)
+        if response[0] & 0x80:
+            self.stats.exceptions += 1
+        return response
+
+    async def serve_tcp(self, listener: ListenerPlan) -> asyncio.Server:
+        devices = self.devices[listener.port]
+
+        async def handle_connection(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> None:
+            self.stats.connections += 1
+            buffer = bytearray()
+            try:
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    self.stats.bytes_in += len(data)
+                    buffer += data
+                    frames, consumed = split_mbap_frames(buffer)
+                    for transaction_id, unit_id, pdu in frames:
+                        response = await self.answer(devices, unit_id, pdu)
+                        if response is not None:
+                            frame = pack_mbap_frame(transaction_id, unit_id, response)
+                            self.stats.bytes_out += len(frame)
+                            writer.write(frame)
+                    if consumed < 0:
+                        break
+                    del buffer[:consumed]
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(
+            handle_connection, listener.host, listener.port, backlog=1024
+        )
+        self.events.put(("listener", f"{listener.host}:{listener.port}", len(devices)))
+        return server
+
+    def serve_pty(self, listener: ListenerPlan) -> int:
+        devices = self.devices[listener.port]
+        # POSIX only, imported here so the CLI still loads on Windows
+        import tty
+
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        os.set_blocking(master_fd, False)
+        buffer = bytearray()
+        loop = asyncio.get_running_loop()
+
+        async def answer_frame(frame: bytes) -> None:
+            response = await self.answer(devices, frame[0], frame[1:-2])
+            if response is not None:
+                response = bytes([frame[0]]) + response
+                response += calculate_crc(response).to_bytes(2, "little")
+                self.stats.bytes_out += len(response)
+                os.write(master_fd, response)
+
+        def on_readable() -> None:
+            try:
+                data = os.read(master_fd, 4096)
+            except BlockingIOError:
+                return
+            self.stats.bytes_in += len(data)
+            buffer.extend(data)
+            while True:
+                length = rtu_request_length(buffer)
+                if length is None or length > len(buffer):
+                    break
+                frame = bytes(buffer[:length])
+                del buffer[:length]
+                if calculate_crc(frame[:-2]) == int.from_bytes(frame[-2:], "little"):
+                    loop.create_task(answer_frame(frame))
+                else:
+                    # Lost synchronization, drop what is buffered
+                    buffer.clear()
+
+        loop.add_reader(master_fd, on_readable)
+        self.events.put(("listener", os.ttyname(slave_fd), len(devices)))
+        return master_fd
+
+    async def run(self, stop: multiprocessing.Event) -> None:
+        servers = []
+        for listener in self.listeners:
+            if listener.transport == "pty":
+                self.serve_pty(listener)
+            else:
+                servers.append(await self.serve_tcp(listener))
+
+        while not stop.is_set():
+            await asyncio.sleep(STATS_INTERVAL)
+            self.events.put(("stats", self.worker_id, self.stats.as_dict()))
+
+        for server in servers:
+            server.close()
+        self.events.put(("stats", self.worker_id, self.stats.as_dict()))
+
+
+def rtu_request_length(buffer: bytearray) -> int | None:
+    """
+    Calculates the length of the RTU request at the start of a buffer from its header.
+    :param buffer: Received bytes.
+    :return: Length of the request, None if more bytes are needed to know it.
+    """
+    if len(buffer) < 2:
+        return None
+    function_code = buffer[1]
+    if function_code in (15, 16):
+        return 9 + buffer[6] if len(buffer) >= 7 else None
+    if function_code == 23:
+        return 13 + buffer[10] if len(buffer) >= 11 else None
+    return 8
+
+
+def run_worker(
+    worker_id: int,
+    spec_data: dict,
+    listeners: list[ListenerPlan],
+    image_name: str,
+    events: multiprocessing.Queue,
+    stop: multiprocessing.Event,
+) -> None:
+    """
+    Entry point of a fleet worker process.
+    """
+    image = shared_memory.SharedMemory(name=image_name)
+    try:
+        worker = FleetWorker(
+            worker_id, FleetSpec(**spec_data), listeners, image.buf, events
+        )
+        asyncio.run(worker.run(stop))
+        worker.devices.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            image.close()
+        except BufferError:
+            # Views of the register image are still referenced, the OS releases them on exit
+            pass
+
+
+class FleetStats:
+    """
+    Represents the stats reported by every worker of a fleet.
+    """
+
+    def __init__(self):
+        self.workers: dict[int, dict[str, int]] = {}
+
+    def update(self, worker_id: int, stats: dict[str, int]) -> None:
+        self.workers[worker_id] = stats
+
+    def totals(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for stats in self.workers.values():
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+class SlaveFleet:
+    """
+    Runs a fleet of simulated slaves spread over a pool of worker processes. The register
+    images of every device live in one shared memory block, so the parent can read or
+    update them while the workers serve requests.
+    """
+
+    def __init__(self, spec: FleetSpec, processes: int | None = None):
+        """
+        Creates a SlaveFleet object.
+        :param spec: Fleet spec.
+        :param processes: Number of worker processes, defaults to the CPU count.
+        """
+        self.spec = spec
+        self.listeners, image_size = plan_fleet(spec)
+        self.processes = max(
+            1, min(processes or os.cpu_count() or 1, len(self.listeners))
+        )
+        self.image = shared_memory.SharedMemory(create=True, size=max(image_size, 1))
+        self.stores: list[RegisterStore] = []
+        try:
+            for listener in self.listeners:
+                for device in listener.devices:
+                    group = spec.groups[device.group]
+                    store = RegisterStore(
+                        device.num_registers,
+                        self.image.buf[
+                            device.offset : device.offset + 4 * device.num_registers
+                        ],
+                    )
+                    self.stores.append(store)
+                    for register, value in group.holding_registers.items():
+                        store.write_holding_registers(register, [value])
+                    for register, value in group.input_registers.items():
+                        store.write_input_registers(register, [value])
+        except BaseException:
+            # The segment outlives the process unless it is unlinked
+            self.release_image()
+            raise
+        self.events: multiprocessing.Queue = multiprocessing.Queue()
+        self.stop = multiprocessing.Event()
+        self.workers: list[multiprocessing.Process] = []
+        self.stats = FleetStats()
+        self.endpoints: list[tuple[str, int]] = []
+
+    @property
+    def num_devices(self) -> int:
+        return sum(len(listener.devices) for listener in self.listeners)
+
+    def start(self) -> None:
+        """
+        Starts the worker processes, listeners are dealt round-robin between them.
+        :return: None
+        """
+        spec_data = self.spec.model_dump()
+        for worker_id in range(self.processes):
+            worker = multiprocessing.Process(
+                target=run_worker,
+                args=(
+                    worker_id,
+                    spec_data,
+                    self.listeners[worker_id :: self.processes],
+                    self.image.name,
+                    self.events,
+                    self.stop,
+                ),
+                daemon=True,
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def poll_events(self, timeout: float) -> None:
+        """
+        Collects the listener and stats events sent by the workers.
+        :param timeout: Seconds to wait for the first event.
+        :return: None
+        """
+        try:
+            event = self.events.get(timeout=timeout)
+            while True:
+                match event:
+                    case ("listener", endpoint, devices):
+                        self.endpoints.append((endpoint, devices))
+                        logging.info(
+                            f"Fleet listener {endpoint} serving {devices} devices"
+                        )
+                    case ("stats", worker_id, stats):
+                        self.stats.update(worker_id, stats)
+                event = self.events.get_nowait()
+        except queue.Empty:
+            pass
+
+    def shutdown(self) -> None:
+        """
+        Stops the workers, collects their final stats and releases the shared image.
+        :return: None
+        """
+        self.stop.set()
+        deadline = time.monotonic() + 2 * STATS_INTERVAL + 1
+        for worker in self.workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+            if worker.is_alive():
+                worker.terminate()
+        self.poll_events(0.1)
+        self.release_image()
+
+    def release_image(self) -> None:
+        """
+        Releases the views of the stores and destroys the shared image.
+        :return: None
+        """
+        for store in self.stores:
+            store.holding_registers.release()
+            store.input_registers.release()
+        self.stores.clear()
+        self.image.close()
+        self.image.unlink()
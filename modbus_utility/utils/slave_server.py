@@ -0,0 +1,302 @@
+import heapq
+import logging
+import os
+import selectors
+import socket
+import time
+from typing import TYPE_CHECKING
+
+from rich.console import Console
+
+from modbus_utility.physical.modbus_serial import frame_gap
+from modbus_utility.utils.modbus_tcp_server import ModbusTcpServer
+from modbus_utility.utils.pdu_codec import MAX_RTU_FRAME
+from modbus_utility.utils.response_cache import ResponseCacheStats
+
+if TYPE_CHECKING:
+    from modbus_utility.utils.modbus_slave import ModbusSlave
+
+console = Console()
+
+READ_SIZE = 65536
+
+
+def selectable(ser) -> bool:
+    """
+    Checks that a serial port can be waited on by a selector, only possible on POSIX.
+    :param ser: Open serial port.
+    :return: True if the port has a usable file descriptor.
+    """
+    if os.name != "posix":
+        return False
+    try:
+        ser.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
+class SlaveServerStats:
+    """
+    Represents the counters of a SlaveServer.
+    """
+
+    def __init__(self):
+        self.wakeups = 0
+        self.frames = 0
+        self.responses = 0
+        self.ignored_frames = 0
+        self.overruns = 0
+        self.tcp_connections = 0
+
+    def rows(self) -> list[tuple[str, int]]:
+        return [
+            ("Wakeups", self.wakeups),
+            ("Serial frames", self.frames),
+            ("Serial responses", self.responses),
+            ("Ignored serial frames", self.ignored_frames),
+            ("Serial buffer overruns", self.overruns),
+            ("TCP connections", self.tcp_connections),
+        ]
+
+
+class SerialEndpoint:
+    """
+    Represents a serial port served by a SlaveServer and the frame it is receiving.
+    """
+
+    def __init__(self, slave: "ModbusSlave"):
+        self.slave = slave
+        self.ser = slave.ser
+        self.gap = frame_gap(slave.ser.baudrate)
+        self.buffer = bytearray()
+        # Monotonic time the t3.5 interval of the frame being received expires, 0 when idle
+        self.deadline = 0.0
+
+
+class TcpConnection:
+    """
+    Represents a Modbus TCP client of a SlaveServer, with its receive and send buffers.
+    """
+
+    def __init__(self, sock: socket.socket, server: ModbusTcpServer):
+        self.sock = sock
+        self.server = server
+        self.received = bytearray()
+        self.pending = bytearray()
+
+
+class SlaveServer:
+    """
+    Serves any number of serial ports and Modbus TCP listeners from a single thread.
+
+    Every file descriptor is registered in a selector (epoll on Linux), so the thread
+    sleeps until bytes arrive. A port that received bytes arms a t3.5 timer, kept in a
+    heap, and its frame is answered when the timer expires without new bytes, so the cost
+    of a wakeup does not depend on the number of ports served.
+    """
+
+    def __init__(self, show_debug: bool = False):
+        """
+        Creates a SlaveServer object.
+        :param show_debug: Show every frame received.
+        """
+        self.show_debug = show_debug
+        self.selector = selectors.DefaultSelector()
+        self.timers: list[tuple[float, int, SerialEndpoint]] = []
+        self.timer_sequence = 0
+        self.stats = SlaveServerStats()
+
+    def add_slave(self, slave: "ModbusSlave") -> None:
+        """
+        Serves the serial port of a ModbusSlave.
+        :param slave: Slave bound to the port, its store and address answer the requests.
+        :return: None
+        """
+        if not selectable(slave.ser):
+            raise ValueError(
+                f"{slave.ser.port} can only be served on its own on this platform"
+            )
+        # Reads only return what the driver already has, the selector does the waiting
+        slave.ser.timeout = 0
+        endpoint = SerialEndpoint(slave)
+        self.selector.register(slave.ser.fileno(), selectors.EVENT_READ, endpoint)
+
+    def add_tcp_listener(self, host: str, port: int, server: ModbusTcpServer) -> None:
+        """
+        Accepts Modbus TCP clients.
+        :param host: Interface to listen on.
+        :param port: TCP port to listen on.
+        :param server: TCP front-end whose store and unit id answer the requests.
+        :return: None
+        """
+        listener = socket.create_server((host, port), backlog=1024)
+        listener.setblocking(False)
+        self.selector.register(listener, selectors.EVENT_READ, server)
+        logging.info(f"Modbus TCP server listening on {host}:{port}")
+
+    def arm_timer(self, endpoint: SerialEndpoint, now: float) -> None:
+        endpoint.deadline = now + endpoint.gap
+        self.timer_sequence += 1
+        heapq.heappush(self.timers, (endpoint.deadline, self.timer_sequence, endpoint))
+
+    def next_timeout(self, now: float) -> float | None:
+        """
+        Drops the timers re-armed since they were pushed and gets the time to the next one.
+        :param now: Monotonic time now.
+        :return: Seconds to the next timer, None when no frame is being received.
+        """
+        timers = self.timers
+        while timers and timers[0][2].deadline != timers[0][0]:
+            heapq.heappop(timers)
+        if not timers:
+            return None
+        return max(timers[0][0] - now, 0.0)
+
+    def serve_forever(self) -> None:
+        """
+        Serves the registered ports until interrupted.
+        :return: None
+        """
+        while True:
+            self.run_once(self.next_timeout(time.monotonic()))
+
+    def run_once(self, timeout: float | None) -> None:
+        """
+        Waits for bytes or a frame timer and handles what is ready.
+        :param timeout: Maximum time to wait in seconds, None to wait for bytes.
+        :return: None
+        """
+        events = self.selector.select(timeout)
+        self.stats.wakeups += 1
+        now = time.monotonic()
+        for key, _ in events:
+            data = key.data
+            if isinstance(data, SerialEndpoint):
+                self.read_serial(data, now)
+            elif isinstance(data, ModbusTcpServer):
+                self.accept(key.fileobj, data)
+            else:
+                self.service_connection(key, data)
+
+        timers = self.timers
+        while timers and timers[0][0] <= now:
+            deadline, _, endpoint = heapq.heappop(timers)
+            if endpoint.deadline == deadline:
+                self.answer_frame(endpoint)
+
+    def read_serial(self, endpoint: SerialEndpoint, now: float) -> None:
+        data = endpoint.ser.read(READ_SIZE)
+        if not data:
+            return
+        endpoint.buffer += data
+        if len(endpoint.buffer) > MAX_RTU_FRAME:
+            # Not a modbus frame, wait for the bus to go silent and drop it
+            self.stats.overruns += 1
+            endpoint.buffer.clear()
+        self.arm_timer(endpoint, now)
+
+    def answer_frame(self, endpoint: SerialEndpoint) -> None:
+        """
+        Answers the frame of a port whose t3.5 interval expired.
+        :param endpoint: Port that received the frame.
+        :return: None
+        """
+        frame = bytes(endpoint.buffer)
+        endpoint.buffer.clear()
+        endpoint.deadline = 0.0
+        if not frame:
+            return
+        self.stats.frames += 1
+        if self.show_debug:
+            console.print(frame)
+        valid, response = endpoint.slave.analyze_incoming_data(frame, self.show_debug)
+        if valid and response:
+            endpoint.ser.write(response)
+            self.stats.responses += 1
+        else:
+            self.stats.ignored_frames += 1
+
+    def accept(self, listener: socket.socket, server: ModbusTcpServer) -> None:
+        try:
+            sock, _ = listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.selector.register(sock, selectors.EVENT_READ, TcpConnection(sock, server))
+        self.stats.tcp_connections += 1
+        server.stats.connections += 1
+        server.stats.active_connections += 1
+
+    def service_connection(
+        self, key: selectors.SelectorKey, connection: TcpConnection
+    ) -> None:
+        """
+        Reads the requests of a TCP client and sends the responses it is owed.
+        :param key: Selector key of the connection.
+        :param connection: Connection that is ready.
+        :return: None
+        """
+        if key.events & selectors.EVENT_READ:
+            try:
+                data = connection.sock.recv(READ_SIZE)
+            except BlockingIOError:
+                data = None
+            except ConnectionError:
+                data = b""
+            if data == b"":
+                self.close_connection(connection)
+                return
+            if data:
+                connection.received += data
+                responses, consumed = connection.server.process_buffer(
+                    connection.received
+                )
+                connection.pending += responses
+                if consumed < 0:
+                    connection.server.stats.protocol_errors += 1
+                    logging.error("Invalid MBAP header received, closing connection")
+                    self.close_connection(connection)
+                    return
+                del connection.received[:consumed]
+
+        if connection.pending:
+            try:
+                sent = connection.sock.send(connection.pending)
+            except BlockingIOError:
+                sent = 0
+            except ConnectionError:
+                self.close_connection(connection)
+                return
+            del connection.pending[:sent]
+
+        # Only wait for the socket to be writable while a response is pending
+        events = selectors.EVENT_READ
+        if connection.pending:
+            events |= selectors.EVENT_WRITE
+        if events != key.events:
+            self.selector.modify(connection.sock, events, connection)
+
+    def close_connection(self, connection: TcpConnection) -> None:
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        connection.server.stats.active_connections -= 1
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        """
+        Generates the rows used to display the statistics of the server and the response
+        caches of its slaves.
+        :return: List of (name, value) tuples.
+        """
+        cache_stats = ResponseCacheStats()
+        for key in self.selector.get_map().values():
+            if isinstance(key.data, SerialEndpoint) and key.data.slave.response_cache:
+                cache_stats.merge(key.data.slave.response_cache.stats)
+        return self.stats.rows() + cache_stats.rows()
+
+    def close(self) -> None:
+        for key in list(self.selector.get_map().values()):
+            if isinstance(key.fileobj, socket.socket):
+                key.fileobj.close()
+        self.selector.close()
@@ -0,0 +1,114 @@
+from array import array
+import math
+
+from rich.table import Table
+
+from modbus_utility.utils.console_utils import (
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+
+
+class LatencyStats:
+    """
+    Represents a collection of latency samples, in seconds, with percentile helpers.
+    """
+
+    def __init__(self):
+        self.samples = array("d")
+        self._sorted: list[float] | None = None
+
+    def add(self, latency: float) -> None:
+        """
+        Adds a latency sample.
+        :param latency: Latency in seconds.
+        :return: None
+        """
+        self.samples.append(latency)
+        self._sorted = None
+
+    def merge(self, other: "LatencyStats") -> None:
+        """
+        Adds all the samples of another collection to this one.
+        :param other: Collection to merge.
+        :return: None
+        """
+        self.samples.extend(other.samples)
+        self._sorted = None
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Calculates a percentile using the nearest-rank method.
+        :param pct: Percentile to calculate, between 0 and 100.
+        :return: Latency at the requested percentile, 0.0 if there are no samples.
+        """
+        if not self.samples:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        rank = max(math.ceil(pct / 100 * len(self._sorted)) - 1, 0)
+        return self._sorted[rank]
+
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def maximum(self) -> float:
+        return max(self.samples) if self.samples else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """
+        Generates the summary of the distribution in milliseconds.
+        :return: Dictionary with the mean, p50, p95, p99 and max latencies.
+        """
+        return {
+            "mean": self.mean() * 1000,
+            "p50": self.percentile(50) * 1000,
+            "p95": self.percentile(95) * 1000,
+            "p99": self.percentile(99) * 1000,
+            "max": self.maximum() * 1000,
+        }
+
+
+def generate_stats_table(rows: list[tuple[str, str | int | float]]) -> Table:
+    """
+    Generates a two column table to display a set of statistics.
+    :param rows: List of (name, value) tuples to show.
+    :return: Table object with the statistics.
+    """
+    return generate_table(
+        [
+            TextElement(
+                value="METRIC", format=TextFormat(color=TextColors.BLUE, bold=True)
+            ),
+            TextElement(
+                value="VALUE", format=TextFormat(color=TextColors.GREEN, bold=True)
+            ),
+        ],
+        [
+            [
+                TextElement(
+                    value=name, format=TextFormat(color=TextColors.BLUE, bold=True)
+                ),
+                TextElement(
+                    value=value if not isinstance(value, float) else f"{value:.3f}",
+                    format=TextFormat(color=TextColors.GREEN),
+                ),
+            ]
+            for name, value in rows
+        ],
+    )
+
+
+def latency_rows(stats: LatencyStats) -> list[tuple[str, float]]:
+    """
+    Generates the table rows for a latency distribution.
+    :param stats: Latency collection to describe.
+    :return: List of (name, value) tuples with the latencies in milliseconds.
+    """
+    return [(f"Latency {name} (ms)", value) for name, value in stats.summary().items()]
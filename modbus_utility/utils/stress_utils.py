@@ -0,0 +1,302 @@
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+import time
+
+from rich.table import Table
+
+from modbus_utility.utils.console_utils import (
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.pdu_codec import (
+    ModbusCRCError,
+    ModbusError,
+    ModbusExceptionResponse,
+    ModbusTimeoutError,
+    rtu_response_length,
+)
+from modbus_utility.utils.stats_utils import LatencyStats
+from modbus_utility.utils.transaction_arbiter import (
+    ArbiterStats,
+    Priority,
+    TransactionArbiter,
+    TransactionExpired,
+)
+
+# Length of a FC 3 request frame
+READ_REQUEST_LENGTH = 8
+
+
+class StressResult:
+    """
+    Represents the outcome of a stress run of a single block size.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self.transactions = 0
+        self.timeouts = 0
+        self.crc_errors = 0
+        self.exception_responses = 0
+        self.other_errors = 0
+        # Polls dropped by a TransactionArbiter because their deadline passed
+        self.dropped = 0
+        self.bus_bytes = 0
+        self.elapsed = 0.0
+        self.latency = LatencyStats()
+
+    @property
+    def errors(self) -> int:
+        return (
+            self.timeouts
+            + self.crc_errors
+            + self.exception_responses
+            + self.other_errors
+        )
+
+    @property
+    def rate(self) -> float:
+        return self.transactions / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_rate(self) -> float:
+        return self.bus_bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def registers_rate(self) -> float:
+        if not self.elapsed:
+            return 0.0
+        completed = self.transactions - self.errors - self.dropped
+        return completed * self.block_size / self.elapsed
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        summary = self.latency.summary()
+        return [
+            ("Block size", self.block_size),
+            ("Transactions", self.transactions),
+            ("Elapsed (s)", self.elapsed),
+            ("Rate (tx/s)", self.rate),
+            ("Bus bytes/s", self.bytes_rate),
+            ("Registers/s", self.registers_rate),
+            ("Timeouts", self.timeouts),
+            ("CRC errors", self.crc_errors),
+            ("Exception responses", self.exception_responses),
+            ("Other errors", self.other_errors),
+            ("Dropped (stale)", self.dropped),
+            ("Latency p50 (ms)", summary["p50"]),
+            ("Latency p95 (ms)", summary["p95"]),
+            ("Latency p99 (ms)", summary["p99"]),
+            ("Latency max (ms)", summary["max"]),
+        ]
+
+
+def run_stress(
+    master: ModbusMaster,
+    register: int,
+    block_size: int,
+    duration: float | None = None,
+    count: int | None = None,
+    rate: float | None = None,
+) -> StressResult:
+    """
+    Reads a block of holding registers repeatedly, back-to-back or at a target rate.
+    :param master: Master of the device under test.
+    :param register: Starting register of the block.
+    :param block_size: Number of registers per read.
+    :param duration: Seconds to run for, None to stop only on count.
+    :param count: Number of transactions to run, None to stop only on duration.
+    :param rate: Target transactions per second, None for back-to-back reads.
+    :return: Result of the run.
+    """
+    result = StressResult(block_size)
+    # Every attempt writes a request and, timeouts aside, reads a full response
+    response_length = rtu_response_length(3, block_size)
+    period = 1 / rate if rate else 0.0
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else None
+    next_request = started
+    while True:
+        now = time.perf_counter()
+        if count is not None and result.transactions >= count:
+            break
+        if deadline is not None and now >= deadline:
+            break
+        if period:
+            if next_request > now:
+                time.sleep(next_request - now)
+            next_request += period
+
+        request_started = time.perf_counter()
+        result.transactions += 1
+        result.bus_bytes += READ_REQUEST_LENGTH
+        try:
+            master.request_holding_register(register, block_size, False)
+            result.bus_bytes += response_length
+        except ModbusTimeoutError:
+            # Timeouts only measure the port timeout, keep them out of the latencies
+            result.timeouts += 1
+            continue
+        except ModbusCRCError:
+            result.crc_errors += 1
+            result.bus_bytes += response_length
+        except ModbusExceptionResponse:
+            result.exception_responses += 1
+            result.bus_bytes += 5
+        except ModbusError:
+            result.other_errors += 1
+        result.latency.add(time.perf_counter() - request_started)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def record_poll(result: StressResult, future: Future, response_length: int) -> None:
+    """
+    Counts the outcome of a poll submitted to a TransactionArbiter.
+    :param result: Result to update.
+    :param future: Completed future of the poll.
+    :param response_length: Length of a full response frame.
+    :return: None
+    """
+    error = future.exception()
+    if isinstance(error, TransactionExpired):
+        # Never reached the bus
+        result.dropped += 1
+        return
+    result.bus_bytes += READ_REQUEST_LENGTH
+    if error is None:
+        result.bus_bytes += response_length
+    elif isinstance(error, ModbusTimeoutError):
+        result.timeouts += 1
+    elif isinstance(error, ModbusCRCError):
+        result.crc_errors += 1
+        result.bus_bytes += response_length
+    elif isinstance(error, ModbusExceptionResponse):
+        result.exception_responses += 1
+        result.bus_bytes += 5
+    else:
+        result.other_errors += 1
+
+
+def run_control_stress(
+    master: ModbusMaster,
+    register: int,
+    block_size: int,
+    control_register: int,
+    control_interval: float,
+    duration: float | None = None,
+    count: int | None = None,
+    queue_depth: int = 8,
+    poll_deadline: float | None = None,
+) -> tuple[StressResult, ArbiterStats]:
+    """
+    Keeps a TransactionArbiter full of poll reads while a control write is submitted every
+    interval, to measure the write latency under full poll load. The control register is
+    written with the value read from it at the start, so the device state is not changed.
+    :param master: Master of the device under test.
+    :param register: Starting register of the polled block.
+    :param block_size: Number of registers per poll.
+    :param control_register: Register the control writes go to.
+    :param control_interval: Seconds between control writes.
+    :param duration: Seconds to run for, None to stop only on count.
+    :param count: Number of polls to submit, None to stop only on duration.
+    :param queue_depth: Number of polls kept queued at all times.
+    :param poll_deadline: Seconds a poll may wait for the bus before it is dropped, None to never drop.
+    :return: Tuple of the poll result and the arbiter counters.
+    """
+    try:
+        control_value = master.request_holding_register(control_register, 1, False)[0]
+    except ModbusError as e:
+        raise ModbusError(f"Failed to read control register {control_register}: {e}")
+    result = StressResult(block_size)
+    response_length = rtu_response_length(3, block_size)
+    arbiter = TransactionArbiter(master)
+    pending: set[Future] = set()
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else None
+    next_control = started + control_interval
+    try:
+        while True:
+            now = time.perf_counter()
+            if count is not None and result.transactions >= count:
+                break
+            if deadline is not None and now >= deadline:
+                break
+            if now >= next_control:
+                # Its outcome is only counted by the arbiter
+                arbiter.write_register(control_register, control_value, Priority.control)
+                next_control += control_interval
+            while len(pending) < queue_depth and (
+                count is None or result.transactions < count
+            ):
+                result.transactions += 1
+                pending.add(
+                    arbiter.read_holding_register(
+                        register, block_size, Priority.poll, poll_deadline
+                    )
+                )
+            done, pending = wait(
+                pending,
+                timeout=max(next_control - time.perf_counter(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                record_poll(result, future, response_length)
+        for future in wait(pending).done:
+            record_poll(result, future, response_length)
+    finally:
+        arbiter.close()
+    result.elapsed = time.perf_counter() - started
+    result.latency = arbiter.stats.priorities[Priority.poll].latency
+    return result, arbiter.stats
+
+
+def generate_sweep_table(results: list[StressResult]) -> Table:
+    """
+    Generates a table comparing the results of a block size sweep, the block size with
+    the highest register throughput is highlighted.
+    :param results: Results of every block size.
+    :return: Table object with the comparison.
+    """
+    best = max(results, key=lambda result: result.registers_rate)
+    return generate_table(
+        [
+            TextElement(
+                value="BLOCK SIZE", format=TextFormat(color=TextColors.BLUE, bold=True)
+            ),
+            TextElement(value="TX/S"),
+            TextElement(value="REGISTERS/S"),
+            TextElement(value="BYTES/S"),
+            TextElement(value="P50 (ms)"),
+            TextElement(value="P99 (ms)"),
+            TextElement(value="ERRORS"),
+        ],
+        [
+            [
+                TextElement(
+                    value=result.block_size,
+                    format=TextFormat(color=TextColors.BLUE, bold=True),
+                ),
+                TextElement(value=f"{result.rate:.1f}"),
+                TextElement(
+                    value=f"{result.registers_rate:.1f}",
+                    format=TextFormat(
+                        color=TextColors.GREEN if result is best else TextColors.WHITE,
+                        bold=result is best,
+                    ),
+                ),
+                TextElement(value=f"{result.bytes_rate:.1f}"),
+                TextElement(value=f"{result.latency.percentile(50) * 1000:.2f}"),
+                TextElement(value=f"{result.latency.percentile(99) * 1000:.2f}"),
+                TextElement(
+                    value=result.errors,
+                    format=TextFormat(
+                        color=TextColors.RED if result.errors else TextColors.GREEN
+                    ),
+                ),
+            ]
+            for result in results
+        ],
+    )
@@ -0,0 +1,346 @@
+from array import array
+import bisect
+import mmap
+import os
+from typing import Iterator, NamedTuple, Sequence
+
+# Timestamps are stored as uint32 millisecond offsets from the segment base, values as float32
+TIMESTAMP_TYPE = "I"
+VALUE_TYPE = "f"
+TIMESTAMP_SUFFIX = ".ts"
+VALUE_SUFFIX = ".val"
+SEGMENT_DURATION_MS = 24 * 3600 * 1000
+
+
+class Segment(NamedTuple):
+    """
+    Represents a segment file pair of a point: timestamps and values columns.
+    """
+
+    base_ms: int
+    path: str
+
+    @property
+    def timestamps_path(self) -> str:
+        return self.path + TIMESTAMP_SUFFIX
+
+    @property
+    def values_path(self) -> str:
+        return self.path + VALUE_SUFFIX
+
+
+class Bucket(NamedTuple):
+    """
+    Represents the aggregates of a downsampling bucket.
+    """
+
+    start_ms: int
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+
+class SegmentView:
+    """
+    Memory-mapped read-only view of a segment, the timestamps column doubles as the time
+    index of the segment since it is sorted.
+    """
+
+    def __init__(self, segment: Segment):
+        self.segment = segment
+        self.files = []
+        self.maps = []
+        self.timestamps = self.map(segment.timestamps_path, TIMESTAMP_TYPE)
+        self.values = self.map(segment.values_path, VALUE_TYPE)
+        # A sample may be half written by a concurrent append
+        self.count = min(len(self.timestamps), len(self.values))
+
+    def map(self, path: str, type_code: str) -> memoryview:
+        f = open(path, "rb")
+        self.files.append(f)
+        size = os.fstat(f.fileno()).st_size
+        item_size = array(type_code).itemsize
+        size -= size % item_size
+        if size == 0:
+            return memoryview(b"").cast(type_code)
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self.maps.append(mm)
+        return memoryview(mm).cast(type_code)
+
+    def bounds(self, start_ms: int, end_ms: int) -> tuple[int, int]:
+        """
+        Finds the samples of the segment inside a time range.
+        :param start_ms: Start of the range, inclusive.
+        :param end_ms: End of the range, exclusive.
+        :return: Tuple of the first and last (exclusive) sample indexes.
+        """
+        base = self.segment.base_ms
+        low = bisect.bisect_left(
+            self.timestamps, max(start_ms - base, 0), 0, self.count
+        )
+        high = bisect.bisect_left(
+            self.timestamps, max(end_ms - base, 0), low, self.count
+        )
+        return low, high
+
+    def close(self) -> None:
+        self.timestamps.release()
+        self.values.release()
+        for mm in self.maps:
+            mm.close()
+        for f in self.files:
+            f.close()
+
+    def __enter__(self) -> "SegmentView":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class SegmentWriter:
+    """
+    Appends samples to the open segment of a point.
+    """
+
+    def __init__(self, segment: Segment):
+        self.segment = segment
+        self.count = truncate_partial_sample(segment)
+        self.last_offset = -1
+        if self.count:
+            with SegmentView(segment) as view:
+                self.last_offset = view.timestamps[view.count - 1]
+        self.timestamps = open(segment.timestamps_path, "ab")
+        self.values = open(segment.values_path, "ab")
+
+    def accepts(self, timestamp_ms: int) -> bool:
+        offset = timestamp_ms - self.segment.base_ms
+        return self.last_offset <= offset < SEGMENT_DURATION_MS
+
+    def append(self, timestamp_ms: int, value: float) -> None:
+        offset = timestamp_ms - self.segment.base_ms
+        self.timestamps.write(array(TIMESTAMP_TYPE, (offset,)))
+        self.values.write(array(VALUE_TYPE, (value,)))
+        self.last_offset = offset
+        self.count += 1
+
+    def flush(self) -> None:
+        self.timestamps.flush()
+        self.values.flush()
+
+    def close(self) -> None:
+        self.timestamps.close()
+        self.values.close()
+
+
+def truncate_partial_sample(segment: Segment) -> int:
+    """
+    Makes both columns of a segment the same length, dropping a sample that was half written.
+    :param segment: Segment to check.
+    :return: Number of complete samples in the segment.
+    """
+    counts = []
+    for path, type_code in (
+        (segment.timestamps_path, TIMESTAMP_TYPE),
+        (segment.values_path, VALUE_TYPE),
+    ):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        counts.append(size // array(type_code).itemsize)
+    count = min(counts)
+    for path, type_code in (
+        (segment.timestamps_path, TIMESTAMP_TYPE),
+        (segment.values_path, VALUE_TYPE),
+    ):
+        with open(path, "ab") as f:
+            f.truncate(count * array(type_code).itemsize)
+    return count
+
+
+class TimeSeriesStore:
+    """
+    Append-only store of polled values.
+
+    Every point is a directory of segments, each segment a pair of column files that are
+    appended in place and memory-mapped for queries, so only the pages inside the queried
+    range are read. A segment covers at most SEGMENT_DURATION_MS and costs 8 bytes per sample.
+    """
+
+    def __init__(self, root: str):
+        """
+        Creates a TimeSeriesStore object, the directory is created if it does not exist.
+        :param root: Directory of the store.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.writers: dict[str, SegmentWriter] = {}
+
+    @staticmethod
+    def point_name(slave_address: int, register: int) -> str:
+        return f"{slave_address}-{register}"
+
+    def points(self) -> list[str]:
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def segments(self, point: str) -> list[Segment]:
+        """
+        Lists the segments of a point.
+        :param point: Name of the point.
+        :return: List of segments sorted by time.
+        """
+        directory = os.path.join(self.root, point)
+        if not os.path.isdir(directory):
+            return []
+        names = [
+            name[: -len(TIMESTAMP_SUFFIX)]
+            for name in os.listdir(directory)
+            if name.endswith(TIMESTAMP_SUFFIX)
+        ]
+        return sorted(Segment(int(name), os.path.join(directory, name)) for name in names)
+
+    def writer_for(self, point: str, timestamp_ms: int) -> SegmentWriter:
+        writer = self.writers.get(point)
+        if writer is not None and writer.accepts(timestamp_ms):
+            return writer
+        if writer is not None:
+            writer.close()
+        else:
+            segments = self.segments(point)
+            if segments:
+                writer = SegmentWriter(segments[-1])
+                if writer.accepts(timestamp_ms):
+                    self.writers[point] = writer
+                    return writer
+                writer.close()
+
+        directory = os.path.join(self.root, point)
+        os.makedirs(directory, exist_ok=True)
+        writer = SegmentWriter(
+            Segment(timestamp_ms, os.path.join(directory, f"{timestamp_ms:016d}"))
+        )
+        self.writers[point] = writer
+        return writer
+
+    def append(self, point: str, timestamp: float, value: float) -> None:
+        """
+        Appends a sample to a point.
+        :param point: Name of the point.
+        :param timestamp: Unix time of the sample in seconds.
+        :param value: Value of the sample.
+        :return: None
+        """
+        timestamp_ms = int(timestamp * 1000)
+        self.writer_for(point, timestamp_ms).append(timestamp_ms, value)
+
+    def append_block(
+        self,
+        slave_address: int,
+        start_register: int,
+        values: Sequence[float],
+        timestamp: float,
+    ) -> None:
+        """
+        Appends a polled block of registers, one point per register.
+        :param slave_address: Address of the slave the block was read from.
+        :param start_register: First register of the block.
+        :param values: Values of the block.
+        :param timestamp: Unix time of the sample in seconds.
+        :return: None
+        """
+        for offset, value in enumerate(values):
+            self.append(
+                self.point_name(slave_address, start_register + offset), timestamp, value
+            )
+
+    def flush(self) -> None:
+        for writer in self.writers.values():
+            writer.flush()
+
+    def close(self) -> None:
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+    def query(
+        self, point: str, start: float, end: float
+    ) -> Iterator[tuple[float, float]]:
+        """
+        Streams the samples of a point inside a time range.
+        :param point: Name of the point.
+        :param start: Start of the range as unix time in seconds, inclusive.
+        :param end: End of the range as unix time in seconds, exclusive.
+        :return: Iterator of (timestamp, value) tuples.
+        """
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        for segment in self.segments(point):
+            if segment.base_ms >= end_ms:
+                break
+            if segment.base_ms + SEGMENT_DURATION_MS <= start_ms:
+                continue
+            with SegmentView(segment) as view:
+                low, high = view.bounds(start_ms, end_ms)
+                for index in range(low, high):
+                    yield (
+                        (segment.base_ms + view.timestamps[index]) / 1000,
+                        view.values[index],
+                    )
+
+    def downsample(
+        self, point: str, start: float, end: float, bucket: float
+    ) -> list[Bucket]:
+        """
+        Calculates min/max/mean aggregates of a point over fixed time buckets.
+        :param point: Name of the point.
+        :param start: Start of the range as unix time in seconds, inclusive.
+        :param end: End of the range as unix time in seconds, exclusive.
+        :param bucket: Duration of each bucket in seconds.
+        :return: List of the buckets that have samples.
+        """
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        bucket_ms = max(int(bucket * 1000), 1)
+        buckets: dict[int, list[float]] = {}
+        for segment in self.segments(point):
+            if segment.base_ms >= end_ms:
+                break
+            if segment.base_ms + SEGMENT_DURATION_MS <= start_ms:
+                continue
+            with SegmentView(segment) as view:
+                low, high = view.bounds(start_ms, end_ms)
+                while low < high:
+                    timestamp_ms = segment.base_ms + view.timestamps[low]
+                    bucket_start = (
+                        start_ms + (timestamp_ms - start_ms) // bucket_ms * bucket_ms
+                    )
+                    bucket_end = bisect.bisect_left(
+                        view.timestamps,
+                        bucket_start + bucket_ms - segment.base_ms,
+                        low,
+                        high,
+                    )
+                    # min/max/sum run over the mapped column without copying it
+                    values = view.values[low:bucket_end]
+                    count = bucket_end - low
+                    aggregate = buckets.get(bucket_start)
+                    if aggregate is None:
+                        buckets[bucket_start] = [
+                            count,
+                            min(values),
+                            max(values),
+                            sum(values),
+                        ]
+                    else:
+                        aggregate[0] += count
+                        aggregate[1] = min(aggregate[1], min(values))
+                        aggregate[2] = max(aggregate[2], max(values))
+                        aggregate[3] += sum(values)
+                    values.release()
+                    low = bucket_end
+
+        return [
+            Bucket(bucket_start, count, minimum, maximum, total / count)
+            for bucket_start, (count, minimum, maximum, total) in sorted(buckets.items())
+        ]
@@ -0,0 +1,247 @@
+from concurrent.futures import Future
+from enum import IntEnum
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, TypeVar
+
+from modbus_utility.utils.modbus_master import ModbusMaster
+from modbus_utility.utils.pdu_codec import ModbusError
+from modbus_utility.utils.stats_utils import LatencyStats
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """
+    Represents the priority classes of the bus transactions, lower values go first.
+    """
+
+    control = 0
+    alarm = 1
+    poll = 2
+
+
+class TransactionExpired(ModbusError):
+    """
+    Represents a transaction dropped because its deadline passed before it reached the bus.
+    """
+
+
+class PriorityStats:
+    """
+    Represents the counters of a priority class.
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.executed = 0
+        self.dropped = 0
+        self.failed = 0
+        # From submission to the end of the transaction
+        self.latency = LatencyStats()
+
+
+class ArbiterStats:
+    """
+    Represents the counters of a TransactionArbiter.
+    """
+
+    def __init__(self):
+        self.priorities = {priority: PriorityStats() for priority in Priority}
+        # Longest time a transaction held the bus, the wait a control write can not avoid
+        self.longest_transaction = 0.0
+
+    def rows(self) -> list[tuple[str, int | float]]:
+        rows = []
+        for priority, stats in self.priorities.items():
+            if not stats.submitted:
+                continue
+            name = priority.name.capitalize()
+            rows += [
+                (f"{name} submitted", stats.submitted),
+                (f"{name} executed", stats.executed),
+                (f"{name} dropped (stale)", stats.dropped),
+                (f"{name} failed", stats.failed),
+                (f"{name} latency p50 (ms)", stats.latency.percentile(50) * 1000),
+                (f"{name} latency p99 (ms)", stats.latency.percentile(99) * 1000),
+                (f"{name} latency max (ms)", stats.latency.maximum() * 1000),
+            ]
+        rows.append(("Longest transaction (ms)", self.longest_transaction * 1000))
+        if self.priorities[Priority.control].submitted:
+            rows.append(("Control latency bound (ms)", self.control_bound * 1000))
+        return rows
+
+    @property
+    def control_bound(self) -> float:
+        """
+        Worst-case latency of a control write submitted while no other one is queued: the
+        transaction holding the bus has to finish before the write is executed.
+        """
+        return 2 * self.longest_transaction
+
+
+class Transaction:
+    """
+    Represents an operation waiting for the bus.
+    """
+
+    __slots__ = ("priority", "deadline", "operation", "future", "submitted")
+
+    def __init__(
+        self,
+        priority: Priority,
+        deadline: float | None,
+        operation: Callable[[ModbusMaster], object],
+    ):
+        self.priority = priority
+        self.deadline = deadline
+        self.operation = operation
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+
+
+class TransactionArbiter:
+    """
+    Serializes the transactions of a bus in priority order.
+
+    Callers submit operations from any thread and get a Future back. A single worker thread
+    owns the ModbusMaster and always takes the highest priority transaction waiting, FIFO
+    within a class. A transaction on the bus is never interrupted, so a control write waits
+    at most for the transaction in progress plus the control writes queued before it. Poll
+    transactions whose deadline passed while queued are dropped instead of being executed
+    late.
+    """
+
+    def __init__(self, master: ModbusMaster):
+        """
+        Creates a TransactionArbiter object and starts its worker thread.
+        :param master: ModbusMaster connected to the bus, only the worker may use it afterwards.
+        """
+        self.master = master
+        # A failed port resolves the futures with a ModbusTransportError instead of exiting
+        master.exit_on_transport_error = False
+        self.queue: list[tuple[int, int, Transaction]] = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.stats = ArbiterStats()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(
+        self,
+        operation: Callable[[ModbusMaster], T],
+        priority: Priority = Priority.poll,
+        deadline: float | None = None,
+    ) -> "Future[T]":
+        """
+        Queues an operation for the bus.
+        :param operation: Function called with the ModbusMaster, its result resolves the future.
+        :param priority: Priority class of the transaction.
+        :param deadline: Seconds from now the transaction has to start within, None to never drop it.
+        :return: Future resolved with the result of the operation, or TransactionExpired.
+        """
+        transaction = Transaction(
+            priority,
+            time.monotonic() + deadline if deadline is not None else None,
+            operation,
+        )
+        with self.condition:
+            if self.closed:
+                raise ModbusError("Transaction arbiter is closed")
+            self.stats.priorities[priority].submitted += 1
+            heapq.heappush(
+                self.queue, (priority, next(self.sequence), transaction)
+            )
+            self.condition.notify()
+        return transaction.future
+
+    def read_holding_register(
+        self,
+        start_reg: int,
+        num_reg: int,
+        priority: Priority = Priority.poll,
+        deadline: float | None = None,
+    ) -> "Future[tuple[int, ...]]":
+        return self.submit(
+            lambda master: master.request_holding_register(start_reg, num_reg, False),
+            priority,
+            deadline,
+        )
+
+    def write_register(
+        self,
+        register: int,
+        value: int,
+        priority: Priority = Priority.control,
+        deadline: float | None = None,
+    ) -> "Future[None]":
+        return self.submit(
+            lambda master: master.request_write_single(6, register, value),
+            priority,
+            deadline,
+        )
+
+    def next_transaction(self) -> Transaction | None:
+        """
+        Waits for the highest priority transaction that is still on time.
+        :return: Transaction to execute, None once the arbiter is closed.
+        """
+        with self.condition:
+            while True:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return None
+                _, _, transaction = heapq.heappop(self.queue)
+                if (
+                    transaction.deadline is not None
+                    and time.monotonic() > transaction.deadline
+                ):
+                    self.stats.priorities[transaction.priority].dropped += 1
+                    transaction.future.set_exception(
+                        TransactionExpired("Deadline passed before the transaction started")
+                    )
+                    continue
+                if transaction.future.set_running_or_notify_cancel():
+                    return transaction
+
+    def run(self) -> None:
+        """
+        Executes the queued transactions until the arbiter is closed.
+        :return: None
+        """
+        while True:
+            transaction = self.next_transaction()
+            if transaction is None:
+                return
+            stats = self.stats.priorities[transaction.priority]
+            started = time.monotonic()
+            try:
+                result = transaction.operation(self.master)
+            except Exception as e:
+                stats.failed += 1
+                transaction.future.set_exception(e)
+            else:
+                stats.executed += 1
+                transaction.future.set_result(result)
+            finished = time.monotonic()
+            self.stats.longest_transaction = max(
+                self.stats.longest_transaction, finished - started
+            )
+            stats.latency.add(finished - transaction.submitted)
+
+    def close(self) -> None:
+        """
+        Stops the worker, the transactions still queued are cancelled.
+        :return: None
+        """
+        with self.condition:
+            self.closed = True
+            for _, _, transaction in self.queue:
+                transaction.future.cancel()
+            self.queue.clear()
+            self.condition.notify_all()
+        self.worker.join()
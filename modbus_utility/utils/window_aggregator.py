@@ -0,0 +1,359 @@
+from array import array
+from collections import deque
+import math
+import operator
+from typing import NamedTuple, Sequence
+
+from rich.table import Table
+
+from modbus_utility.utils.console_utils import (
+    generate_table,
+    TextElement,
+    TextFormat,
+    TextColors,
+)
+
+# 32-bit counters are read as two registers, high word first
+COUNTER_MASK = 0xFFFFFFFF
+
+
+class PointStats(NamedTuple):
+    """
+    Represents the statistics of a point over a window. For counters the statistics are
+    of the increments between samples, so total is the counter delta over the window.
+    """
+
+    register: int
+    minimum: float
+    maximum: float
+    total: float
+    mean: float
+    counter: bool
+
+
+class WindowReport(NamedTuple):
+    """
+    Represents the statistics of every point of a block over a window.
+    """
+
+    start: float
+    end: float
+    samples: int
+    points: list[PointStats]
+
+
+class TumblingWindow:
+    """
+    Consecutive windows aligned to multiples of the width, e.g. every minute on the minute.
+
+    Every point keeps a running min/max/sum, updated with one pass over the sample per
+    statistic, and the window is reported by the first sample after its end.
+    """
+
+    def __init__(self, width: float):
+        """
+        Creates a TumblingWindow object.
+        :param width: Seconds covered by each window.
+        """
+        self.width = width
+        self.start: float | None = None
+        self.samples = 0
+        self.minimums: list[float] = []
+        self.maximums: list[float] = []
+        self.totals: list[float] = []
+
+    def add(self, now: float, values: Sequence[float]) -> WindowReport | None:
+        """
+        Adds a sample of every point.
+        :param now: Unix time of the sample.
+        :param values: Value of every point.
+        :return: Report of the window the sample closed, None if it is still open.
+        """
+        report = None
+        if self.start is not None and now >= self.start + self.width:
+            report = self.report()
+        if not self.samples:
+            self.start = math.floor(now / self.width) * self.width
+            self.minimums = list(values)
+            self.maximums = list(values)
+            self.totals = list(values)
+        else:
+            self.minimums = list(map(min, self.minimums, values))
+            self.maximums = list(map(max, self.maximums, values))
+            self.totals = list(map(operator.add, self.totals, values))
+        self.samples += 1
+        return report
+
+    def report(self, end: float | None = None) -> WindowReport | None:
+        """
+        Closes the current window.
+        :param end: Unix time the samples stopped at, for a window closed before its end.
+        :return: Report of the window, None if it has no samples.
+        """
+        if not self.samples:
+            return None
+        report = WindowReport(
+            self.start,
+            self.start + self.width if end is None else min(end, self.start + self.width),
+            self.samples,
+            [
+                PointStats(0, minimum, maximum, total, total / self.samples, False)
+                for minimum, maximum, total in zip(self.minimums, self.maximums, self.totals)
+            ],
+        )
+        self.samples = 0
+        return report
+
+
+class SlidingWindow:
+    """
+    Window covering the last width seconds, reported every step seconds.
+
+    The sum is kept by adding the new sample and subtracting the expired ones, and every
+    point keeps monotonic deques of its candidate minimums and maximums, so each sample
+    is added and expired once: O(1) amortized per sample and point.
+    """
+
+    def __init__(self, width: float, step: float):
+        """
+        Creates a SlidingWindow object.
+        :param width: Seconds covered by the window.
+        :param step: Seconds between reports.
+        """
+        self.width = width
+        self.step = step
+        self.samples: deque[tuple[float, Sequence[float]]] = deque()
+        self.totals: list[float] = []
+        self.minimums: list[deque[tuple[float, float]]] = []
+        self.maximums: list[deque[tuple[float, float]]] = []
+        self.next_report: float | None = None
+
+    def add(self, now: float, values: Sequence[float]) -> WindowReport | None:
+        """
+        Adds a sample of every point.
+        :param now: Unix time of the sample.
+        :param values: Value of every point.
+        :return: Report of the window if a step boundary was reached, None otherwise.
+        """
+        if self.next_report is None:
+            self.next_report = (math.floor(now / self.step) + 1) * self.step
+            self.totals = [0.0] * len(values)
+            self.minimums = [deque() for _ in values]
+            self.maximums = [deque() for _ in values]
+
+        self.samples.append((now, values))
+        self.totals = list(map(operator.add, self.totals, values))
+        for value, minimums, maximums in zip(values, self.minimums, self.maximums):
+            while minimums and minimums[-1][1] >= value:
+                minimums.pop()
+            minimums.append((now, value))
+            while maximums and maximums[-1][1] <= value:
+                maximums.pop()
+            maximums.append((now, value))
+
+        cutoff = now - self.width
+        while self.samples[0][0] <= cutoff:
+            expired_time, expired = self.samples.popleft()
+            self.totals = list(map(operator.sub, self.totals, expired))
+            for minimums, maximums in zip(self.minimums, self.maximums):
+                if minimums[0][0] == expired_time:
+                    minimums.popleft()
+                if maximums[0][0] == expired_time:
+                    maximums.popleft()
+
+        if now < self.next_report:
+            return None
+        self.next_report = (math.floor(now / self.step) + 1) * self.step
+        return self.report(now)
+
+    def report(self, now: float) -> WindowReport | None:
+        """
+        Reports the window ending now.
+        :param now: Unix time of the end of the window.
+        :return: Report of the window, None if it has no samples.
+        """
+        if not self.samples:
+            return None
+        samples = len(self.samples)
+        return WindowReport(
+            now - self.width,
+            now,
+            samples,
+            [
+                PointStats(0, minimums[0][1], maximums[0][1], total, total / samples, False)
+                for total, minimums, maximums in zip(
+                    self.totals, self.minimums, self.maximums
+                )
+            ],
+        )
+
+
+class WindowAggregator:
+    """
+    Aggregation stage for polled register blocks, only the window statistics are emitted.
+
+    Every register of the block is a point, except the 32-bit counters, which take two
+    registers and are aggregated as the increments between samples. Increments are taken
+    modulo 2^32, so a counter rolling over still yields the right delta. The increments
+    have their own window, which starts one sample after the registers, so the first
+    sample still counts for the registers.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        count: int,
+        width: float,
+        step: float | None = None,
+        counters: Sequence[int] = (),
+    ):
+        """
+        Creates a WindowAggregator object.
+        :param start: First register of the block.
+        :param count: Number of registers of the block.
+        :param width: Seconds covered by each window.
+        :param step: Seconds between reports of a sliding window, None for tumbling windows.
+        :param counters: First register of every 32-bit counter in the block.
+        """
+        counter_offsets = sorted(register - start for register in set(counters))
+        for offset in counter_offsets:
+            if not 0 <= offset < count - 1:
+                raise ValueError(f"Counter {start + offset} does not fit in the block")
+            if offset + 1 in counter_offsets:
+                raise ValueError(f"Counters {start + offset} and {start + offset + 1} overlap")
+        covered = {offset + 1 for offset in counter_offsets}
+        self.counter_offsets = counter_offsets
+        self.register_offsets = [
+            offset
+            for offset in range(count)
+            if offset not in covered and offset not in counter_offsets
+        ]
+        self.registers = [start + offset for offset in self.register_offsets] + [
+            start + offset for offset in counter_offsets
+        ]
+        self.counter_points = len(counter_offsets)
+        self.last_counters: array | None = None
+        self.window = self.create_window(width, step)
+        self.counter_window = self.create_window(width, step) if counter_offsets else None
+
+    @staticmethod
+    def create_window(width: float, step: float | None) -> TumblingWindow | SlidingWindow:
+        return TumblingWindow(width) if step is None else SlidingWindow(width, step)
+
+    def points(self, values: Sequence[int]) -> tuple[list[float], list[float] | None]:
+        """
+        Converts a sample of the block to point values.
+        :param values: Register values of the block.
+        :return: Tuple of the register values and the counter increments, None for the
+        increments of the first sample or if there are no counters.
+        """
+        plain = [values[offset] for offset in self.register_offsets]
+        if not self.counter_offsets:
+            return plain, None
+        counters = array(
+            "L", [(values[offset] << 16) | values[offset + 1] for offset in self.counter_offsets]
+        )
+        last = self.last_counters
+        self.last_counters = counters
+        if last is None:
+            # Increments need a previous reading
+            return plain, None
+        return plain, [
+            (current - previous) & COUNTER_MASK for current, previous in zip(counters, last)
+        ]
+
+    def add(self, now: float, values: Sequence[int]) -> WindowReport | None:
+        """
+        Adds a sample of the block.
+        :param now: Unix time of the sample.
+        :param values: Register values of the block.
+        :return: Report of a window if the sample completed one, None otherwise.
+        """
+        plain, increments = self.points(values)
+        report = self.window.add(now, plain)
+        counter_report = None
+        if increments is not None:
+            counter_report = self.counter_window.add(now, increments)
+        return self.label(report, counter_report)
+
+    def flush(self, now: float) -> WindowReport | None:
+        """
+        Reports the window still open, used when polling stops.
+        :param now: Unix time polling stopped at.
+        :return: Report of the window, None if it has no samples.
+        """
+        windows = [self.window] + ([self.counter_window] if self.counter_window else [])
+        return self.label(*(window.report(now) for window in windows))
+
+    def label(
+        self, report: WindowReport | None, counter_report: WindowReport | None = None
+    ) -> WindowReport | None:
+        """
+        Names the points of a report after their registers.
+        :param report: Report of the registers.
+        :param counter_report: Report of the counter increments over the same window, None
+        if the window closed before the counters had two samples.
+        :return: Report of every point, None if no point has statistics.
+        """
+        if report is None:
+            return None
+        if counter_report is not None:
+            report = report._replace(points=report.points + counter_report.points)
+        if not report.points:
+            return None
+        first_counter = len(self.registers) - self.counter_points
+        return report._replace(
+            points=[
+                stats._replace(register=register, counter=index >= first_counter)
+                for index, (register, stats) in enumerate(zip(self.registers, report.points))
+            ]
+        )
+
+
+def parse_counters(counters: list[str]) -> list[int]:
+    """
+    Parses the first register of every 32-bit counter.
+    :param counters: List of register addresses.
+    :return: List of registers.
+    """
+    try:
+        return [int(counter, 0) for counter in counters]
+    except ValueError as e:
+        raise ValueError(f"Invalid counter register: {e}")
+
+
+def generate_window_table(report: WindowReport) -> Table:
+    """
+    Generates a table with the statistics of a window.
+    :param report: Report of the window.
+    :return: Table object with the statistics of every point.
+    """
+    return generate_table(
+        [
+            TextElement(
+                value="REGISTER", format=TextFormat(color=TextColors.BLUE, bold=True)
+            ),
+            TextElement(value="MIN"),
+            TextElement(value="MAX"),
+            TextElement(value="MEAN"),
+            TextElement(
+                value="DELTA", format=TextFormat(color=TextColors.GREEN, bold=True)
+            ),
+        ],
+        [
+            [
+                TextElement(
+                    value=f"{stats.register}{' (u32)' if stats.counter else ''}",
+                    format=TextFormat(color=TextColors.BLUE, bold=True),
+                ),
+                TextElement(value=stats.minimum),
+                TextElement(value=stats.maximum),
+                TextElement(value=f"{stats.mean:.2f}"),
+                TextElement(
+                    value=int(stats.total) if stats.counter else "-",
+                    format=TextFormat(color=TextColors.GREEN, bold=True),
+                ),
+            ]
+            for stats in report.points
+        ],
+    )
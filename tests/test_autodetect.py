@@ -0,0 +1,71 @@
+from modbus_utility.physical.modbus_serial import calculate_crc
+from modbus_utility.utils.autodetect import (
+    find_frames,
+    frame_lengths,
+    rank_candidates,
+    SerialCandidate,
+)
+
+
+def rtu(hex_frame: str) -> bytes:
+    frame = bytes.fromhex(hex_frame)
+    return frame + calculate_crc(frame).to_bytes(2, "little")
+
+
+READ_REQUEST = rtu("010300000002")
+READ_RESPONSE = rtu("0103040001 0002".replace(" ", ""))
+WRITE_MULTIPLE_REQUEST = rtu("011000000002 04 00010002".replace(" ", ""))
+EXCEPTION_RESPONSE = rtu("018302")
+
+
+def test_frame_lengths():
+    # A read request could also be a response, its byte count is the register high byte
+    assert frame_lengths(READ_REQUEST, 0) == (8, 5)
+    assert frame_lengths(READ_RESPONSE, 0) == (8, 9)
+    assert frame_lengths(rtu("010500ffff00"), 0) == (8,)
+    assert frame_lengths(WRITE_MULTIPLE_REQUEST, 0) == (8, 13)
+    # The byte count of a write request is not received yet
+    assert frame_lengths(WRITE_MULTIPLE_REQUEST[:6], 0) == (8,)
+    assert frame_lengths(EXCEPTION_RESPONSE, 0) == (5,)
+    assert frame_lengths(rtu("01170000000200000001020007"), 0) == (5, 15)
+
+
+def test_frame_lengths_rejects():
+    # Address above 247, then an unknown function code
+    assert frame_lengths(b"\xf8\x03\x00\x00", 0) == ()
+    assert frame_lengths(b"\x01\x2b\x0e\x01", 0) == ()
+
+
+def test_find_frames_in_a_stream():
+    stream = (
+        b"\xff\x00"
+        + READ_REQUEST
+        + READ_RESPONSE
+        + b"\x55"
+        + WRITE_MULTIPLE_REQUEST
+        + EXCEPTION_RESPONSE
+    )
+
+    assert find_frames(stream) == [(2, 8), (10, 9), (20, 13), (33, 5)]
+
+
+def test_find_frames_ignores_garbled_and_truncated_frames():
+    garbled = bytearray(READ_RESPONSE)
+    garbled[4] ^= 0x40
+    assert find_frames(bytes(garbled)) == []
+    assert find_frames(READ_RESPONSE[:-1]) == []
+    assert find_frames(b"") == []
+    assert find_frames(READ_REQUEST[:3]) == []
+
+
+def test_rank_candidates():
+    candidates = rank_candidates()
+    assert candidates[0] == SerialCandidate(9600, "E")
+    assert len(candidates) == len(set(candidates))
+
+    preferred = SerialCandidate(57600, "N")
+    ranked = rank_candidates(preferred)
+    assert ranked[0] == preferred
+    assert sorted(ranked) == sorted(candidates)
+    # A setting outside the usual ones is tried first too
+    assert rank_candidates(SerialCandidate(250000, "N"))[0].baudrate == 250000
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from modbus_utility.utils import batch_runner
+from modbus_utility.utils.batch_runner import BatchOperation, check_ranges, load_batch
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_load_csv(tmp_path):
+    path = write(
+        tmp_path,
+        "batch.csv",
+        "op,port,address,register,count,value,seconds,expect\n"
+        "read,,,10,4,,,\n"
+        ",,,,,,,\n"
+        "write,/dev/ttyUSB1,3,16,,42,,\n"
+        "assert,,,5,,,,1;2 3\n",
+    )
+    operations = load_batch(path)
+
+    assert [operation.op for operation in operations] == ["read", "write", "assert"]
+    # Line numbers count the header, blank rows are skipped but keep their line
+    assert [operation.line for operation in operations] == [2, 4, 5]
+    read, write_op, check = operations
+    assert (read.port, read.address, read.register_address, read.count) == (
+        None,
+        None,
+        10,
+        4,
+    )
+    assert (write_op.port, write_op.address, write_op.value) == ("/dev/ttyUSB1", 3, 42)
+    assert write_op.register_address == 16
+    assert check.expect == [1, 2, 3]
+
+
+def test_load_json(tmp_path):
+    path = write(
+        tmp_path,
+        "batch.json",
+        json.dumps(
+            [
+                {"op": "wait", "seconds": 0.5},
+                {"op": "write-coil", "register": 7, "value": 1, "address": 0},
+            ]
+        ),
+    )
+    wait, coil = load_batch(path)
+
+    assert (wait.op, wait.seconds, wait.line) == ("wait", 0.5, 1)
+    assert (coil.op, coil.register_address, coil.address, coil.line) == (
+        "write-coil",
+        7,
+        0,
+        2,
+    )
+
+
+def test_unsupported_files(tmp_path, monkeypatch):
+    with pytest.raises(ValueError, match="Unsupported batch file"):
+        load_batch(write(tmp_path, "batch.txt", "read"))
+
+    monkeypatch.setattr(batch_runner, "yaml", None)
+    with pytest.raises(ValueError, match="need PyYAML"):
+        load_batch(write(tmp_path, "batch.yaml", "- op: read\n"))
+
+
+@pytest.mark.parametrize(
+    "entry, message",
+    [
+        ({"op": "erase"}, "Invalid operation 1"),
+        ({"op": "read", "address": 248}, "Invalid operation 1"),
+        ({"op": "read", "count": 0}, "Invalid operation 1"),
+        ({"op": "write", "register": 1}, r"Operation 1 \(write\) needs a value"),
+        ({"op": "write", "value": 0x10000}, "Invalid operation 1"),
+        ({"op": "assert", "register": 1}, r"Operation 1 \(assert\) needs"),
+    ],
+)
+def test_invalid_operations(tmp_path, entry, message):
+    with pytest.raises(ValueError, match=message):
+        load_batch(write(tmp_path, "batch.json", json.dumps([entry])))
+
+
+@pytest.mark.parametrize(
+    "fields, message",
+    [
+        ({"op": "read", "count": 126}, "at most 125 registers"),
+        ({"op": "assert", "expect": list(range(126))}, "at most 125 registers"),
+        ({"op": "assert", "expect": [0x10000]}, "outside 0-65535"),
+        ({"op": "read", "address": 0}, "can not read from address 0"),
+        ({"op": "read-coils", "address": 0}, "can not read from address 0"),
+        ({"op": "read", "register": 0xFFFF, "count": 2}, "past register 65535"),
+        ({"op": "read-inputs", "register": 0xFFF0, "count": 17}, "past register 65535"),
+        ({"op": "assert", "register": 0xFFFF, "expect": [1, 2]}, "past register 65535"),
+    ],
+)
+def test_check_ranges_rejects(fields, message):
+    with pytest.raises(ValueError, match=message):
+        check_ranges(BatchOperation(**fields, line=1))
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"op": "read", "register": 0xFFFF},
+        {"op": "read", "count": 125},
+        # Bit reads are split into several requests, they are only bounded by the table
+        {"op": "read-coils", "count": 0x10000},
+        # Writes to address 0 are broadcasts
+        {"op": "write", "address": 0, "value": 1},
+        {"op": "assert", "register": 0xFFFE, "expect": [0, 0xFFFF]},
+    ],
+)
+def test_check_ranges_accepts(fields):
+    check_ranges(BatchOperation(**fields, line=1))
@@ -0,0 +1,55 @@
+import pytest
+
+from modbus_utility.utils.bit_field import BitField
+
+BITS = [1, 0, 0, 1, 0, 0, 0, 0, 1, 1, 0]
+
+
+def test_from_bits_packs_in_modbus_order():
+    field = BitField.from_bits(100, BITS)
+    assert field.packed == bytes([0b00001001, 0b011])
+    assert len(field) == len(BITS)
+    assert list(field) == BITS
+
+
+def test_indexing():
+    field = BitField.from_bits(0, BITS)
+    assert [field[index] for index in range(len(BITS))] == BITS
+    assert field[-1] == 0
+    with pytest.raises(IndexError):
+        field[len(BITS)]
+
+
+def test_padding_bits_are_ignored():
+    # The unused high bits of the last byte are set
+    field = BitField(0, 3, bytes([0xFD]))
+    assert field.as_int() == 0b101
+    assert field.count_set() == 2
+    assert field.set_addresses() == [0, 2]
+    assert field == BitField.from_bits(0, [1, 0, 1])
+
+
+def test_set_addresses():
+    field = BitField.from_bits(100, BITS)
+    assert field.set_addresses() == [100, 103, 108, 109]
+    assert field.count_set() == 4
+
+
+def test_join_contiguous_fields():
+    first = BitField.from_bits(0, BITS[:5])
+    second = BitField.from_bits(5, BITS[5:])
+    assert BitField.join([first, second]) == BitField.from_bits(0, BITS)
+    with pytest.raises(ValueError):
+        BitField.join([first, BitField.from_bits(6, BITS[5:])])
+    with pytest.raises(ValueError):
+        BitField.join([])
+
+
+def test_rows():
+    field = BitField.from_bits(0, [1] * 8 + [0] * 8 + [1])
+    assert field.rows(16) == [(0, "11111111 00000000"), (16, "1")]
+
+
+def test_short_buffer_is_rejected():
+    with pytest.raises(ValueError):
+        BitField(0, 9, b"\x00")
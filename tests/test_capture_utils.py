@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from modbus_utility.physical.modbus_serial import calculate_crc
+from modbus_utility.utils import modbus_master
+from modbus_utility.utils.capture_utils import (
+    CAPTURE_MAGIC,
+    CaptureDirection,
+    CaptureWriter,
+    iter_capture,
+    iter_transactions,
+)
+from modbus_utility.utils.register_store import RegisterStore
+from modbus_utility.utils.request_handler import handle_request
+
+REQUEST = bytes.fromhex("010300000002c40b")
+RESPONSE = bytes.fromhex("01030400010002 2a32".replace(" ", ""))
+
+
+def write_capture(path, records):
+    with CaptureWriter(str(path)) as writer:
+        for timestamp, direction, frame in records:
+            writer.write_frame(direction, frame, timestamp)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "bus.cap"
+    write_capture(path, [(10.0, CaptureDirection.request, REQUEST)])
+    # Appending to an existing capture does not repeat the magic
+    write_capture(path, [(10.5, CaptureDirection.response, RESPONSE)])
+
+    assert path.read_bytes().count(CAPTURE_MAGIC) == 1
+    assert [tuple(record) for record in iter_capture(str(path))] == [
+        (10.0, CaptureDirection.request, REQUEST),
+        (10.5, CaptureDirection.response, RESPONSE),
+    ]
+
+
+def test_empty_and_foreign_files(tmp_path):
+    empty = tmp_path / "empty.cap"
+    empty.touch()
+    assert list(iter_capture(str(empty))) == []
+
+    foreign = tmp_path / "foreign.cap"
+    foreign.write_bytes(b"not a capture file")
+    with pytest.raises(Exception, match="not a modbus capture file"):
+        list(iter_capture(str(foreign)))
+
+
+def test_truncated_record_is_dropped(tmp_path):
+    path = tmp_path / "bus.cap"
+    write_capture(
+        path,
+        [
+            (1.0, CaptureDirection.request, REQUEST),
+            (1.1, CaptureDirection.response, RESPONSE),
+        ],
+    )
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert [record.frame for record in iter_capture(str(path))] == [REQUEST]
+
+
+def test_transactions_pair_requests_with_responses(tmp_path):
+    path = tmp_path / "bus.cap"
+    write_capture(
+        path,
+        [
+            # Stray response before any request
+            (0.5, CaptureDirection.response, RESPONSE),
+            (1.0, CaptureDirection.request, REQUEST),
+            (1.25, CaptureDirection.response, RESPONSE),
+            # Unanswered requests, the last one at the end of the capture
+            (2.0, CaptureDirection.request, b"\x00\x06"),
+            (3.0, CaptureDirection.request, REQUEST),
+        ],
+    )
+
+    assert [tuple(t) for t in iter_transactions(str(path))] == [
+        (1.0, REQUEST, RESPONSE, 0.25),
+        (2.0, b"\x00\x06", None, 0.0),
+        (3.0, REQUEST, None, 0.0),
+    ]
+
+
+class LoopbackSerial:
+    """
+    Serial port with a single slave answering from a register store.
+    """
+
+    def __init__(self):
+        self.store = RegisterStore(16)
+        self.pending = b""
+
+    def write(self, frame):
+        response = bytes([frame[0]]) + handle_request(self.store, bytes(frame[1:-2]))
+        self.pending = response + calculate_crc(response).to_bytes(2, "little")
+        return len(frame)
+
+    def read(self, size):
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def reset_input_buffer(self):
+        self.pending = b""
+
+
+def test_master_captures_bus_timing(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        modbus_master, "initialize_device", lambda *_: LoopbackSerial()
+    )
+    path = tmp_path / "bus.cap"
+    with CaptureWriter(str(path)) as capture:
+        master = modbus_master.ModbusMaster(
+            "port", 9600, "N", 1, 0.1, 1, turnaround_delay=0.2, capture=capture
+        )
+        before = time.time()
+        master.read_holding_register(0, 2, False)
+
+    (transaction,) = iter_transactions(str(path))
+    # The turnaround delay is spent by the master, it is not part of the response delay
+    assert transaction.timestamp - before >= 0.2
+    assert transaction.response_delay < 0.1
@@ -0,0 +1,67 @@
+import pytest
+
+from modbus_utility.utils.change_detection import ChangeDetector, parse_deadbands
+
+
+def test_first_sample_is_a_snapshot():
+    detector = ChangeDetector()
+    changes = detector.detect(10, [1, 2, 3], now=0.0)
+    assert changes.snapshot
+    assert changes.changes == [(10, 1), (11, 2), (12, 3)]
+
+
+def test_only_changed_registers_are_reported():
+    detector = ChangeDetector()
+    detector.detect(0, [1, 2, 3], now=0.0)
+    assert detector.detect(0, [1, 2, 3], now=1.0).changes == []
+    changes = detector.detect(0, [1, 5, 3], now=2.0)
+    assert not changes.snapshot
+    assert changes.changes == [(1, 5)]
+
+
+def test_changes_across_compare_chunks():
+    detector = ChangeDetector()
+    values = list(range(40))
+    detector.detect(0, values, now=0.0)
+    values[3] += 1
+    values[33] += 1
+    assert detector.detect(0, values, now=1.0).changes == [(3, 4), (33, 34)]
+
+
+def test_deadband_suppresses_small_changes():
+    detector = ChangeDetector({0: 5})
+    detector.detect(0, [100, 100], now=0.0)
+    # Within the deadband of register 0, register 1 has none
+    assert detector.detect(0, [105, 101], now=1.0).changes == [(1, 101)]
+    assert detector.detect(0, [106, 101], now=2.0).changes == [(0, 106)]
+
+
+def test_deadband_is_measured_from_the_last_reported_value():
+    detector = ChangeDetector({0: 5})
+    detector.detect(0, [100], now=0.0)
+    # Drifting by less than the deadband per sample still gets reported once it adds up
+    assert detector.detect(0, [104], now=1.0).changes == []
+    assert detector.detect(0, [108], now=2.0).changes == [(0, 108)]
+    assert detector.detect(0, [104], now=3.0).changes == []
+
+
+def test_snapshot_interval_forces_a_full_report():
+    detector = ChangeDetector(snapshot_interval=10.0)
+    detector.detect(0, [1, 2], now=0.0)
+    assert detector.detect(0, [1, 2], now=5.0).changes == []
+    changes = detector.detect(0, [1, 2], now=10.0)
+    assert changes.snapshot
+    assert changes.changes == [(0, 1), (1, 2)]
+
+
+def test_reset_forgets_the_reported_values():
+    detector = ChangeDetector()
+    detector.detect(0, [1], now=0.0)
+    detector.reset()
+    assert detector.detect(0, [1], now=1.0).snapshot
+
+
+def test_parse_deadbands():
+    assert parse_deadbands(["10=2.5", "0x10=1"]) == {10: 2.5, 16: 1.0}
+    with pytest.raises(ValueError):
+        parse_deadbands(["10"])
@@ -0,0 +1,124 @@
+import pytest
+
+from modbus_utility.physical.modbus_serial import calculate_crc
+from modbus_utility.utils import modbus_master
+from modbus_utility.utils.config_push import ConfigPush, parse_targets
+from modbus_utility.utils.register_store import RegisterStore
+from modbus_utility.utils.request_handler import handle_request
+
+SESSION = {"baudrate": 9600, "parity": "N", "stopbits": 1, "timeout": 0.1}
+
+
+class FakeBus:
+    """
+    Serial port with slaves behind it, answering from their own stores.
+    """
+
+    def __init__(self, addresses, deaf=(), ignore_first=()):
+        self.stores = {address: RegisterStore(256) for address in addresses}
+        # Slaves that miss every broadcast, and the ones that miss their first unicast write
+        self.deaf = set(deaf)
+        self.ignore_first = set(ignore_first)
+        self.frames = []
+        self.pending = b""
+
+    def write(self, frame):
+        frame = bytes(frame)
+        self.frames.append(frame)
+        self.pending = b""
+        address, pdu = frame[0], frame[1:-2]
+        if address == 0:
+            for slave, store in self.stores.items():
+                if slave not in self.deaf:
+                    handle_request(store, pdu)
+            return len(frame)
+        if address not in self.stores:
+            return len(frame)
+        if pdu[0] in (6, 16) and address in self.ignore_first:
+            self.ignore_first.discard(address)
+            return len(frame)
+        response = bytes([address]) + handle_request(self.stores[address], pdu)
+        self.pending = response + calculate_crc(response).to_bytes(2, "little")
+        return len(frame)
+
+    def read(self, size):
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def reset_input_buffer(self):
+        self.pending = b""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def buses(monkeypatch):
+    buses = {}
+    monkeypatch.setattr(modbus_master, "initialize_device", lambda port, *_: buses[port])
+    return buses
+
+
+def push(buses, broadcast, retries=2, values=(42, 43)):
+    targets = {port: sorted(bus.stores) for port, bus in buses.items()}
+    pusher = ConfigPush(SESSION, 5, values, targets, broadcast, retries, 0.0)
+    return {(result.port, result.address): result for result in pusher.run()}
+
+
+def test_parse_targets():
+    assert parse_targets(["1-3,7", "p2:5", "2"], "p1") == {"p1": [1, 2, 3, 7], "p2": [5]}
+    for target in ["0", "1-248", "5-3", "a"]:
+        with pytest.raises(ValueError):
+            parse_targets([target], "p1")
+
+
+def test_values_are_range_checked():
+    for register, values in [(0, [0x10000]), (0, [-1]), (0xFFFF, [1, 2]), (0, [])]:
+        with pytest.raises(ValueError):
+            ConfigPush(SESSION, register, values, {})
+
+
+def test_unicast_by_default(buses):
+    buses["p1"] = FakeBus([1, 2])
+    results = push(buses, broadcast=False)
+    assert all(result.ok and result.method == "unicast" for result in results.values())
+    assert all(frame[0] != 0 for frame in buses["p1"].frames)
+    assert list(buses["p1"].stores[2].read_holding_registers(5, 2)) == [42, 43]
+
+
+def test_broadcast_with_unicast_retry(buses):
+    buses["p1"] = FakeBus([1, 2, 3], deaf=[2])
+    results = push(buses, broadcast=True)
+    assert [frame[0] for frame in buses["p1"].frames].count(0) == 1
+    assert results[("p1", 1)].method == "broadcast"
+    assert results[("p1", 2)].ok
+    assert (results[("p1", 2)].method, results[("p1", 2)].attempts) == ("unicast", 2)
+
+
+def test_retries_until_verified(buses):
+    buses["p1"] = FakeBus([1], ignore_first=[1])
+    result = push(buses, broadcast=False)[("p1", 1)]
+    assert (result.ok, result.attempts) == (True, 2)
+
+
+def test_missing_device_fails_after_the_retries(buses):
+    buses["p1"] = FakeBus([1])
+    pusher = ConfigPush(SESSION, 5, [42], {"p1": [1, 9]}, False, 1, 0.0)
+    results = {result.address: result for result in pusher.run()}
+    assert results[1].ok
+    assert (results[9].ok, results[9].attempts) == (False, 2)
+
+
+def test_every_device_gets_a_result_when_the_bus_fails(buses, monkeypatch):
+    buses["p1"] = FakeBus([1, 2, 3])
+
+    def fail(*_):
+        raise KeyError("unexpected")
+
+    monkeypatch.setattr(ConfigPush, "push_unicast", fail)
+    results = push(buses, broadcast=False)
+    assert sorted(results) == [("p1", 1), ("p1", 2), ("p1", 3)]
+    assert not any(result.ok for result in results.values())
@@ -0,0 +1,131 @@
+import pytest
+
+from modbus_utility.physical.modbus_serial import calculate_crc, CRC_TABLE
+from modbus_utility.utils.pdu_codec import (
+    decode_bits_response,
+    decode_registers_response,
+    decode_request,
+    decode_write_response,
+    encode_bits_response,
+    encode_exception,
+    encode_read_request,
+    encode_read_write_registers,
+    encode_registers_response,
+    encode_write_registers,
+    encode_write_single,
+    finish_rtu_frame,
+    ModbusExceptionResponse,
+    pack_bits,
+    rtu_pdu,
+    split_range,
+    unpack_bits,
+    verify_crc,
+)
+
+
+def bitwise_crc(data: bytes) -> int:
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def test_crc_known_vector():
+    frame = bytes.fromhex("01030000000A")
+    assert calculate_crc(frame) == 0xCDC5
+    buffer = bytearray(8)
+    buffer[:6] = frame
+    assert finish_rtu_frame(buffer, 6) == 8
+    assert buffer.hex() == "01030000000ac5cd"
+    assert verify_crc(buffer)
+
+
+def test_crc_table_matches_bitwise_crc():
+    for byte in range(256):
+        assert calculate_crc(bytes([byte])) == bitwise_crc(bytes([byte]))
+    data = bytes(range(256)) * 2
+    assert calculate_crc(data) == bitwise_crc(data)
+    assert len(CRC_TABLE) == 256
+
+
+def test_verify_crc_rejects_corrupted_frame():
+    frame = bytearray.fromhex("01030000000ac5cd")
+    frame[3] ^= 1
+    assert not verify_crc(frame)
+    assert not verify_crc(b"\x01\x03")
+
+
+@pytest.mark.parametrize("function_code", [1, 2, 3, 4])
+def test_read_request_round_trip(function_code):
+    buffer = bytearray(5)
+    assert encode_read_request(buffer, 0, function_code, 0x1234, 125) == 5
+    request = decode_request(memoryview(buffer))
+    assert (request.function_code, request.address, request.quantity) == (
+        function_code,
+        0x1234,
+        125,
+    )
+
+
+def test_write_single_round_trip():
+    buffer = bytearray(5)
+    encode_write_single(buffer, 0, 6, 40, 0xBEEF)
+    assert decode_write_response(memoryview(buffer)) == (6, 40, 0xBEEF)
+
+
+def test_write_registers_round_trip():
+    values = [0, 1, 0x7FFF, 0xFFFF]
+    buffer = bytearray(6 + 2 * len(values))
+    length = encode_write_registers(buffer, 0, 100, values)
+    request = decode_request(memoryview(buffer)[:length])
+    assert (request.function_code, request.address, request.quantity) == (16, 100, 4)
+    assert bytes(request.data) == b"".join(value.to_bytes(2, "big") for value in values)
+
+
+def test_read_write_registers_round_trip():
+    buffer = bytearray(10 + 4)
+    length = encode_read_write_registers(buffer, 0, 10, 3, 20, [7, 8])
+    request = decode_request(memoryview(buffer)[:length])
+    assert request.function_code == 23
+    assert (request.address, request.quantity) == (10, 3)
+    assert (request.write_address, request.write_quantity) == (20, 2)
+    assert bytes(request.data) == bytes.fromhex("00070008")
+
+
+def test_registers_response_round_trip():
+    values = tuple(range(0, 125 * 500, 500))
+    buffer = bytearray(2 + 2 * len(values))
+    length = encode_registers_response(buffer, 0, 3, values)
+    assert decode_registers_response(memoryview(buffer)[:length], len(values)) == values
+
+
+def test_bits_response_round_trip():
+    bits = [1, 0, 1, 1, 0, 0, 0, 1, 1, 1]
+    packed = pack_bits(bits)
+    assert packed == bytes([0b10001101, 0b11])
+    buffer = bytearray(2 + len(packed))
+    length = encode_bits_response(buffer, 0, 1, packed)
+    decoded = decode_bits_response(memoryview(buffer)[:length], len(bits))
+    assert list(unpack_bits(decoded, len(bits))) == bits
+
+
+def test_exception_response_raises():
+    buffer = bytearray(2)
+    encode_exception(buffer, 0, 3, 2)
+    with pytest.raises(ModbusExceptionResponse):
+        decode_registers_response(memoryview(buffer), 1)
+
+
+def test_rtu_pdu_strips_address_and_crc():
+    buffer = bytearray(8)
+    buffer[0] = 1
+    length = finish_rtu_frame(buffer, encode_read_request(buffer, 1, 3, 0, 10))
+    assert bytes(rtu_pdu(bytes(buffer[:length]))) == bytes.fromhex("030000000a")
+
+
+def test_split_range():
+    assert split_range(0, 250, 125) == [(0, 125), (125, 125)]
+    assert split_range(10, 3, 125) == [(10, 3)]
+    assert split_range(0, 2001, 2000) == [(0, 2000), (2000, 1)]
@@ -0,0 +1,84 @@
+import pytest
+
+from modbus_utility.utils.register_cache import (
+    missing_ranges,
+    parse_range_ttls,
+    RegisterCache,
+)
+
+
+class Device:
+    def __init__(self):
+        self.registers = list(range(1000, 1100))
+        self.requests = []
+
+    def fetch(self, start, count):
+        self.requests.append((start, count))
+        return self.registers[start : start + count]
+
+
+def test_read_through_fetches_only_missing_registers():
+    cache = RegisterCache(60.0)
+    device = Device()
+    assert cache.read_through("p", 1, 3, 0, 4, device.fetch) == (1000, 1001, 1002, 1003)
+    assert cache.read_through("p", 1, 3, 2, 6, device.fetch) == tuple(range(1002, 1008))
+    assert device.requests == [(0, 4), (4, 4)]
+    assert cache.read_through("p", 1, 3, 0, 8, device.fetch) == tuple(range(1000, 1008))
+    assert device.requests == [(0, 4), (4, 4)]
+    assert (cache.stats.misses, cache.stats.partial_hits, cache.stats.hits) == (1, 1, 1)
+
+
+def test_entries_expire_after_their_ttl():
+    cache = RegisterCache(1.0, range_ttls=[(10, 19, 5.0)])
+    cache.store("p", 1, 3, 8, [1, 2, 3], now=0.0)
+    assert cache.lookup("p", 1, 3, 8, 3, now=0.5) == [1, 2, 3]
+    # 8 and 9 use the default TTL, 10 the range one
+    assert cache.lookup("p", 1, 3, 8, 3, now=2.0) == [None, None, 3]
+    assert cache.lookup("p", 1, 3, 8, 3, now=5.0) == [None, None, None]
+
+
+def test_write_invalidates_the_matching_read_table():
+    cache = RegisterCache(60.0)
+    cache.store("p", 1, 3, 0, [1, 2, 3, 4])
+    cache.store("p", 1, 1, 0, [1, 1])
+    cache.invalidate("p", 1, 16, 1, 2)
+    assert cache.lookup("p", 1, 3, 0, 4) == [1, None, None, 4]
+    assert cache.lookup("p", 1, 1, 0, 2) == [1, 1]
+    cache.invalidate("p", 1, 5, 0, 1)
+    assert cache.lookup("p", 1, 1, 0, 2) == [None, 1]
+    assert cache.stats.invalidations == 3
+
+
+def test_invalidation_is_per_port_and_slave():
+    cache = RegisterCache(60.0)
+    cache.store("p", 1, 3, 0, [1])
+    cache.store("p", 2, 3, 0, [2])
+    cache.store("q", 1, 3, 0, [3])
+    cache.invalidate("p", 1, 6, 0, 1)
+    assert cache.lookup("p", 1, 3, 0, 1) == [None]
+    assert cache.lookup("p", 2, 3, 0, 1) == [2]
+    assert cache.lookup("q", 1, 3, 0, 1) == [3]
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = RegisterCache(60.0, max_entries=2)
+    cache.store("p", 1, 3, 0, [1, 2])
+    cache.lookup("p", 1, 3, 0, 1)
+    cache.store("p", 1, 3, 2, [3])
+    assert cache.lookup("p", 1, 3, 0, 3) == [1, None, 3]
+    assert cache.stats.evictions == 1
+
+
+def test_missing_ranges():
+    assert missing_ranges(10, [None, None, 1, None, 2, 3, None]) == [
+        (10, 2),
+        (13, 1),
+        (16, 1),
+    ]
+    assert missing_ranges(0, [1, 2]) == []
+
+
+def test_parse_range_ttls():
+    assert parse_range_ttls(["10-19=5", "0x20=0.5"]) == [(10, 19, 5.0), (32, 32, 0.5)]
+    with pytest.raises(ValueError):
+        parse_range_ttls(["10-19"])
@@ -0,0 +1,66 @@
+import pytest
+
+from modbus_utility.utils.register_store import RegisterStore
+from modbus_utility.utils.request_handler import ExceptionCode, handle_request
+
+
+@pytest.fixture
+def store():
+    return RegisterStore(100)
+
+
+def exception(function_code: int, exception_code: int) -> bytes:
+    return bytes([function_code | 0x80, exception_code])
+
+
+def request(store: RegisterStore, pdu: str) -> bytes:
+    return handle_request(store, bytes.fromhex(pdu.replace(" ", "")))
+
+
+@pytest.mark.parametrize(
+    "pdu, expected",
+    [
+        # Unknown function code
+        ("2b0e0100", exception(0x2B, ExceptionCode.illegal_function)),
+        # Quantity 0 and above the limit of each read
+        ("0300000000", exception(3, ExceptionCode.illegal_data_value)),
+        ("030000007e", exception(3, ExceptionCode.illegal_data_value)),
+        ("01000007d1", exception(1, ExceptionCode.illegal_data_value)),
+        # Range past the end of the store
+        ("0400630002", exception(4, ExceptionCode.illegal_data_address)),
+        ("0200600005", exception(2, ExceptionCode.illegal_data_address)),
+        ("0600640001", exception(6, ExceptionCode.illegal_data_address)),
+        # Coil values other than ON and OFF
+        ("0500000001", exception(5, ExceptionCode.illegal_data_value)),
+        # Byte count that does not match the quantity
+        ("10000000020400010002ff", exception(16, ExceptionCode.illegal_data_value)),
+        ("1000000002020001", exception(16, ExceptionCode.illegal_data_value)),
+        ("0f000000090101", exception(15, ExceptionCode.illegal_data_value)),
+        ("1000630002040001 0002", exception(16, ExceptionCode.illegal_data_address)),
+        # Read/write with an invalid write range
+        (
+            "1700000001006300020400010002",
+            exception(23, ExceptionCode.illegal_data_address),
+        ),
+        ("17000000010000000002 0001", exception(23, ExceptionCode.illegal_data_value)),
+        # Truncated request
+        ("0300", exception(3, ExceptionCode.illegal_data_value)),
+    ],
+)
+def test_exception_responses(store, pdu, expected):
+    assert request(store, pdu) == expected
+
+
+def test_failed_write_leaves_the_store_unchanged(store):
+    request(store, "1000630002040001 0002")
+    assert list(store.read_holding_registers(99, 1)) == [0]
+    assert store.generation == 0
+
+
+def test_valid_requests(store):
+    assert request(store, "0600050102") == bytes.fromhex("0600050102")
+    assert request(store, "0300040002") == bytes.fromhex("030400000102")
+    assert request(store, "0f0000000a020d02") == bytes.fromhex("0f0000000a")
+    assert request(store, "010000000a") == bytes.fromhex("01020d02")
+    # The write of FC 23 happens before its read
+    assert request(store, "1700000002000000010200 07") == bytes.fromhex("170400070000")
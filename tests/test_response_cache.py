@@ -0,0 +1,71 @@
+from modbus_utility.utils.pdu_codec import encode_read_request, finish_rtu_frame
+from modbus_utility.utils.register_store import GENERATION_BLOCK, RegisterStore
+from modbus_utility.utils.response_cache import ResponseCache
+
+
+def request(function_code: int, start: int, count: int) -> bytes:
+    buffer = bytearray(8)
+    buffer[0] = 1
+    length = finish_rtu_frame(
+        buffer, encode_read_request(buffer, 1, function_code, start, count)
+    )
+    return bytes(buffer[:length])
+
+
+def test_hit_until_the_range_is_written():
+    store = RegisterStore()
+    cache = ResponseCache(store)
+    frame = request(3, 0, 10)
+    assert cache.lookup(frame) is None
+    assert cache.store_response(frame, b"response", store.generation)
+    assert cache.lookup(frame) == b"response"
+
+    store.write_holding_registers(5, [1])
+    assert cache.lookup(frame) is None
+    assert cache.stats.stale == 1
+    # The stale entry is dropped
+    assert frame not in cache.entries
+
+
+def test_writes_elsewhere_keep_the_entry():
+    store = RegisterStore()
+    cache = ResponseCache(store)
+    frame = request(3, 0, 10)
+    cache.store_response(frame, b"response", store.generation)
+    store.write_holding_registers(GENERATION_BLOCK * 2, [1])
+    store.write_input_registers(0, [1])
+    assert cache.lookup(frame) == b"response"
+
+
+def test_response_encoded_before_a_write_is_stale():
+    store = RegisterStore()
+    cache = ResponseCache(store)
+    frame = request(4, 0, 2)
+    generation = store.generation
+    # Written between reading the store and caching the response
+    store.write_input_registers(0, [1])
+    cache.store_response(frame, b"old", generation)
+    assert cache.lookup(frame) is None
+
+
+def test_only_reads_are_cached():
+    store = RegisterStore()
+    cache = ResponseCache(store)
+    assert not cache.store_response(request(6, 0, 1), b"response", store.generation)
+    assert cache.cacheable(request(1, 0, 8)) == ("coils", 0, 8)
+
+
+def test_oldest_entry_is_evicted():
+    store = RegisterStore()
+    cache = ResponseCache(store, max_entries=2)
+    frames = [request(3, start, 1) for start in range(3)]
+    for frame in frames:
+        cache.store_response(frame, frame, store.generation)
+    assert cache.lookup(frames[0]) is None
+    assert cache.lookup(frames[2]) == frames[2]
+    assert cache.stats.evictions == 1
+
+
+def test_shared_buffer_disables_the_cache():
+    store = RegisterStore(16, memoryview(bytearray(64)))
+    assert not ResponseCache(store).enabled
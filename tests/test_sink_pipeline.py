@@ -0,0 +1,167 @@
+import socket
+import threading
+import time
+
+from modbus_utility.utils.sink_pipeline import (
+    Backpressure,
+    ErrorRecord,
+    SinkPipeline,
+    SocketSink,
+)
+
+
+class GatedSink:
+    """
+    Sink that holds every batch until it is released.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+        self.limits = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.closed = False
+
+    def write_batch(self, records):
+        self.entered.set()
+        self.release.wait()
+        time.sleep(self.delay)
+        self.batches.append([record.message for record in records])
+
+    def limit_time(self, seconds):
+        self.limits.append(seconds)
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def written(self):
+        return [message for batch in self.batches for message in batch]
+
+
+def record(index: int) -> ErrorRecord:
+    return ErrorRecord(0.0, 1, str(index))
+
+
+def stall(policy: Backpressure, max_size: int = 2, **kwargs):
+    """
+    Creates a pipeline whose sink is busy with record 0, so the queue fills up.
+    """
+    sink = GatedSink()
+    pipeline = SinkPipeline([sink], max_size, policy, **kwargs)
+    pipeline.put(record(0))
+    assert sink.entered.wait(1)
+    return sink, pipeline
+
+
+def test_records_are_written_in_order_and_in_batches():
+    sink, pipeline = stall(Backpressure.block, max_size=100, batch_size=4)
+    for index in range(1, 11):
+        pipeline.put(record(index))
+    sink.release.set()
+    pipeline.close()
+
+    assert sink.written == [str(index) for index in range(11)]
+    assert [len(batch) for batch in sink.batches] == [1, 4, 4, 2]
+    assert sink.closed
+    assert pipeline.stats.written == 11
+    assert pipeline.stats.max_depth == 10
+
+
+def test_block_stalls_the_producer_until_the_sink_catches_up():
+    sink, pipeline = stall(Backpressure.block)
+    pipeline.put(record(1))
+    pipeline.put(record(2))
+    producer = threading.Thread(target=pipeline.put, args=(record(3),))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+
+    sink.release.set()
+    producer.join(1)
+    assert not producer.is_alive()
+    pipeline.close()
+    assert sink.written == ["0", "1", "2", "3"]
+    assert pipeline.stats.blocked == 1
+    assert pipeline.stats.dropped == 0
+
+
+def test_drop_oldest_keeps_the_newest_records():
+    sink, pipeline = stall(Backpressure.drop_oldest)
+    for index in range(1, 6):
+        pipeline.put(record(index))
+    sink.release.set()
+    pipeline.close()
+
+    assert sink.written == ["0", "4", "5"]
+    assert pipeline.stats.dropped == 3
+
+
+def test_sample_keeps_one_of_every_sample_every_records():
+    sink, pipeline = stall(Backpressure.sample, sample_every=3)
+    for index in range(1, 10):
+        pipeline.put(record(index))
+    sink.release.set()
+    pipeline.close()
+
+    # 3 and 6 replace the oldest queued record, 9 as well, the others are dropped
+    assert sink.written == ["0", "6", "9"]
+    assert pipeline.stats.dropped == 7
+
+
+def test_records_put_after_close_are_dropped():
+    sink, pipeline = stall(Backpressure.block)
+    pipeline.put(record(1))
+    pipeline.put(record(2))
+    producer = threading.Thread(target=pipeline.put, args=(record(3),))
+    producer.start()
+    producer.join(0.1)
+
+    closer = threading.Thread(target=pipeline.close)
+    closer.start()
+    # Closing wakes the blocked producer, its record is not queued anymore
+    producer.join(1)
+    assert not producer.is_alive()
+    sink.release.set()
+    closer.join(1)
+    pipeline.put(record(4))
+
+    assert sink.written == ["0", "1", "2"]
+    assert pipeline.stats.enqueued == 5
+    assert pipeline.stats.dropped == 2
+    assert len(pipeline.queue) == 0
+
+
+def test_drain_is_bounded_by_the_timeout():
+    sink, pipeline = stall(Backpressure.block, max_size=100, batch_size=1)
+    sink.delay = 0.1
+    for index in range(1, 20):
+        pipeline.put(record(index))
+    sink.release.set()
+
+    started = time.monotonic()
+    pipeline.close(drain_timeout=0.25)
+    assert time.monotonic() - started < 1.0
+    assert 0 < pipeline.stats.dropped < 19
+    assert pipeline.stats.written + pipeline.stats.dropped == 20
+    # Every write made while closing is bounded by the time left
+    assert sink.limits and all(limit <= 0.25 for limit in sink.limits)
+    assert sink.limits == sorted(sink.limits, reverse=True)
+
+
+def test_socket_sink_limit_time():
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        sink = SocketSink(*server.getsockname())
+        sink.write_batch([record(1)])
+        connection, _ = server.accept()
+        with connection:
+            sink.limit_time(0.5)
+            assert sink.sock.gettimeout() == 0.5
+            # The timeout is never raised back, nor set to zero (non-blocking)
+            sink.limit_time(2.0)
+            assert sink.sock.gettimeout() == 0.5
+            sink.limit_time(-1.0)
+            assert 0 < sink.sock.gettimeout() < 0.5
+            assert connection.recv(1024).startswith(b'{"timestamp"')
+        sink.close()
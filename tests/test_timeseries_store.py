@@ -0,0 +1,75 @@
+import pytest
+
+from modbus_utility.utils.timeseries_store import TimeSeriesStore
+
+# Every sample is at a whole second so float32 values and ms timestamps stay exact
+BASE = 1_700_000_000.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_append_and_query(store):
+    for second in range(10):
+        store.append("1-0", BASE + second, second * 2)
+    store.flush()
+    assert list(store.query("1-0", BASE + 2, BASE + 5)) == [
+        (BASE + 2, 4.0),
+        (BASE + 3, 6.0),
+        (BASE + 4, 8.0),
+    ]
+    assert list(store.query("1-0", BASE - 10, BASE)) == []
+    assert list(store.query("missing", BASE, BASE + 10)) == []
+
+
+def test_append_block_creates_a_point_per_register(store):
+    store.append_block(1, 100, [7, 8], BASE)
+    store.flush()
+    assert store.points() == ["1-100", "1-101"]
+    assert list(store.query("1-101", BASE, BASE + 1)) == [(BASE, 8.0)]
+
+
+def test_samples_survive_reopening(tmp_path, store):
+    store.append("1-0", BASE, 1)
+    store.close()
+    reopened = TimeSeriesStore(str(tmp_path))
+    reopened.append("1-0", BASE + 1, 2)
+    reopened.close()
+    assert [value for _, value in reopened.query("1-0", BASE, BASE + 2)] == [1.0, 2.0]
+
+
+def test_query_spans_segments(store):
+    day = 24 * 3600
+    store.append("1-0", BASE, 1)
+    store.append("1-0", BASE + day + 1, 2)
+    store.flush()
+    assert len(store.segments("1-0")) == 2
+    values = [value for _, value in store.query("1-0", BASE, BASE + 2 * day)]
+    assert values == [1.0, 2.0]
+
+
+def test_downsample(store):
+    for second in range(10):
+        store.append("1-0", BASE + second, second)
+    store.flush()
+    buckets = store.downsample("1-0", BASE, BASE + 10, 4)
+    assert [
+        (bucket.start_ms, bucket.count, bucket.minimum, bucket.maximum, bucket.mean)
+        for bucket in buckets
+    ] == [
+        (int(BASE * 1000), 4, 0.0, 3.0, 1.5),
+        (int(BASE * 1000) + 4000, 4, 4.0, 7.0, 5.5),
+        (int(BASE * 1000) + 8000, 2, 8.0, 9.0, 8.5),
+    ]
+
+
+def test_downsample_skips_empty_buckets(store):
+    store.append("1-0", BASE, 1)
+    store.append("1-0", BASE + 30, 3)
+    store.flush()
+    buckets = store.downsample("1-0", BASE, BASE + 60, 10)
+    assert [(bucket.count, bucket.mean) for bucket in buckets] == [(1, 1.0), (1, 3.0)]
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+import serial
+
+from modbus_utility.utils import modbus_master
+from modbus_utility.utils.pdu_codec import ModbusTransportError
+from modbus_utility.utils.transaction_arbiter import (
+    Priority,
+    TransactionArbiter,
+    TransactionExpired,
+)
+
+
+class FakeMaster:
+    exit_on_transport_error = True
+
+
+@pytest.fixture
+def arbiter():
+    arbiter = TransactionArbiter(FakeMaster())
+    yield arbiter
+    arbiter.close()
+
+
+def hold_bus(arbiter):
+    """
+    Keeps the worker busy until the returned event is set, so the next submissions queue up.
+    """
+    release = threading.Event()
+    started = threading.Event()
+
+    def operation(_):
+        started.set()
+        release.wait(5)
+
+    arbiter.submit(operation, Priority.poll)
+    assert started.wait(5)
+    return release
+
+
+def test_higher_priority_goes_first(arbiter):
+    release = hold_bus(arbiter)
+    order = []
+    futures = [
+        arbiter.submit(lambda _, name=name: order.append(name), priority)
+        for name, priority in [
+            ("poll 1", Priority.poll),
+            ("alarm", Priority.alarm),
+            ("poll 2", Priority.poll),
+            ("control", Priority.control),
+        ]
+    ]
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert order == ["control", "alarm", "poll 1", "poll 2"]
+
+
+def test_stale_polls_are_dropped(arbiter):
+    release = hold_bus(arbiter)
+    stale = arbiter.submit(lambda _: "late", Priority.poll, deadline=0.01)
+    fresh = arbiter.submit(lambda _: "on time", Priority.poll, deadline=60.0)
+    time.sleep(0.05)
+    release.set()
+    with pytest.raises(TransactionExpired):
+        stale.result(5)
+    assert fresh.result(5) == "on time"
+    assert arbiter.stats.priorities[Priority.poll].dropped == 1
+
+
+def test_failures_resolve_the_future(arbiter):
+    def operation(_):
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        arbiter.submit(operation).result(5)
+    assert arbiter.submit(lambda _: 1).result(5) == 1
+    assert arbiter.stats.priorities[Priority.poll].failed == 1
+
+
+def test_queued_transactions_are_cancelled_on_close():
+    arbiter = TransactionArbiter(FakeMaster())
+    release = hold_bus(arbiter)
+    queued = arbiter.submit(lambda _: None)
+    threading.Timer(0.05, release.set).start()
+    arbiter.close()
+    assert queued.cancelled()
+
+
+class UnpluggedSerial:
+    def reset_input_buffer(self):
+        pass
+
+    def write(self, _):
+        raise serial.SerialException("device disconnected")
+
+
+def test_failed_port_raises_a_transport_error(monkeypatch):
+    monkeypatch.setattr(modbus_master, "initialize_device", lambda *_: UnpluggedSerial())
+    master = modbus_master.ModbusMaster("port", 9600, "N", 1, 0.1, 1, turnaround_delay=0)
+    arbiter = TransactionArbiter(master)
+    try:
+        with pytest.raises(ModbusTransportError):
+            arbiter.read_holding_register(0, 1).result(5)
+    finally:
+        arbiter.close()
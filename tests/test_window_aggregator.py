@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from modbus_utility.utils.window_aggregator import (
+    SlidingWindow,
+    TumblingWindow,
+    WindowAggregator,
+)
+
+
+def brute_force(samples, start, end):
+    window = [values for timestamp, values in samples if start < timestamp <= end]
+    return [(min(point), max(point), sum(point)) for point in zip(*window)], len(window)
+
+
+def test_sliding_window_matches_brute_force():
+    generator = random.Random(1)
+    window = SlidingWindow(10.0, 2.0)
+    samples = []
+    now = 0.0
+    reports = 0
+    for _ in range(500):
+        now += generator.choice([0.5, 1.0, 1.5, 3.0])
+        values = [generator.randint(0, 1000) for _ in range(3)]
+        samples.append((now, values))
+        report = window.add(now, values)
+        if report is None:
+            continue
+        reports += 1
+        expected, count = brute_force(samples, now - 10.0, now)
+        assert (report.start, report.end, report.samples) == (now - 10.0, now, count)
+        assert [
+            (stats.minimum, stats.maximum, stats.total) for stats in report.points
+        ] == expected
+    assert reports > 100
+
+
+def test_sliding_window_reports_once_per_step():
+    window = SlidingWindow(10.0, 5.0)
+    reported = [t for t in range(1, 21) if window.add(float(t), [t]) is not None]
+    assert reported == [5, 10, 15, 20]
+
+
+def test_tumbling_window_is_reported_by_the_next_sample():
+    window = TumblingWindow(10.0)
+    assert window.add(1.0, [5]) is None
+    assert window.add(9.0, [7]) is None
+    report = window.add(12.0, [1])
+    assert (report.start, report.end, report.samples) == (0.0, 10.0, 2)
+    assert [(stats.minimum, stats.maximum, stats.mean) for stats in report.points] == [
+        (5, 7, 6.0)
+    ]
+
+
+def test_counter_rollover():
+    aggregator = WindowAggregator(0, 2, 10.0, counters=[0])
+    aggregator.add(1.0, [0xFFFF, 0xFFF0])
+    # 0xFFFFFFF0 to 0x00000010 is an increment of 0x20
+    aggregator.add(2.0, [0x0000, 0x0010])
+    aggregator.add(3.0, [0x0000, 0x0020])
+    [stats] = aggregator.flush(4.0).points
+    assert stats.counter
+    assert (stats.minimum, stats.maximum, stats.total) == (0x10, 0x20, 0x30)
+
+
+def test_first_sample_counts_for_plain_registers():
+    aggregator = WindowAggregator(10, 3, 10.0, counters=[11])
+    assert aggregator.add(1.0, [4, 0, 1]) is None
+    assert aggregator.add(2.0, [6, 0, 4]) is None
+    report = aggregator.add(11.0, [0, 0, 5])
+    assert report.samples == 2
+    plain, counter = report.points
+    assert (plain.register, plain.counter) == (10, False)
+    assert (plain.minimum, plain.maximum) == (4, 6)
+    assert (counter.register, counter.counter, counter.total) == (11, True, 3)
+
+
+def test_flush_ends_at_the_stop_time():
+    aggregator = WindowAggregator(0, 1, 60.0)
+    aggregator.add(61.0, [1])
+    report = aggregator.flush(75.0)
+    assert (report.start, report.end) == (60.0, 75.0)
+
+
+def test_overlapping_counters_are_rejected():
+    with pytest.raises(ValueError):
+        WindowAggregator(0, 4, 10.0, counters=[0, 1])
+    with pytest.raises(ValueError):
+        WindowAggregator(0, 4, 10.0, counters=[3])